@@ -15,6 +15,8 @@ logger = logging.getLogger('agrifinance_api')
 from api.models.base import Base
 db = SQLAlchemy(model_class=Base)
 
+from api.http_cache import http_cache
+
 def create_app(test_config=None):
     """Create and configure the Flask application"""
     app = Flask(__name__, instance_relative_config=True)
@@ -27,11 +29,13 @@ def create_app(test_config=None):
         SQLALCHEMY_ENGINE_OPTIONS={
             "pool_recycle": 300,
             "pool_pre_ping": True
-        }
+        },
+        RESPONSE_COMPRESSION_MIN_SIZE=int(os.environ.get("RESPONSE_COMPRESSION_MIN_SIZE", 1024))
     )
     
     # Initialize extensions
     db.init_app(app)
+    http_cache.init_app(app)
     
     # Register blueprints
     from api.routes.farmer_routes import farmer_api
@@ -47,10 +51,40 @@ def create_app(test_config=None):
     app.register_blueprint(credit_api, url_prefix='/api/credit')
     
     # Create database tables
+    from api.services.crop_health_service import crop_health_service
+    from api.services.forecast_store import forecast_store
+    from api.services.risk_assessment_service import risk_assessment_service
+    
     with app.app_context():
         db.create_all()
+        crop_health_service.ensure_schema(db.engine)
+        forecast_store.ensure_schema(db.engine)
+        risk_assessment_service.ensure_schema(db.engine)
         logger.info("Database tables created or verified")
     
+    @app.cli.command('compact-forecasts')
+    def compact_forecasts():
+        """Delete past weather forecasts beyond the retention window"""
+        deleted = forecast_store.compact(db.session)
+        db.session.commit()
+        print(f"Deleted {deleted} weather forecasts")
+    
+    @app.cli.command('refresh-crop-health')
+    def refresh_crop_health():
+        """Store new satellite NDVI, crop health and trend for farms with outdated NDVI"""
+        updated = crop_health_service.refresh_farms(db.session)
+        db.session.commit()
+        print(f"Refreshed crop health for {updated} farms")
+    
+    @app.cli.command('precompute-climate-risk')
+    def precompute_climate_risk():
+        """Assess climate risk for every farm"""
+        summary = risk_assessment_service.precompute(db.session)
+        deleted = risk_assessment_service.compact(db.session)
+        db.session.commit()
+        print(f"Stored {summary['assessments']} climate risk assessments from {summary['groups']} cell and crop groups")
+        print(f"Deleted {deleted} superseded climate risk assessments")
+    
     @app.route('/api/health')
     def health_check():
         """API health check endpoint"""
@@ -0,0 +1,208 @@
+"""
+HTTP response layer for the AgriFinance API.
+
+Applied to every blueprint by create_app: response bodies are hashed into
+ETags so clients revalidate with If-None-Match and get 304 Not Modified for
+unchanged data, bodies above a size threshold are compressed with brotli or
+gzip as the client accepts, and views can opt in to caching their serialized
+bodies for idempotent GETs.
+"""
+import gzip
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, make_response, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+logger = logging.getLogger('agrifinance_api.http_cache')
+
+# Mimetypes worth compressing
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript')
+
+
+class HTTPCache:
+    """
+    ETag, compression and GET body caching for a Flask app.
+    """
+
+    def __init__(self, app=None, min_size=1024, max_entries=512, max_compressed=256):
+        """
+        Initialize the layer
+
+        Args:
+            app: Flask app, or None to call init_app later
+            min_size: Smallest body in bytes that is compressed
+            max_entries: Cached GET bodies kept
+            max_compressed: Compressed bodies kept, keyed by ETag and encoding
+        """
+        self.min_size = min_size
+        self.max_entries = max_entries
+        self.max_compressed = max_compressed
+        self._bodies = OrderedDict()
+        self._compressed = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"body_hits": 0, "body_misses": 0, "not_modified": 0, "compressed": 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Register the response hook on an app"""
+        self.min_size = app.config.get("RESPONSE_COMPRESSION_MIN_SIZE", self.min_size)
+        app.after_request(self._process_response)
+        app.extensions["http_cache"] = self
+
+    def cached(self, ttl=60, version=None):
+        """
+        Decorator caching a GET view's serialized body for ttl seconds.
+
+        Entries are keyed by path and query string, and every successful
+        POST, PUT, PATCH or DELETE clears the cache. Bodies live in process
+        memory, so that clearing only reaches the process handling the write.
+        Data written by other workers or by CLI jobs is picked up through
+        version: a callable returning the current data version, which is part
+        of the key so a new version misses. Without it, such writes are
+        served stale for up to ttl seconds.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method != 'GET':
+                    return view(*args, **kwargs)
+
+                key = (request.full_path, version() if version else None)
+                now = time.time()
+                with self._lock:
+                    entry = self._bodies.get(key)
+                    if entry and entry[0] > now:
+                        self._bodies.move_to_end(key)
+                        self._stats["body_hits"] += 1
+                        return Response(entry[1], status=200, mimetype=entry[2])
+                    self._stats["body_misses"] += 1
+
+                response = make_response(view(*args, **kwargs))
+
+                if response.status_code == 200 and not response.direct_passthrough \
+                        and 'Content-Encoding' not in response.headers:
+                    with self._lock:
+                        self._bodies[key] = (now + ttl, response.get_data(), response.mimetype)
+                        self._bodies.move_to_end(key)
+                        while len(self._bodies) > self.max_entries:
+                            self._bodies.popitem(last=False)
+                return response
+            return wrapper
+        return decorator
+
+    def clear(self):
+        """Drop all cached GET bodies"""
+        with self._lock:
+            self._bodies.clear()
+
+    def stats(self):
+        """Body cache hits and misses, 304 and compression counts"""
+        with self._lock:
+            return {**self._stats, "cached_bodies": len(self._bodies)}
+
+    def _process_response(self, response):
+        """after_request hook: invalidate, tag, revalidate and compress"""
+        if request.method not in ('GET', 'HEAD'):
+            if response.status_code < 400:
+                self.clear()
+            return response
+
+        if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+            return response
+
+        body = response.get_data()
+        etag = response.headers.get('ETag')
+        if not etag:
+            etag = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+            response.headers['ETag'] = etag
+
+        if self._matches(etag, request.headers.get('If-None-Match')):
+            with self._lock:
+                self._stats["not_modified"] += 1
+            not_modified = Response(status=304)
+            not_modified.headers['ETag'] = etag
+            not_modified.headers['Vary'] = 'Accept-Encoding'
+            return not_modified
+
+        if 'Content-Encoding' in response.headers or len(body) < self.min_size \
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+
+        encoding = self._negotiate(request.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return response
+
+        response.set_data(self._compress(etag, encoding, body))
+        response.headers['Content-Encoding'] = encoding
+        response.headers['ETag'] = f'{etag[:-1]}-{encoding}"'
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
+
+    def _matches(self, etag, if_none_match):
+        """Whether If-None-Match names this ETag, ignoring encoding suffixes"""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == '*':
+            return True
+        base = etag.strip('"')
+        for candidate in if_none_match.split(','):
+            tag = candidate.strip().removeprefix('W/').strip('"')
+            if tag == base or tag.rsplit('-', 1)[0] == base:
+                return True
+        return False
+
+    def _negotiate(self, accept_encoding):
+        """Supported encoding with the highest q value in an Accept-Encoding header, brotli on ties"""
+        weights = {}
+        for part in accept_encoding.split(','):
+            name, *params = [item.strip() for item in part.split(';')]
+            quality = 1.0
+            for param in params:
+                key, _, value = param.partition('=')
+                if key.strip().lower() == 'q':
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            if name:
+                weights[name.lower()] = quality
+
+        supported = ('br', 'gzip') if brotli is not None else ('gzip',)
+        encoding = max(supported, key=lambda name: weights.get(name, weights.get('*', 0.0)))
+        if weights.get(encoding, weights.get('*', 0.0)) <= 0:
+            return None
+        return encoding
+
+    def _compress(self, etag, encoding, body):
+        """Compressed body, reused for repeated bodies with the same ETag"""
+        key = (etag, encoding)
+        with self._lock:
+            compressed = self._compressed.get(key)
+            if compressed is not None:
+                self._compressed.move_to_end(key)
+                return compressed
+
+        if encoding == 'br':
+            compressed = brotli.compress(body, quality=5)
+        else:
+            compressed = gzip.compress(body, compresslevel=6)
+
+        with self._lock:
+            self._stats["compressed"] += 1
+            self._compressed[key] = compressed
+            while len(self._compressed) > self.max_compressed:
+                self._compressed.popitem(last=False)
+        return compressed
+
+# Shared by create_app and the blueprints
+http_cache = HTTPCache()
@@ -2,7 +2,7 @@
 Climate and weather models for the AgriFinance API.
 Focused on essential data needed for mobile-first approach with climate risk integration.
 """
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Enum, ForeignKey, Table, JSON
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Enum, ForeignKey, Table, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -31,13 +31,20 @@ class WeatherForecast(Base):
     """
     Weather forecast model for farm locations.
     Designed for offline access in the mobile app.
+    
+    Forecasts are stored once per weather grid cell and day, and looked up
+    through the (grid_cell, forecast_date) index.
     """
     __tablename__ = "weather_forecasts"
+    __table_args__ = (
+        Index("ix_weather_forecasts_cell_date", "grid_cell", "forecast_date", unique=True),
+    )
     
     id = Column(Integer, primary_key=True)
     location = Column(String(200), nullable=False)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
+    grid_cell = Column(String(32), nullable=True)  # WEATHER_GRID cell key
     forecast_date = Column(DateTime, nullable=False)  # Date the forecast is for
     created_at = Column(DateTime, default=datetime.utcnow)  # When the forecast was generated
     
@@ -83,8 +90,14 @@ class ClimateRiskAssessment(Base):
     """
     Climate risk assessment model for farms.
     Used for AI-driven loan adjustments based on climate conditions.
+    
+    Assessments are precomputed for every farm by the risk assessment job and
+    the latest one per farm is read through the (farm_id, assessment_date) index.
     """
     __tablename__ = "climate_risk_assessments"
+    __table_args__ = (
+        Index("ix_climate_risk_assessments_farm_date", "farm_id", "assessment_date"),
+    )
     
     id = Column(Integer, primary_key=True)
     farm_id = Column(Integer, ForeignKey("farms.id"), nullable=False)
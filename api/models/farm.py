@@ -42,6 +42,8 @@ class Farm(Base):
     # For AI crop health monitoring
     last_ndvi_value = Column(Float, nullable=True)  # Normalized Difference Vegetation Index
     last_ndvi_date = Column(DateTime, nullable=True)
+    ndvi_health_status = Column(String(20), nullable=True)  # Precomputed by the crop health service
+    ndvi_trend = Column(String(20), nullable=True)
     
     # Relationships
     farmer = relationship("Farmer", back_populates="farms")
@@ -64,20 +66,7 @@ class Farm(Base):
             "crop_health": {
                 "ndvi_value": self.last_ndvi_value,
                 "ndvi_date": self.last_ndvi_date.isoformat() if self.last_ndvi_date else None,
-                "health_status": self._calculate_health_status()
+                "health_status": self.ndvi_health_status,
+                "trend": self.ndvi_trend
             } if self.last_ndvi_value is not None else None
         }
-    
-    def _calculate_health_status(self):
-        """Calculate health status based on NDVI value"""
-        if self.last_ndvi_value is None:
-            return None
-        
-        if self.last_ndvi_value >= 0.7:
-            return "Excellent"
-        elif self.last_ndvi_value >= 0.5:
-            return "Good"
-        elif self.last_ndvi_value >= 0.3:
-            return "Fair"
-        else:
-            return "Poor"
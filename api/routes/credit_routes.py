@@ -4,13 +4,14 @@ Provides AI-driven credit scoring and loan recommendations for farmers.
 """
 from flask import Blueprint, request, jsonify
 from datetime import datetime, timedelta
-import random
 import logging
 import json
 
 from api.models import Farmer, Farm, Loan, LoanStatus, Payment
-from api.models import ClimateRiskAssessment
 from api import db
+from api.services.risk_assessment_service import risk_assessment_service
+from credit.services.market_analytics import market_analytics
+from credit.services.market_price_service import market_price_service
 
 # Configure logging
 logger = logging.getLogger('agrifinance_api.credit')
@@ -47,8 +48,14 @@ def get_credit_score(farmer_id):
         productivity_score = calculate_productivity_score(farms)
         
         # 3. Market conditions (10%)
-        # This would use real market data in a production app
-        market_score = random.uniform(0.5, 0.8)
+        market_score = market_analytics.market_score(
+            (
+                farm.primary_crop.value if farm.primary_crop else None,
+                market_price_service.locate_region(farm.location, farm.latitude, farm.longitude)
+            ) for farm in farms
+        )
+        if market_score is None:
+            market_score = 0.5  # Neutral score without price data
         
         # 4. Relationship length (10%)
         # Based on how long the farmer has been registered
@@ -104,6 +111,7 @@ def get_credit_score(farmer_id):
                 {"name": "Relationship Length", "value": round(relationship_score, 2), "weight": 0.1},
                 {"name": "Climate Risk", "value": round(climate_score, 2), "weight": 0.3}
             ],
+            "market_prices": market_analytics.price_status(),
             "eligible_loans": eligible_loans,
             "recommendations": recommendations,
             "last_updated": datetime.utcnow().isoformat()
@@ -191,9 +199,7 @@ def calculate_climate_score(farms):
     risk_scores = []
     
     for farm in farms:
-        assessment = db.session.query(ClimateRiskAssessment).filter(
-            ClimateRiskAssessment.farm_id == farm.id
-        ).order_by(ClimateRiskAssessment.assessment_date.desc()).first()
+        assessment = risk_assessment_service.get_latest(db.session, farm.id)
         
         if assessment:
             # Convert risk score (0-100) to 0-1 scale and invert (higher is better)
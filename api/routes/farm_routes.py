@@ -8,6 +8,9 @@ from datetime import datetime
 
 from api.models import Farm, CropType, Farmer
 from api import db
+from api.serializers import FARM_SCHEMA, json_response
+from api.services.crop_health_service import crop_health_service
+from api.services.risk_assessment_service import risk_assessment_service
 
 # Configure logging
 logger = logging.getLogger('agrifinance_api.farm')
@@ -24,7 +27,8 @@ def get_farms():
         crop_type = request.args.get('crop_type')
         location = request.args.get('location')
         
-        query = db.session.query(Farm)
+        # Serialize straight from result rows
+        query = FARM_SCHEMA.select()
         
         if farmer_id:
             query = query.filter(Farm.farmer_id == farmer_id)
@@ -42,8 +46,8 @@ def get_farms():
         if location:
             query = query.filter(Farm.location.like(f"%{location}%"))
         
-        farms = query.all()
-        return jsonify([farm.to_dict() for farm in farms])
+        rows = db.session.execute(query).all()
+        return json_response(FARM_SCHEMA.serialize(rows))
         
     except Exception as e:
         logger.error(f"Error getting farms: {str(e)}")
@@ -103,12 +107,16 @@ def create_farm():
             location=data['location'],
             latitude=data.get('latitude'),
             longitude=data.get('longitude'),
-            registration_date=datetime.utcnow(),
-            last_ndvi_value=data.get('last_ndvi_value'),
-            last_ndvi_date=datetime.utcnow() if data.get('last_ndvi_value') else None
+            registration_date=datetime.utcnow()
         )
         
         db.session.add(farm)
+        db.session.flush()  # Assign the farm id used to key its crop health and risk
+        if data.get('last_ndvi_value') is not None:
+            crop_health_service.update_farm(farm, data['last_ndvi_value'])
+        
+        # New farms get their climate risk before the next scheduled run
+        risk_assessment_service.precompute(db.session, farm_ids=[farm.id])
         db.session.commit()
         
         return jsonify(farm.to_dict()), 201
@@ -160,8 +168,15 @@ def update_farm(farm_id):
             farm.longitude = data['longitude']
             
         if 'last_ndvi_value' in data:
-            farm.last_ndvi_value = data['last_ndvi_value']
-            farm.last_ndvi_date = datetime.utcnow()
+            if data['last_ndvi_value'] is None:
+                crop_health_service.clear_farm(farm)
+            else:
+                crop_health_service.update_farm(farm, data['last_ndvi_value'])
+        
+        # Location and crop changes move the farm to another risk group
+        if {'primary_crop', 'latitude', 'longitude'} & set(data):
+            db.session.flush()
+            risk_assessment_service.precompute(db.session, farm_ids=[farm.id])
         
         db.session.commit()
         
@@ -203,8 +218,7 @@ def update_farm_ndvi(farm_id):
         if 'ndvi_value' not in data:
             return jsonify({"error": "Missing required field: ndvi_value"}), 400
             
-        farm.last_ndvi_value = data['ndvi_value']
-        farm.last_ndvi_date = datetime.utcnow()
+        crop_health_service.update_farm(farm, data['ndvi_value'])
         
         db.session.commit()
         
@@ -212,7 +226,8 @@ def update_farm_ndvi(farm_id):
             "farm_id": farm.id,
             "ndvi_value": farm.last_ndvi_value,
             "ndvi_date": farm.last_ndvi_date.isoformat() if farm.last_ndvi_date else None,
-            "health_status": farm._calculate_health_status()
+            "health_status": farm.ndvi_health_status,
+            "trend": farm.ndvi_trend
         })
         
     except Exception as e:
@@ -252,7 +267,7 @@ def get_farmer_farms_summary(farmer_id):
         # Get health status distribution
         health_status = {}
         for farm in farms_with_ndvi:
-            status = farm._calculate_health_status()
+            status = farm.ndvi_health_status
             health_status[status] = health_status.get(status, 0) + 1
         
         return jsonify({
@@ -2,12 +2,14 @@
 Farmer API routes for the AgriFinance mobile app.
 Provides endpoints for farmer registration, profile management, and data access.
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 import logging
 from datetime import datetime
 
 from api.models import Farmer, FarmerType
 from api import db
+from api.serializers import FARMER_SCHEMA, json_response
+from api.services.offline_bundle_service import offline_bundle_service
 
 # Configure logging
 logger = logging.getLogger('agrifinance_api.farmer')
@@ -23,7 +25,8 @@ def get_farmers():
         farmer_type = request.args.get('type')
         location = request.args.get('location')
         
-        query = db.session.query(Farmer)
+        # Serialize straight from result rows
+        query = FARMER_SCHEMA.select()
         
         if farmer_type:
             try:
@@ -35,8 +38,8 @@ def get_farmers():
         if location:
             query = query.filter(Farmer.location.like(f"%{location}%"))
         
-        farmers = query.all()
-        return jsonify([farmer.to_dict() for farmer in farmers])
+        rows = db.session.execute(query).all()
+        return json_response(FARMER_SCHEMA.serialize(rows))
         
     except Exception as e:
         logger.error(f"Error getting farmers: {str(e)}")
@@ -56,6 +59,38 @@ def get_farmer(farmer_id):
         logger.error(f"Error getting farmer {farmer_id}: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@farmer_api.route('/<int:farmer_id>/offline-bundle', methods=['GET'])
+def get_offline_bundle(farmer_id):
+    """
+    Get forecasts, climate risk and crop health for all of a farmer's farms in one payload.
+    
+    Query parameters:
+    - since: Bundle version held by the client, only changes since then are returned
+    
+    The response is gzip-compressed JSON when the client accepts gzip.
+    """
+    try:
+        farmer = db.session.get(Farmer, farmer_id)
+        if not farmer:
+            return jsonify({"error": "Farmer not found"}), 404
+        
+        since = request.args.get('since')
+        bundle = offline_bundle_service.build(db.session, farmer_id, since=since)
+        if since and since == bundle["version"]:
+            return Response(status=304, headers={"ETag": f'"{bundle["version"]}"'})
+        
+        compress = 'gzip' in request.headers.get('Accept-Encoding', '')
+        response = Response(offline_bundle_service.encode(bundle, compress=compress), mimetype='application/json')
+        response.headers["ETag"] = f'"{bundle["version"]}"'
+        response.headers["Vary"] = "Accept-Encoding"
+        if compress:
+            response.headers["Content-Encoding"] = "gzip"
+        return response
+        
+    except Exception as e:
+        logger.error(f"Error building offline bundle for farmer {farmer_id}: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @farmer_api.route('/', methods=['POST'])
 def create_farmer():
     """Create a new farmer"""
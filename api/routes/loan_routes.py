@@ -8,6 +8,7 @@ from datetime import datetime, timedelta
 
 from api.models import Loan, LoanType, LoanStatus, Payment, Farmer
 from api import db
+from api.serializers import LOAN_SCHEMA, json_response
 
 # Configure logging
 logger = logging.getLogger('agrifinance_api.loan')
@@ -24,7 +25,8 @@ def get_loans():
         status = request.args.get('status')
         loan_type = request.args.get('type')
         
-        query = db.session.query(Loan)
+        # Serialize straight from result rows
+        query = LOAN_SCHEMA.select()
         
         if farmer_id:
             query = query.filter(Loan.farmer_id == farmer_id)
@@ -43,8 +45,8 @@ def get_loans():
             except ValueError:
                 return jsonify({"error": f"Invalid loan type: {loan_type}"}), 400
         
-        loans = query.all()
-        return jsonify([loan.to_dict() for loan in loans])
+        rows = db.session.execute(query).all()
+        return json_response(LOAN_SCHEMA.serialize(rows))
         
     except Exception as e:
         logger.error(f"Error getting loans: {str(e)}")
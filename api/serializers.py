@@ -0,0 +1,329 @@
+"""
+Schema-compiled serializers for the AgriFinance API.
+
+A schema lists the fields of a model's API representation once. From it a
+row-to-dict function is generated and compiled per model, together with the
+SELECT that produces matching rows, so list endpoints serialize straight from
+result tuples without instantiating ORM objects or walking to_dict per field.
+Values derived from relationships (counts, balances) are computed in SQL as
+correlated subqueries. Output is identical to the models' to_dict.
+
+Bodies are encoded with orjson when it is installed.
+"""
+import json
+import time
+from datetime import timedelta
+
+from flask import Response
+from sqlalchemy import case, func, select
+
+from api.models import (
+    Farmer, Farm, Loan, LoanStatus, Payment, WeatherForecast, ClimateRiskAssessment
+)
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the standard library encoder is the fallback
+    orjson = None
+
+
+class Field:
+    """Output key read from one selected column"""
+
+    # Expression templates applied to the column value v
+    KINDS = {
+        'value': '{v}',
+        'enum': '({v}.value if {v} is not None else None)',
+        'datetime': '({v}.isoformat() if {v} is not None else None)'
+    }
+
+    def __init__(self, key, column, kind='value'):
+        self.key = key
+        self.column = column
+        self.kind = kind
+
+
+class Computed:
+    """Output key computed in Python from several selected columns"""
+
+    def __init__(self, key, columns, function):
+        self.key = key
+        self.columns = columns
+        self.function = function
+
+
+class Nested:
+    """Nested object, None unless every column in when is truthy (or not None with when_not_none)"""
+
+    def __init__(self, key, fields, when=(), when_not_none=()):
+        self.key = key
+        self.fields = fields
+        self.when = when
+        self.when_not_none = when_not_none
+
+
+class Schema:
+    """
+    Compiled serializer for one model
+    """
+
+    def __init__(self, name, fields, order_by=None):
+        """
+        Compile a schema
+
+        Args:
+            name: Name of the generated function, used in tracebacks
+            fields: Field, Computed and Nested definitions in output order
+            order_by: Optional default ordering of select()
+        """
+        self.name = name
+        self.order_by = order_by
+        self.columns = []
+        self._positions = {}
+        self._functions = {}
+        source = f"def {name}(r):\n    return {self._compile(fields)}\n"
+        namespace = dict(self._functions)
+        exec(compile(source, f"<schema {name}>", 'exec'), namespace)
+        self.source = source
+        self.serialize_row = namespace[name]
+
+    def select(self):
+        """SELECT producing rows for serialize_row, extend it with where() as usual"""
+        query = select(*self.columns)
+        return query.order_by(self.order_by) if self.order_by is not None else query
+
+    def serialize(self, rows):
+        """List of dicts from result rows"""
+        serialize_row = self.serialize_row
+        return [serialize_row(row) for row in rows]
+
+    def _position(self, column):
+        """Index of a column in the select list, adding it on first use"""
+        key = id(column)
+        if key not in self._positions:
+            self._positions[key] = len(self.columns)
+            self.columns.append(column)
+        return self._positions[key]
+
+    def _compile(self, fields):
+        """Python expression building the dict for a list of fields"""
+        items = []
+        for field in fields:
+            if isinstance(field, Nested):
+                expression = self._compile(field.fields)
+                conditions = [f"r[{self._position(column)}]" for column in field.when]
+                conditions += [f"r[{self._position(column)}] is not None" for column in field.when_not_none]
+                if conditions:
+                    expression = f"({expression} if {' and '.join(conditions)} else None)"
+            elif isinstance(field, Computed):
+                function_name = f"_f{len(self._functions)}"
+                self._functions[function_name] = field.function
+                arguments = ', '.join(f"r[{self._position(column)}]" for column in field.columns)
+                expression = f"{function_name}({arguments})"
+            else:
+                expression = Field.KINDS[field.kind].format(v=f"r[{self._position(field.column)}]")
+            items.append(f"{field.key!r}: {expression}")
+        return '{' + ', '.join(items) + '}'
+
+
+def dumps(data):
+    """Compact JSON bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(data, status=200):
+    """Flask response with a JSON body encoded by dumps"""
+    return Response(dumps(data), status=status, mimetype='application/json')
+
+
+def _next_payment_date(disbursement_date, last_payment_date):
+    """Same rule as Loan.calculate_next_payment_date"""
+    if not disbursement_date:
+        return None
+    return ((last_payment_date or disbursement_date) + timedelta(days=30)).isoformat()
+
+
+_ACTIVE_LOAN_STATUSES = [LoanStatus.APPROVED, LoanStatus.DISBURSED, LoanStatus.REPAYING]
+
+_farm_count = (
+    select(func.count(Farm.id)).where(Farm.farmer_id == Farmer.id).correlate(Farmer).scalar_subquery()
+)
+_active_loans = (
+    select(func.count(Loan.id))
+    .where(Loan.farmer_id == Farmer.id, Loan.status.in_(_ACTIVE_LOAN_STATUSES))
+    .correlate(Farmer)
+    .scalar_subquery()
+)
+_paid_amount = (
+    select(func.coalesce(func.sum(Payment.amount), 0)).where(Payment.loan_id == Loan.id).correlate(Loan).scalar_subquery()
+)
+_last_payment_date = (
+    select(func.max(Payment.payment_date)).where(Payment.loan_id == Loan.id).correlate(Loan).scalar_subquery()
+)
+_remaining_balance = case(
+    (Loan.disbursement_date.is_(None), Loan.amount),
+    else_=Loan.amount - _paid_amount
+)
+
+
+FARMER_SCHEMA = Schema('serialize_farmer', [
+    Field('id', Farmer.id),
+    Field('first_name', Farmer.first_name),
+    Field('last_name', Farmer.last_name),
+    Field('phone_number', Farmer.phone_number),
+    Field('farmer_type', Farmer.farmer_type, 'enum'),
+    Field('location', Farmer.location),
+    Nested('coordinates', [
+        Field('latitude', Farmer.latitude),
+        Field('longitude', Farmer.longitude)
+    ], when=(Farmer.latitude, Farmer.longitude)),
+    Field('registration_date', Farmer.registration_date, 'datetime'),
+    Field('farm_count', _farm_count),
+    Field('active_loans', _active_loans)
+], order_by=Farmer.id)
+
+FARM_SCHEMA = Schema('serialize_farm', [
+    Field('id', Farm.id),
+    Field('farmer_id', Farm.farmer_id),
+    Field('name', Farm.name),
+    Field('size_hectares', Farm.size_hectares),
+    Field('primary_crop', Farm.primary_crop, 'enum'),
+    Field('secondary_crop', Farm.secondary_crop, 'enum'),
+    Field('location', Farm.location),
+    Nested('coordinates', [
+        Field('latitude', Farm.latitude),
+        Field('longitude', Farm.longitude)
+    ], when=(Farm.latitude, Farm.longitude)),
+    Field('registration_date', Farm.registration_date, 'datetime'),
+    Nested('crop_health', [
+        Field('ndvi_value', Farm.last_ndvi_value),
+        Field('ndvi_date', Farm.last_ndvi_date, 'datetime'),
+        Field('health_status', Farm.ndvi_health_status),
+        Field('trend', Farm.ndvi_trend)
+    ], when_not_none=(Farm.last_ndvi_value,))
+], order_by=Farm.id)
+
+LOAN_SCHEMA = Schema('serialize_loan', [
+    Field('id', Loan.id),
+    Field('farmer_id', Loan.farmer_id),
+    Field('loan_type', Loan.loan_type, 'enum'),
+    Field('amount', Loan.amount),
+    Field('interest_rate', Loan.interest_rate),
+    Field('term_months', Loan.term_months),
+    Field('status', Loan.status, 'enum'),
+    Field('application_date', Loan.application_date, 'datetime'),
+    Field('approval_date', Loan.approval_date, 'datetime'),
+    Field('disbursement_date', Loan.disbursement_date, 'datetime'),
+    Field('due_date', Loan.due_date, 'datetime'),
+    Field('remaining_balance', _remaining_balance),
+    Computed('next_payment_date', (Loan.disbursement_date, _last_payment_date), _next_payment_date),
+    Field('credit_score', Loan.credit_score),
+    Field('climate_risk_factor', Loan.climate_risk_factor)
+], order_by=Loan.id)
+
+WEATHER_FORECAST_SCHEMA = Schema('serialize_weather_forecast', [
+    Field('id', WeatherForecast.id),
+    Field('location', WeatherForecast.location),
+    Nested('coordinates', [
+        Field('latitude', WeatherForecast.latitude),
+        Field('longitude', WeatherForecast.longitude)
+    ]),
+    Field('forecast_date', WeatherForecast.forecast_date, 'datetime'),
+    Field('created_at', WeatherForecast.created_at, 'datetime'),
+    Nested('weather', [
+        Field('condition', WeatherForecast.condition, 'enum'),
+        Nested('temperature', [
+            Field('high', WeatherForecast.temperature_high),
+            Field('low', WeatherForecast.temperature_low)
+        ]),
+        Nested('precipitation', [
+            Field('chance', WeatherForecast.precipitation_chance),
+            Field('amount', WeatherForecast.precipitation_amount)
+        ]),
+        Field('humidity', WeatherForecast.humidity),
+        Field('wind_speed', WeatherForecast.wind_speed)
+    ]),
+    Field('farming_recommendation', WeatherForecast.farming_recommendation)
+], order_by=WeatherForecast.forecast_date)
+
+CLIMATE_RISK_SCHEMA = Schema('serialize_climate_risk', [
+    Field('id', ClimateRiskAssessment.id),
+    Field('farm_id', ClimateRiskAssessment.farm_id),
+    Field('assessment_date', ClimateRiskAssessment.assessment_date, 'datetime'),
+    Field('risk_level', ClimateRiskAssessment.risk_level, 'enum'),
+    Field('risk_score', ClimateRiskAssessment.risk_score),
+    Nested('risk_factors', [
+        Field('drought', ClimateRiskAssessment.drought_risk),
+        Field('flood', ClimateRiskAssessment.flood_risk),
+        Field('pest', ClimateRiskAssessment.pest_risk)
+    ]),
+    Field('mitigation_strategies', ClimateRiskAssessment.mitigation_strategies)
+], order_by=ClimateRiskAssessment.assessment_date.desc())
+
+
+def benchmark(rows=10000):
+    """
+    Compare ORM to_dict + json with schema rows + dumps on an in-memory farm list
+
+    Args:
+        rows (int): Number of farms
+
+    Returns:
+        dict: Timings in seconds for both paths and whether their output matches
+    """
+    from datetime import datetime
+
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.orm import Session
+
+    from api.models import Base, CropType, FarmerType
+
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    now = datetime(2024, 1, 1)
+    crops = list(CropType)
+
+    with Session(engine) as session:
+        session.execute(insert(Farmer), [{
+            "id": 1, "first_name": "Ama", "last_name": "Mensah", "phone_number": "0200000000",
+            "farmer_type": FarmerType.INDIVIDUAL, "location": "Kumasi", "registration_date": now
+        }])
+        session.execute(insert(Farm), [{
+            "farmer_id": 1, "name": f"Farm {index}", "size_hectares": 1.0 + index % 7,
+            "primary_crop": crops[index % len(crops)], "location": "Kumasi",
+            "latitude": 6.5 + index * 1e-4, "longitude": -1.6 - index * 1e-4,
+            "registration_date": now, "last_ndvi_value": 0.6, "last_ndvi_date": now,
+            "ndvi_health_status": "Good", "ndvi_trend": "stable"
+        } for index in range(rows)])
+        session.commit()
+
+        started = time.perf_counter()
+        farms = session.execute(select(Farm).order_by(Farm.id)).scalars().all()
+        orm_body = json.dumps([farm.to_dict() for farm in farms]).encode('utf-8')
+        orm_time = time.perf_counter() - started
+        session.expunge_all()
+
+        started = time.perf_counter()
+        schema_body = dumps(FARM_SCHEMA.serialize(session.execute(FARM_SCHEMA.select()).all()))
+        schema_time = time.perf_counter() - started
+
+    return {
+        'rows': rows,
+        'encoder': 'orjson' if orjson is not None else 'json',
+        'to_dict_seconds': round(orm_time, 4),
+        'schema_seconds': round(schema_time, 4),
+        'speedup': round(orm_time / schema_time, 1) if schema_time else None,
+        'identical_output': json.loads(orm_body) == json.loads(schema_body)
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark schema serializers against to_dict')
+    parser.add_argument('--rows', type=int, default=10000)
+    args = parser.parse_args()
+
+    print(json.dumps(benchmark(args.rows), indent=2))
@@ -5,10 +5,20 @@ Import all services here to make them available from the services package.
 from .credit_scoring_service import credit_scoring_service
 from .satellite_service import satellite_service
 from .weather_service import weather_service
+from .crop_health_service import crop_health_service
+from .forecast_store import forecast_store
+from .forecast_provider import forecast_provider
+from .risk_assessment_service import risk_assessment_service
+from .offline_bundle_service import offline_bundle_service
 
 # Export all services
 __all__ = [
     'credit_scoring_service',
     'satellite_service',
-    'weather_service'
+    'weather_service',
+    'crop_health_service',
+    'forecast_store',
+    'forecast_provider',
+    'risk_assessment_service',
+    'offline_bundle_service'
 ]
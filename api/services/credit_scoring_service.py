@@ -5,12 +5,14 @@ This service provides machine learning-based credit scoring for farmers,
 taking into account farm data, loan history, and climate risk factors.
 """
 import logging
-import numpy as np
 from datetime import datetime, timedelta
 import joblib
 import os
 from pathlib import Path
 
+from credit.services.market_analytics import market_analytics
+from credit.services.market_price_service import market_price_service
+
 # Configure logging
 logger = logging.getLogger('agrifinance_api.services.credit_scoring')
 
@@ -117,7 +119,8 @@ class CreditScoringService:
                 {"name": "Market Conditions", "value": round(market_score, 2), "weight": 0.1},
                 {"name": "Relationship Length", "value": round(relationship_score, 2), "weight": 0.1},
                 {"name": "Climate Risk", "value": round(climate_score, 2), "weight": 0.3}
-            ]
+            ],
+            "market_prices": market_analytics.price_status()
         }
     
     def _calculate_repayment_score(self, loans_data):
@@ -193,12 +196,20 @@ class CreditScoringService:
     
     def _calculate_market_score(self, farms_data):
         """
-        Calculate market conditions score.
-        In a real app, this would use market price data for the farmer's crops.
+        Calculate market conditions score from the precomputed price indicators
+        of the farms' crops in their nearest market region. Farms that are not
+        near any market region use the crop's average over all regions.
         """
-        # This is a placeholder for real market data integration
-        # For now, return a random score between 0.5 and 0.8
-        return np.random.uniform(0.5, 0.8)
+        crop_regions = []
+        for farm in farms_data:
+            coordinates = farm.get('coordinates') or {}
+            region = market_price_service.locate_region(
+                farm.get('location'), coordinates.get('latitude'), coordinates.get('longitude')
+            )
+            crop_regions.append((farm.get('primary_crop'), region))
+        
+        score = market_analytics.market_score(crop_regions)
+        return score if score is not None else 0.5  # Neutral score without price data
     
     def _calculate_relationship_score(self, farmer_data):
         """Calculate relationship length score based on registration date"""
@@ -0,0 +1,227 @@
+"""
+Crop health service for the AgriFinance API.
+
+Derives crop health and NDVI trend per farm from satellite NDVI. Health is
+precomputed once when new NDVI arrives and stored on the farm, instead of
+being recalculated on every request or serialization.
+"""
+import logging
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import inspect, or_, select, text
+
+from api.models import Farm
+
+from api.services.ndvi_simulator import HEALTH_STATUSES, health_bands
+from api.services.satellite_service import satellite_service
+from climate.services.ndvi_trend_engine import NDVITrendEngine
+
+# Configure logging
+logger = logging.getLogger('agrifinance_api.services.crop_health')
+
+
+def health_status_for(ndvi_value):
+    """Crop health status (Poor/Fair/Good/Excellent) for an NDVI value"""
+    if ndvi_value is None:
+        return None
+    return str(HEALTH_STATUSES[health_bands(ndvi_value)])
+
+
+class CropHealthService:
+    """
+    Service precomputing crop health per farm.
+
+    When new NDVI arrives the farm's health status and NDVI trend over the
+    recent history are computed once and stored on the farm. Requests read
+    the stored columns; refresh_farms pulls new satellite NDVI for farms whose
+    value is older than max_age and is run as a scheduled job.
+    """
+
+    def __init__(self, satellite=None, max_age=timedelta(hours=24), history_days=180):
+        """
+        Initialize the crop health service
+
+        Args:
+            satellite: SatelliteService providing NDVI data (default: shared instance)
+            max_age: Age after which refresh_farms pulls new satellite NDVI for a farm
+            history_days: Days of NDVI history used for the trend
+        """
+        self.satellite = satellite or satellite_service
+        self.max_age = max_age
+        self.history_days = history_days
+        self.trend_engine = NDVITrendEngine()
+
+    def ensure_schema(self, engine):
+        """
+        Add the precomputed health columns to a farms table created before they existed.
+
+        create_all() does not alter existing tables, so older databases are
+        upgraded here. Farms with an NDVI value but no stored health status
+        are backfilled; their trend starts as 'stable' until the next NDVI.
+        """
+        columns = {column["name"] for column in inspect(engine).get_columns(Farm.__tablename__)}
+        with engine.begin() as connection:
+            for name in ("ndvi_health_status", "ndvi_trend"):
+                if name not in columns:
+                    connection.execute(text(f"ALTER TABLE farms ADD COLUMN {name} VARCHAR(20)"))
+                    logger.info(f"Added {name} column to farms")
+
+            rows = connection.execute(text(
+                "SELECT id, last_ndvi_value FROM farms "
+                "WHERE last_ndvi_value IS NOT NULL AND ndvi_health_status IS NULL"
+            )).all()
+            if rows:
+                connection.execute(
+                    text("UPDATE farms SET ndvi_health_status = :status, "
+                         "ndvi_trend = COALESCE(ndvi_trend, 'stable') WHERE id = :id"),
+                    [{"id": row.id, "status": health_status_for(row.last_ndvi_value)} for row in rows]
+                )
+                logger.info(f"Backfilled crop health status for {len(rows)} farms")
+
+    def get_crop_health(self, farm):
+        """
+        Get the stored crop health of a farm.
+
+        Args:
+            farm: Farm model instance
+
+        Returns:
+            Crop health dictionary, or None if the farm has no NDVI value
+        """
+        if farm.last_ndvi_value is None:
+            return None
+
+        return {
+            "farm_id": farm.id,
+            "ndvi_value": round(float(farm.last_ndvi_value), 3),
+            "ndvi_date": farm.last_ndvi_date.isoformat() if farm.last_ndvi_date else None,
+            "health_status": farm.ndvi_health_status or health_status_for(farm.last_ndvi_value),
+            "health_percent": round(float(farm.last_ndvi_value) * 100),
+            "trend": farm.ndvi_trend or "stable"
+        }
+
+    def refresh_farms(self, session, now=None):
+        """
+        Pull new satellite NDVI for farms whose stored value is older than max_age.
+
+        The caller commits the session.
+
+        Args:
+            session: SQLAlchemy session
+            now: Reference time (default: now)
+
+        Returns:
+            Number of farms with new NDVI
+        """
+        cutoff = (now or datetime.utcnow()) - self.max_age
+        farms = session.execute(
+            select(Farm).where(
+                Farm.latitude.is_not(None),
+                Farm.longitude.is_not(None),
+                or_(Farm.last_ndvi_date.is_(None), Farm.last_ndvi_date < cutoff)
+            )
+        ).scalars().all()
+
+        updated = 0
+        for farm in farms:
+            try:
+                if self.refresh_farm(farm):
+                    updated += 1
+            except Exception as e:
+                logger.error(f"Error refreshing crop health for farm {farm.id}: {str(e)}")
+
+        return updated
+
+    def refresh_farm(self, farm):
+        """
+        Store a farm's latest NDVI from its satellite time series.
+
+        The caller commits the session.
+
+        Returns:
+            Crop health dictionary, or None without newer satellite data
+        """
+        end_date = datetime.utcnow()
+        start_date = end_date - timedelta(days=self.history_days)
+        crop_type = farm.primary_crop.value if farm.primary_crop else None
+        series = self.satellite.get_ndvi_time_series(
+            farm.latitude, farm.longitude, farm_id=farm.id, crop_type=crop_type,
+            start_date=start_date, end_date=end_date
+        )
+        if not series:
+            return None
+
+        latest = series[-1]
+        ndvi_date = latest["date"]
+        if isinstance(ndvi_date, str):
+            ndvi_date = datetime.fromisoformat(ndvi_date)
+        if farm.last_ndvi_date and ndvi_date <= farm.last_ndvi_date:
+            return None
+
+        return self._store(farm, latest["ndvi_value"], ndvi_date,
+                           [point["ndvi_value"] for point in series[:-1]])
+
+    def update_farm(self, farm, ndvi_value, ndvi_date=None):
+        """
+        Store a new NDVI value on a farm together with its precomputed health and trend.
+
+        The caller commits the session.
+
+        Returns:
+            Crop health dictionary
+        """
+        history = self._cached_history(farm.id)
+        if not history and farm.last_ndvi_value is not None:
+            history = [farm.last_ndvi_value]
+
+        return self._store(farm, ndvi_value, ndvi_date or datetime.utcnow(), history)
+
+    def clear_farm(self, farm):
+        """Remove a farm's NDVI value together with its health and trend"""
+        farm.last_ndvi_value = None
+        farm.last_ndvi_date = None
+        farm.ndvi_health_status = None
+        farm.ndvi_trend = None
+
+    def _store(self, farm, ndvi_value, ndvi_date, history):
+        """Set a farm's NDVI, health status and trend from a new observation and its history"""
+        slope = self._trend_slope(list(history) + [ndvi_value])
+
+        farm.last_ndvi_value = ndvi_value
+        farm.last_ndvi_date = ndvi_date
+        farm.ndvi_health_status = health_status_for(ndvi_value)
+        farm.ndvi_trend = self._trend_label(slope)
+
+        return self.get_crop_health(farm)
+
+    def _cached_history(self, farm_id):
+        """Recent NDVI values already in the satellite cache, oldest first"""
+        try:
+            end_date = datetime.utcnow()
+            start_date = end_date - timedelta(days=self.history_days)
+            return [
+                data["ndvi_value"]
+                for _, data in self.satellite.cache.get_range(farm_id, start_date, end_date)
+            ]
+        except Exception as e:
+            logger.warning(f"Error reading NDVI history for farm {farm_id}: {str(e)}")
+            return []
+
+    def _trend_slope(self, values):
+        """NDVI change per observation, None with fewer than two observations"""
+        slopes, _, _ = self.trend_engine.fit_slopes(np.array([values], dtype=np.float64))
+        return round(float(slopes[0]), 4) if np.isfinite(slopes[0]) else None
+
+    def _trend_label(self, slope):
+        """Trend label used by the mobile app"""
+        if slope is None:
+            return "stable"
+        if slope > self.trend_engine.trend_threshold:
+            return "improving"
+        if slope < -self.trend_engine.trend_threshold:
+            return "declining"
+        return "stable"
+
+# Create a singleton instance
+crop_health_service = CropHealthService()
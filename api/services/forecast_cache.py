@@ -0,0 +1,201 @@
+"""
+Two-tier forecast cache for the API WeatherService.
+
+Parsed forecasts are kept in an in-process LRU with a TTL, in front of a
+compact on-disk store of one JSON file per weather grid cell. Disk writes are
+atomic (write to a temporary file, then rename), the disk tier is bounded in
+total bytes with oldest-first eviction, and entries are returned as read-only
+views so callers cannot corrupt what other requests will be served.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+
+logger = logging.getLogger('agrifinance_api.services.forecast_cache')
+
+
+def freeze(value):
+    """Read-only view of JSON-like data: dicts become mappingproxies and lists tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Mutable, JSON-serializable copy of a frozen view"""
+    if isinstance(value, MappingProxyType):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+
+class ForecastCache:
+    """
+    In-memory LRU with TTL in front of a size-bounded directory of JSON files.
+    """
+
+    def __init__(self, cache_path, ttl_seconds=6 * 60 * 60, max_entries=1024, max_bytes=20 * 1024 * 1024):
+        """
+        Initialize the forecast cache
+
+        Args:
+            cache_path: Directory of the disk tier
+            ttl_seconds: Age after which an entry is no longer served
+            max_entries: Entries kept in memory
+            max_bytes: Total size of the disk tier above which the oldest files are evicted
+        """
+        self.cache_path = str(cache_path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0
+        }
+
+        os.makedirs(self.cache_path, exist_ok=True)
+        self._disk_sizes = {
+            entry.name: entry.stat().st_size
+            for entry in os.scandir(self.cache_path)
+            if entry.is_file() and entry.name.endswith('.json')
+        }
+
+    def get(self, key):
+        """
+        Cached value for a key.
+
+        Returns:
+            Read-only view of the value, or None on a miss or expired entry
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[0] < self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return entry[1]
+                del self._memory[key]
+                self._stats["expired"] += 1
+
+        value = self._read_disk(key, now)
+        with self._lock:
+            if value is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            self._remember(key, value[0], value[1])
+            return value[1]
+
+    def put(self, key, value):
+        """
+        Cache a value in both tiers.
+
+        Returns:
+            Read-only view of the stored value
+        """
+        stored_at = time.time()
+        view = freeze(value)
+        with self._lock:
+            self._remember(key, stored_at, view)
+        self._write_disk(key, value)
+        return view
+
+    def stats(self):
+        """Hit, miss and eviction counters with current tier sizes"""
+        with self._lock:
+            lookups = self._stats["memory_hits"] + self._stats["disk_hits"] + self._stats["misses"]
+            hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+            return {
+                **self._stats,
+                "hit_rate": round(hits / lookups, 3) if lookups else None,
+                "memory_entries": len(self._memory),
+                "disk_files": len(self._disk_sizes),
+                "disk_bytes": sum(self._disk_sizes.values())
+            }
+
+    def _remember(self, key, stored_at, view):
+        """Insert into the memory tier, evicting the least recently used entries; lock held"""
+        self._memory[key] = (stored_at, view)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["memory_evictions"] += 1
+
+    def _file_name(self, key):
+        return f"{key.replace(':', '_')}.json"
+
+    def _read_disk(self, key, now):
+        """(stored_at, view) from the disk tier, None if missing, expired or unreadable"""
+        path = os.path.join(self.cache_path, self._file_name(key))
+        try:
+            stored_at = os.path.getmtime(path)
+            if now - stored_at >= self.ttl_seconds:
+                return None
+            with open(path, 'r') as f:
+                return stored_at, freeze(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Error reading forecast cache entry {key}: {str(e)}")
+            return None
+
+    def _write_disk(self, key, value):
+        """Atomically replace a key's file, then evict the oldest files above max_bytes"""
+        name = self._file_name(key)
+        try:
+            payload = json.dumps(value, separators=(',', ':')).encode('utf-8')
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_path, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(payload)
+                os.replace(temp_path, os.path.join(self.cache_path, name))
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Error caching forecast {key}: {str(e)}")
+            return
+
+        with self._lock:
+            self._disk_sizes[name] = len(payload)
+            if sum(self._disk_sizes.values()) > self.max_bytes:
+                self._evict_disk(keep=name)
+
+    def _evict_disk(self, keep):
+        """Delete the oldest files until the disk tier fits max_bytes; lock held"""
+        def mtime(file_name):
+            try:
+                return os.path.getmtime(os.path.join(self.cache_path, file_name))
+            except OSError:
+                return 0
+
+        total = sum(self._disk_sizes.values())
+        for file_name in sorted(self._disk_sizes, key=mtime):
+            if total <= self.max_bytes:
+                break
+            if file_name == keep:
+                continue
+            try:
+                os.remove(os.path.join(self.cache_path, file_name))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Error evicting forecast cache file {file_name}: {str(e)}")
+                continue
+            total -= self._disk_sizes.pop(file_name)
+            self._stats["disk_evictions"] += 1
@@ -0,0 +1,123 @@
+"""
+Forecast provider for the AgriFinance API.
+
+Single entry point for stored weather forecasts. Forecasts are generated by
+the WeatherService once per weather grid cell and day, written with one bulk
+INSERT, and served from the forecast store afterwards. Concurrent misses for
+the same cell are coalesced: one request generates, the others wait for it
+and read the stored rows.
+"""
+import logging
+import threading
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from api.models import WeatherForecast, WeatherCondition
+from api.services.forecast_store import forecast_store, forecast_cell
+from api.services.weather_service import weather_service
+
+# Configure logging
+logger = logging.getLogger('agrifinance_api.services.forecast_provider')
+
+
+class ForecastProvider:
+    """
+    Provider of stored weather forecasts with per-cell request coalescing.
+    """
+
+    def __init__(self, weather=None, store=None, wait_timeout=30):
+        """
+        Initialize the forecast provider
+
+        Args:
+            weather: WeatherService generating forecasts (default: shared instance)
+            store: ForecastStore holding generated forecasts (default: shared instance)
+            wait_timeout: Seconds to wait for another request generating the same cell
+        """
+        self.weather = weather or weather_service
+        self.store = store or forecast_store
+        self.wait_timeout = wait_timeout
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get_forecasts(self, session, latitude, longitude, location, days=5):
+        """
+        Stored forecasts for a location, generating them for its grid cell on a miss.
+
+        Args:
+            session: SQLAlchemy session
+            latitude: Latitude coordinate
+            longitude: Longitude coordinate
+            location: Location name stored with newly generated forecasts
+            days: Number of days to forecast
+
+        Returns:
+            List of WeatherForecast ordered by date
+        """
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        cell = forecast_cell(latitude, longitude)
+
+        forecasts = self.store.lookup(session, cell, today, days)
+        if forecasts is not None:
+            return forecasts
+
+        key = (cell, today, days)
+        with self._lock:
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+
+        if not leader:
+            # Another request is generating this cell; read its rows when done
+            event.wait(self.wait_timeout)
+            forecasts = self.store.lookup(session, cell, today, days)
+            if forecasts is not None:
+                return forecasts
+            return self._generate(session, cell, latitude, longitude, location, today, days)
+
+        try:
+            return self._generate(session, cell, latitude, longitude, location, today, days)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def _generate(self, session, cell, latitude, longitude, location, today, days):
+        """Generate, bulk insert and read back a cell's forecasts"""
+        forecast = self.weather.fetch_forecast(latitude, longitude, location, days)
+        rows = [
+            {
+                "location": location,
+                "latitude": latitude,
+                "longitude": longitude,
+                "grid_cell": cell,
+                "forecast_date": datetime.fromisoformat(day["date"]),
+                "created_at": datetime.utcnow(),
+                "condition": WeatherCondition(day["condition"]),
+                "temperature_high": day["temperature"]["high"],
+                "temperature_low": day["temperature"]["low"],
+                "precipitation_chance": day["precipitation"]["chance"],
+                "precipitation_amount": day["precipitation"]["amount"],
+                "humidity": day["humidity"],
+                "wind_speed": day["wind_speed"],
+                "farming_recommendation": day["farming_recommendation"]
+            } for day in forecast["forecasts"]
+        ]
+
+        try:
+            # Replace any partial set of forecasts for the cell
+            self.store.clear(session, cell, today, days)
+            session.execute(insert(WeatherForecast), rows)
+            session.commit()
+        except IntegrityError:
+            # Another process stored the cell first
+            session.rollback()
+            logger.info(f"Forecasts for {cell} were stored concurrently")
+
+        return self.store.lookup(session, cell, today, days) or []
+
+# Create a singleton instance
+forecast_provider = ForecastProvider()
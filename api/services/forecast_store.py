@@ -0,0 +1,123 @@
+"""
+Forecast store for the AgriFinance API.
+
+Stored weather forecasts are keyed by weather grid cell and day. Lookups read
+exactly the requested days through the (grid_cell, forecast_date) index
+instead of scanning a latitude/longitude range, and past forecasts are
+compacted away so the table stays proportional to the active cells.
+"""
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, inspect, or_, select, text
+
+from api.models import WeatherForecast
+from climate.services.spatial_grid import WEATHER_GRID
+
+# Configure logging
+logger = logging.getLogger('agrifinance_api.services.forecast_store')
+
+
+def forecast_cell(latitude, longitude):
+    """Weather grid cell key under which forecasts for a point are stored"""
+    return WEATHER_GRID.key(WEATHER_GRID.cell(latitude, longitude))
+
+
+class ForecastStore:
+    """
+    Indexed access to the weather_forecasts table.
+    """
+
+    def __init__(self, retention_days=7):
+        """
+        Initialize the forecast store
+
+        Args:
+            retention_days: Days past forecasts are kept before compaction removes them
+        """
+        self.retention_days = retention_days
+
+    def ensure_schema(self, engine):
+        """
+        Add the grid_cell column and its index to a table created before they existed.
+
+        create_all() does not alter existing tables, so older databases are
+        upgraded here. Rows without a cell are never served and are removed by
+        the next compaction.
+        """
+        columns = {column["name"] for column in inspect(engine).get_columns(WeatherForecast.__tablename__)}
+        with engine.begin() as connection:
+            if "grid_cell" not in columns:
+                connection.execute(text("ALTER TABLE weather_forecasts ADD COLUMN grid_cell VARCHAR(32)"))
+                logger.info("Added grid_cell column to weather_forecasts")
+            connection.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS ix_weather_forecasts_cell_date "
+                "ON weather_forecasts (grid_cell, forecast_date)"
+            ))
+
+    def lookup(self, session, cell, start_date, days):
+        """
+        Stored forecasts for a cell, one per day from start_date.
+
+        Args:
+            session: SQLAlchemy session
+            cell: Weather grid cell key
+            start_date: First forecast day (midnight)
+            days: Number of days
+
+        Returns:
+            List of WeatherForecast ordered by date, or None unless all days are stored
+        """
+        forecasts = session.execute(
+            select(WeatherForecast)
+            .where(
+                WeatherForecast.grid_cell == cell,
+                WeatherForecast.forecast_date >= start_date,
+                WeatherForecast.forecast_date < start_date + timedelta(days=days)
+            )
+            .order_by(WeatherForecast.forecast_date)
+            .limit(days)
+        ).scalars().all()
+
+        return forecasts if len(forecasts) == days else None
+
+    def data_version(self, session):
+        """Largest forecast id, which changes whenever forecasts are stored or regenerated"""
+        return session.execute(select(func.max(WeatherForecast.id))).scalar()
+
+    def clear(self, session, cell, start_date, days):
+        """Delete a cell's stored forecasts for a range of days before they are regenerated"""
+        session.execute(
+            delete(WeatherForecast).where(
+                WeatherForecast.grid_cell == cell,
+                WeatherForecast.forecast_date >= start_date,
+                WeatherForecast.forecast_date < start_date + timedelta(days=days)
+            )
+        )
+
+    def compact(self, session, retention_days=None, now=None):
+        """
+        Delete forecasts for days older than the retention window, and legacy rows without a cell.
+
+        The caller commits the session.
+
+        Returns:
+            Number of deleted rows
+        """
+        retention_days = self.retention_days if retention_days is None else retention_days
+        now = now or datetime.utcnow()
+        cutoff = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=retention_days)
+
+        result = session.execute(
+            delete(WeatherForecast).where(
+                or_(
+                    WeatherForecast.forecast_date < cutoff,
+                    WeatherForecast.grid_cell.is_(None)
+                )
+            )
+        )
+        logger.info(f"Compacted {result.rowcount} weather forecasts older than {cutoff.date().isoformat()}")
+        return result.rowcount
+
+# Create a singleton instance
+forecast_store = ForecastStore()
@@ -0,0 +1,116 @@
+"""
+Vectorized NDVI simulator.
+
+Produces simulated NDVI for many farms and dates in one pass, using the same
+crop, season and location factors as SatelliteService._generate_simulated_ndvi.
+Used for demo seeding, load tests and filling time series.
+"""
+import numpy as np
+
+from simulation import keyed_uniform
+
+# Healthy vegetation is typically 0.6-0.8
+BASE_NDVI = 0.7
+
+# Relative NDVI by crop type
+CROP_NDVI_FACTORS = {
+    "Maize": 0.9,
+    "Rice": 1.1,
+    "Cassava": 0.85,
+    "Yam": 0.8,
+    "Cocoa": 1.0,
+    "Coffee": 1.0,
+    "Tea": 0.95,
+    "Vegetables": 0.75,
+    "Fruits": 0.9,
+    "Other": 0.85
+}
+
+# Lower bounds of the Poor/Fair/Good/Excellent health bands
+HEALTH_THRESHOLDS = (0.3, 0.5, 0.7)
+HEALTH_STATUSES = np.array(["Poor", "Fair", "Good", "Excellent"])
+
+PIXEL_GRID_SIZE = 5
+PIXEL_SIZE_DEGREES = 0.01  # approximately 1km
+
+
+def season_factors(months):
+    """
+    Seasonal NDVI factor per calendar month (simplified for Ghana/Kenya)
+
+    The main growing season is April-October, peaking in July.
+    """
+    months = np.asarray(months)
+    growing = (months >= 4) & (months <= 10)
+    return np.where(growing, 1.0 + 0.2 * np.sin((months - 4) * np.pi / 6), 0.7)
+
+
+def health_bands(ndvi):
+    """Health band index (0 Poor .. 3 Excellent) for NDVI values"""
+    return np.digitize(ndvi, HEALTH_THRESHOLDS)
+
+
+class NDVISimulator:
+    """
+    Simulates an (n_farms x n_dates) NDVI matrix
+
+    Random variation is keyed by (location, date), so an observation has the
+    same value whether it is simulated alone or as part of a batch.
+    """
+
+    def __init__(self, seed=None):
+        """
+        Initialize the simulator
+
+        Args:
+            seed: Simulation seed, None for the global SIMULATION_SEED
+        """
+        self.seed = seed
+
+    def simulate(self, latitudes, longitudes, crop_types, dates, include_pixels=True):
+        """
+        Simulate NDVI for every farm at every date
+
+        Args:
+            latitudes: Farm latitudes (n_farms)
+            longitudes: Farm longitudes (n_farms)
+            crop_types: Crop type per farm, None for unknown (n_farms)
+            dates: Observation dates (n_dates)
+            include_pixels: Also simulate the 5x5 pixel grid per observation
+
+        Returns:
+            Dictionary with 'ndvi' (n_farms x n_dates), 'health_band' (n_farms x n_dates)
+            and 'pixels' (n_farms x n_dates x 5 x 5, or None)
+        """
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+
+        crop_factors = np.array([
+            CROP_NDVI_FACTORS.get(crop_type, 1.0) if crop_type else 1.0 for crop_type in crop_types
+        ])
+        seasonal = season_factors([date.month for date in dates])
+
+        locations = [f"{latitude:.4f},{longitude:.4f}" for latitude, longitude in zip(latitudes, longitudes)]
+
+        # One factor per location, the same on every date
+        location_factors = keyed_uniform('ndvi.location', locations, ['location'], 0.9, 1.1, seed=self.seed)[:, 0]
+
+        # Natural variation per observation
+        random_factors = keyed_uniform('ndvi', locations, dates, 0.9, 1.1, seed=self.seed)
+
+        ndvi = BASE_NDVI * (crop_factors * location_factors)[:, None] * seasonal[None, :] * random_factors
+        ndvi = np.clip(ndvi, -1.0, 1.0)
+
+        pixels = None
+        if include_pixels:
+            variation = keyed_uniform(
+                'ndvi.pixels', locations, dates, 0.9, 1.1,
+                draws=(PIXEL_GRID_SIZE, PIXEL_GRID_SIZE), seed=self.seed
+            )
+            pixels = np.round(np.clip(ndvi[:, :, None, None] * variation, -1.0, 1.0), 2)
+
+        return {
+            'ndvi': ndvi,
+            'health_band': health_bands(ndvi),
+            'pixels': pixels
+        }
@@ -0,0 +1,147 @@
+"""
+Offline bundle service for the AgriFinance API.
+
+Packs everything the mobile app shows offline for a farmer - farms with their
+crop health, weather forecasts and climate risk - into one versioned payload,
+so a client on a slow connection makes one request instead of one per farm.
+
+Every bundle item is hashed and the bundle version is a hash of all items. A
+client that sends the version it already holds receives only the items that
+changed since then and the keys of removed items.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from sqlalchemy import select
+
+from api.models import Farm
+from api.services.risk_assessment_service import risk_assessment_service
+from api.services.weather_service import weather_service
+from climate.services.spatial_grid import WEATHER_GRID
+
+# Configure logging
+logger = logging.getLogger('agrifinance_api.services.offline_bundle')
+
+# Payload format version, bumped when the item layout changes
+BUNDLE_FORMAT = 1
+
+
+def _digest(value):
+    """Short content hash of a JSON-serializable value"""
+    payload = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class OfflineBundleService:
+    """
+    Service building full and delta offline bundles per farmer.
+    """
+
+    def __init__(self, weather=None, risk=None, forecast_days=7, versions_per_farmer=5):
+        """
+        Initialize the offline bundle service
+
+        Args:
+            weather: WeatherService providing forecasts (default: shared instance)
+            risk: RiskAssessmentService providing climate risk (default: shared instance)
+            forecast_days: Forecast days included in a bundle
+            versions_per_farmer: Earlier bundle versions remembered per farmer for deltas
+        """
+        self.weather = weather or weather_service
+        self.risk = risk or risk_assessment_service
+        self.forecast_days = forecast_days
+        self.versions_per_farmer = versions_per_farmer
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def build(self, session, farmer_id, since=None):
+        """
+        Build a farmer's bundle, as a delta when the since version is known.
+
+        Args:
+            session: SQLAlchemy session
+            farmer_id: Farmer identifier
+            since: Bundle version the client already holds
+
+        Returns:
+            Bundle dictionary with 'version', 'base_version', 'items' and 'removed'
+        """
+        items = self._collect_items(session, farmer_id)
+        hashes = {key: _digest(value) for key, value in items.items()}
+        version = f"{BUNDLE_FORMAT}-{_digest(sorted(hashes.items()))}"
+
+        with self._lock:
+            history = self._versions.setdefault(farmer_id, OrderedDict())
+            base = history.get(since) if since and since != version else None
+            history[version] = hashes
+            history.move_to_end(version)
+            while len(history) > self.versions_per_farmer:
+                history.popitem(last=False)
+
+        if since == version:
+            changed, removed = {}, []
+        elif base is not None:
+            changed = {key: value for key, value in items.items() if base.get(key) != hashes[key]}
+            removed = sorted(key for key in base if key not in items)
+        else:
+            # Unknown or expired version: send everything
+            since, changed, removed = None, items, []
+
+        return {
+            "format": BUNDLE_FORMAT,
+            "farmer_id": farmer_id,
+            "version": version,
+            "base_version": since,
+            "generated_at": datetime.utcnow().isoformat(),
+            "items": changed,
+            "removed": removed
+        }
+
+    def encode(self, bundle, compress=True):
+        """Compact JSON encoding of a bundle, gzip-compressed unless compress is False"""
+        payload = json.dumps(bundle, separators=(',', ':'), default=str).encode('utf-8')
+        return gzip.compress(payload, compresslevel=6) if compress else payload
+
+    def _collect_items(self, session, farmer_id):
+        """
+        Bundle items keyed by 'farm:<id>', 'risk:<farm id>' and 'forecast:<cell key>'.
+
+        Forecasts are stored once per weather grid cell; farm items name their cell.
+        """
+        farms = session.execute(select(Farm).where(Farm.farmer_id == farmer_id)).scalars().all()
+        items = {}
+        located = []
+
+        for farm in farms:
+            farm_item = farm.to_dict()
+            if farm.latitude is not None and farm.longitude is not None:
+                cell = WEATHER_GRID.key(WEATHER_GRID.cell(farm.latitude, farm.longitude))
+                farm_item["forecast_cell"] = cell
+                located.append((cell, farm))
+            items[f"farm:{farm.id}"] = farm_item
+
+        # One forecast per weather grid cell
+        cells = {}
+        for cell, farm in located:
+            cells.setdefault(cell, farm)
+        forecasts = self.weather.get_weather_forecasts(
+            [{"latitude": farm.latitude, "longitude": farm.longitude} for farm in cells.values()],
+            days=self.forecast_days
+        )
+        for cell, forecast in zip(cells, forecasts):
+            items[f"forecast:{cell}"] = forecast["forecasts"]
+
+        # Climate risk is precomputed, never assessed while building a bundle
+        assessments = self.risk.get_latest_for_farms(session, [farm.id for farm in farms])
+        for farm_id, assessment in assessments.items():
+            items[f"risk:{farm_id}"] = assessment.to_dict()
+
+        return items
+
+# Create a singleton instance
+offline_bundle_service = OfflineBundleService()
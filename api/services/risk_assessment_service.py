@@ -0,0 +1,171 @@
+"""
+Climate risk assessment service for the AgriFinance API.
+
+Climate risk assessments are precomputed for every farm by a scheduled job
+instead of being created lazily when the app opens. Farms are grouped by risk
+grid cell and crop, each group is assessed once, and the assessments are
+written with one bulk INSERT per batch. Requests only read the latest row,
+and rows older than the retention window are compacted away.
+"""
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.orm import aliased
+
+from api.models import ClimateRiskAssessment, RiskLevel, Farm
+from api.services.weather_service import weather_service
+
+# Configure logging
+logger = logging.getLogger('agrifinance_api.services.risk_assessment')
+
+
+class RiskAssessmentService:
+    """
+    Service precomputing and serving farm climate risk assessments.
+    """
+
+    def __init__(self, weather=None, batch_size=1000, retention_days=30):
+        """
+        Initialize the risk assessment service
+
+        Args:
+            weather: WeatherService assessing climate risk (default: shared instance)
+            batch_size: Farms per INSERT statement
+            retention_days: Days superseded assessments are kept
+        """
+        self.weather = weather or weather_service
+        self.batch_size = batch_size
+        self.retention_days = retention_days
+
+    def ensure_schema(self, engine):
+        """Add the (farm_id, assessment_date) index to a table created before it existed"""
+        with engine.begin() as connection:
+            connection.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_climate_risk_assessments_farm_date "
+                "ON climate_risk_assessments (farm_id, assessment_date)"
+            ))
+
+    def get_latest(self, session, farm_id):
+        """
+        Latest precomputed assessment for a farm.
+
+        Returns:
+            ClimateRiskAssessment, or None if the farm has not been assessed yet
+        """
+        return session.execute(
+            select(ClimateRiskAssessment)
+            .where(ClimateRiskAssessment.farm_id == farm_id)
+            .order_by(ClimateRiskAssessment.assessment_date.desc())
+            .limit(1)
+        ).scalar_one_or_none()
+
+    def data_version(self, session):
+        """Largest assessment id, which changes whenever assessments are stored"""
+        return session.execute(select(func.max(ClimateRiskAssessment.id))).scalar()
+
+    def get_latest_for_farms(self, session, farm_ids):
+        """
+        Latest precomputed assessment for each of several farms in one query.
+
+        Returns:
+            Dictionary of ClimateRiskAssessment keyed by farm id, farms without one are missing
+        """
+        if not farm_ids:
+            return {}
+
+        latest = (
+            select(ClimateRiskAssessment.farm_id, func.max(ClimateRiskAssessment.assessment_date).label("latest"))
+            .where(ClimateRiskAssessment.farm_id.in_(farm_ids))
+            .group_by(ClimateRiskAssessment.farm_id)
+            .subquery()
+        )
+        assessments = session.execute(
+            select(ClimateRiskAssessment).join(
+                latest,
+                (ClimateRiskAssessment.farm_id == latest.c.farm_id)
+                & (ClimateRiskAssessment.assessment_date == latest.c.latest)
+            )
+        ).scalars().all()
+
+        return {assessment.farm_id: assessment for assessment in assessments}
+
+    def precompute(self, session, farm_ids=None):
+        """
+        Assess every farm, or the given farms, and store the assessments.
+
+        The caller commits the session.
+
+        Args:
+            session: SQLAlchemy session
+            farm_ids: Optional farm ids to restrict the run to
+
+        Returns:
+            Dictionary with the number of farms, assessed groups and stored rows
+        """
+        query = select(Farm.id, Farm.latitude, Farm.longitude, Farm.primary_crop)
+        if farm_ids is not None:
+            query = query.where(Farm.id.in_(farm_ids))
+        farms = session.execute(query).all()
+
+        # One assessment per risk grid cell and crop
+        groups = {}
+        for farm_id, latitude, longitude, crop in farms:
+            crop_type = crop.value if crop else None
+            key = (self.weather.risk_cell(latitude, longitude), crop_type)
+            groups.setdefault(key, (latitude, longitude, []))[2].append(farm_id)
+
+        assessment_date = datetime.utcnow()
+        rows = []
+        for (_, crop_type), (latitude, longitude, group_farm_ids) in groups.items():
+            risk = self.weather.get_climate_risk(latitude, longitude, crop_type)
+            values = {
+                "assessment_date": assessment_date,
+                "risk_level": RiskLevel(risk["risk_level"]),
+                "risk_score": risk["risk_score"],
+                "drought_risk": risk["drought_risk"],
+                "flood_risk": risk["flood_risk"],
+                "pest_risk": risk["pest_risk"],
+                "mitigation_strategies": risk["mitigation_strategies"]
+            }
+            rows.extend({"farm_id": farm_id, **values} for farm_id in group_farm_ids)
+
+        for start in range(0, len(rows), self.batch_size):
+            session.execute(insert(ClimateRiskAssessment), rows[start:start + self.batch_size])
+
+        logger.info(f"Stored climate risk assessments for {len(rows)} farms from {len(groups)} groups")
+        return {
+            "farms": len(farms),
+            "groups": len(groups),
+            "assessments": len(rows)
+        }
+
+    def compact(self, session, retention_days=None, now=None):
+        """
+        Delete assessments older than the retention window, keeping each farm's latest.
+
+        The caller commits the session.
+
+        Returns:
+            Number of deleted rows
+        """
+        retention_days = self.retention_days if retention_days is None else retention_days
+        cutoff = (now or datetime.utcnow()) - timedelta(days=retention_days)
+
+        newer = aliased(ClimateRiskAssessment)
+        latest = (
+            select(func.max(newer.assessment_date))
+            .where(newer.farm_id == ClimateRiskAssessment.farm_id)
+            .scalar_subquery()
+        )
+        result = session.execute(
+            delete(ClimateRiskAssessment).where(
+                ClimateRiskAssessment.assessment_date < cutoff,
+                ClimateRiskAssessment.assessment_date < latest
+            )
+        )
+        logger.info(f"Compacted {result.rowcount} climate risk assessments older than {cutoff.date().isoformat()}")
+        return result.rowcount
+
+# Create a singleton instance
+risk_assessment_service = RiskAssessmentService()
@@ -0,0 +1,227 @@
+"""
+SQLite-backed cache store for satellite NDVI data.
+
+Entries are keyed by (farm_id, kind, timestamp) in a single indexed table so
+latest-value and date-range lookups are index scans instead of re-reading and
+re-parsing a JSON file per farm. Writes are transactional, total size is
+bounded with least-recently-used eviction, and hit/miss counters are kept per
+entry kind.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timezone
+
+logger = logging.getLogger('agrifinance_api.services.satellite_cache')
+
+
+class NDVICacheStore:
+    """
+    Indexed, size-bounded NDVI cache in a local SQLite database.
+
+    Entry kinds separate single observations ('point') from time series
+    points ('series'), mirroring the two lookups of SatelliteService.
+    """
+
+    def __init__(self, db_path, max_bytes=50 * 1024 * 1024):
+        """
+        Initialize the cache store
+
+        Args:
+            db_path: Path of the SQLite database file
+            max_bytes: Total payload size above which least recently used entries are evicted
+        """
+        self.db_path = str(db_path)
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {}
+        self._create_schema()
+
+    def _connection(self):
+        """Per-thread connection, SQLite connections must not be shared across threads"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _create_schema(self):
+        connection = self._connection()
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS ndvi_cache (
+                farm_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                ts REAL NOT NULL,
+                payload TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (farm_id, kind, ts)
+            ) WITHOUT ROWID
+        """)
+        connection.execute("CREATE INDEX IF NOT EXISTS ndvi_cache_accessed ON ndvi_cache (accessed_at)")
+
+    def get_latest(self, farm_id, kind='point'):
+        """
+        Most recent entry for a farm
+
+        Returns:
+            Tuple of (timestamp, data), or None on a miss
+        """
+        row = self._connection().execute(
+            "SELECT ts, payload FROM ndvi_cache WHERE farm_id = ? AND kind = ? ORDER BY ts DESC LIMIT 1",
+            (str(farm_id), kind)
+        ).fetchone()
+        self._record(kind, row is not None)
+        if row is None:
+            return None
+        self._touch(farm_id, kind, [row[0]])
+        return row[0], json.loads(row[1])
+
+    def get(self, farm_id, date, kind='point'):
+        """
+        Entry for a farm at an exact date
+
+        Returns:
+            Cached data dictionary, or None on a miss
+        """
+        ts = to_timestamp(date)
+        row = self._connection().execute(
+            "SELECT payload FROM ndvi_cache WHERE farm_id = ? AND kind = ? AND ts = ?",
+            (str(farm_id), kind, ts)
+        ).fetchone()
+        self._record(kind, row is not None)
+        if row is None:
+            return None
+        self._touch(farm_id, kind, [ts])
+        return json.loads(row[0])
+
+    def get_range(self, farm_id, start_date, end_date, kind='series'):
+        """
+        Entries for a farm between two dates (inclusive), ordered by date
+
+        Returns:
+            List of (timestamp, data) tuples, empty on a miss
+        """
+        rows = self._connection().execute(
+            "SELECT ts, payload FROM ndvi_cache WHERE farm_id = ? AND kind = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+            (str(farm_id), kind, to_timestamp(start_date), to_timestamp(end_date))
+        ).fetchall()
+        self._record(kind, bool(rows))
+        if rows:
+            self._touch(farm_id, kind, [row[0] for row in rows])
+        return [(row[0], json.loads(row[1])) for row in rows]
+
+    def put(self, farm_id, entries, kind='point', replace=False):
+        """
+        Store entries for a farm in one transaction
+
+        Args:
+            farm_id: Farm identifier
+            entries: List of data dictionaries, each with a 'date' key
+            kind: Entry kind
+            replace: Drop the farm's existing entries of this kind first
+        """
+        now = time.time()
+        rows = []
+        for entry in entries:
+            payload = json.dumps(entry)
+            rows.append((str(farm_id), kind, to_timestamp(entry['date']), payload, len(payload), now))
+
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if replace:
+                connection.execute(
+                    "DELETE FROM ndvi_cache WHERE farm_id = ? AND kind = ?",
+                    (str(farm_id), kind)
+                )
+            connection.executemany(
+                "INSERT OR REPLACE INTO ndvi_cache (farm_id, kind, ts, payload, size, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._evict(connection)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def stats(self):
+        """
+        Cache statistics: hits, misses and hit rate per kind, entry count and size
+        """
+        entries, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ndvi_cache"
+        ).fetchone()
+
+        with self._stats_lock:
+            kinds = {
+                kind: {
+                    'hits': counts['hits'],
+                    'misses': counts['misses'],
+                    'hit_rate': round(counts['hits'] / (counts['hits'] + counts['misses']), 3)
+                } for kind, counts in self._stats.items()
+            }
+
+        return {
+            'entries': entries,
+            'size_bytes': size,
+            'max_bytes': self.max_bytes,
+            'kinds': kinds
+        }
+
+    def _evict(self, connection):
+        """Drop least recently used entries until the store fits in max_bytes"""
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM ndvi_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excess = total - self.max_bytes
+        victims = []
+        for farm_id, kind, ts, size in connection.execute(
+            "SELECT farm_id, kind, ts, size FROM ndvi_cache ORDER BY accessed_at"
+        ):
+            victims.append((farm_id, kind, ts))
+            excess -= size
+            if excess <= 0:
+                break
+
+        connection.executemany(
+            "DELETE FROM ndvi_cache WHERE farm_id = ? AND kind = ? AND ts = ?",
+            victims
+        )
+        logger.info(f"Evicted {len(victims)} NDVI cache entries")
+
+    def _touch(self, farm_id, kind, timestamps):
+        try:
+            now = time.time()
+            self._connection().executemany(
+                "UPDATE ndvi_cache SET accessed_at = ? WHERE farm_id = ? AND kind = ? AND ts = ?",
+                [(now, str(farm_id), kind, ts) for ts in timestamps]
+            )
+        except sqlite3.OperationalError as e:
+            # Recency is best effort, a busy database must not fail the read
+            logger.debug(f"Could not update NDVI cache recency: {str(e)}")
+
+    def _record(self, kind, hit):
+        with self._stats_lock:
+            counts = self._stats.setdefault(kind, {'hits': 0, 'misses': 0})
+            counts['hits' if hit else 'misses'] += 1
+
+
+def to_timestamp(value):
+    """
+    POSIX timestamp for a datetime or ISO date string, naive values are taken as UTC
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    elif not isinstance(value, datetime) and isinstance(value, date):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
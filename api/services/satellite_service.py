@@ -7,15 +7,26 @@ for crop health monitoring.
 """
 import logging
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import requests
 import os
+import time
 from pathlib import Path
 import json
 
+from api.services.satellite_cache import NDVICacheStore, to_timestamp
+from api.services.ndvi_simulator import NDVISimulator, HEALTH_STATUSES, PIXEL_SIZE_DEGREES
+
 # Configure logging
 logger = logging.getLogger('agrifinance_api.services.satellite')
 
+# Time series samples are taken every SERIES_INTERVAL_DAYS counted from SERIES_ANCHOR
+SERIES_INTERVAL_DAYS = 30
+SERIES_ANCHOR = datetime(2000, 1, 1)
+
+# An NDVI value inside each health band, used to look up band recommendations
+HEALTH_BAND_VALUES = (0.2, 0.4, 0.6, 0.8)
+
 class SatelliteService:
     """
     Service for satellite imagery and NDVI analysis.
@@ -32,6 +43,16 @@ class SatelliteService:
         
         # Create cache directory if it doesn't exist
         os.makedirs(self.cache_path, exist_ok=True)
+        
+        # Indexed NDVI cache keyed by (farm_id, date)
+        self.cache = NDVICacheStore(
+            self.cache_path / 'ndvi_cache.sqlite3',
+            max_bytes=int(os.environ.get('SATELLITE_CACHE_MAX_BYTES', 50 * 1024 * 1024))
+        )
+    
+    def get_cache_stats(self):
+        """Get hit rate and size statistics of the NDVI cache"""
+        return self.cache.stats()
     
     def get_ndvi_data(self, latitude, longitude, farm_id=None, crop_type=None, date=None):
         """
@@ -89,53 +110,140 @@ class SatelliteService:
         elif isinstance(start_date, str):
             start_date = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
         
+        # Samples sit on a fixed grid so overlapping windows share cached points
+        sample_dates = self._series_dates(start_date, end_date)
+        
         # Check cache first if farm_id is provided
-        if farm_id:
-            cached_series = self._check_cache_series(farm_id, start_date, end_date)
-            if cached_series:
-                return cached_series
+        cached_points = self._check_cache_series(farm_id, start_date, end_date) if farm_id else {}
         
-        # Generate time series data
-        # In a real app, we would fetch this from a satellite data provider
-        time_series = []
+        # Generate only the sub-ranges missing from the cache
+        # In a real app, we would fetch each sub-range from a satellite data provider
+        missing_dates = [
+            sample_date
+            for missing_range in self._missing_ranges(sample_dates, cached_points)
+            for sample_date in missing_range
+        ]
+        generated = []
+        if missing_dates:
+            generated = self.simulate_ndvi_batch(
+                [{"latitude": latitude, "longitude": longitude, "crop_type": crop_type}],
+                missing_dates
+            )[0]
         
-        # Generate monthly data points
-        current_date = start_date
-        while current_date <= end_date:
-            ndvi_data = self._generate_simulated_ndvi(
-                latitude, 
-                longitude, 
-                crop_type, 
-                current_date
-            )
-            time_series.append(ndvi_data)
-            current_date += timedelta(days=30)  # Approximately monthly
+        # Cache the new points if farm_id is provided
+        if farm_id and generated:
+            self._cache_time_series(farm_id, generated)
         
-        # Cache the data if farm_id is provided
-        if farm_id:
-            self._cache_time_series(farm_id, time_series)
+        # Merge cached and generated points into the requested window
+        points = dict(cached_points)
+        points.update((to_timestamp(data['date']), data) for data in generated)
+        return [points[ts] for ts in sorted(points)]
+    
+    def simulate_ndvi_batch(self, farms, dates, seed=None):
+        """
+        Simulate NDVI records for many farms and dates in one vectorized pass.
         
-        return time_series
+        Args:
+            farms: List of dicts with 'latitude', 'longitude' and optional 'farm_id', 'crop_type'
+            dates: List of observation datetimes
+            seed: Optional seed overriding SIMULATION_SEED
+            
+        Returns:
+            List (one per farm) of lists of NDVI data dictionaries (one per date)
+        """
+        if not farms or not dates:
+            return [[] for _ in farms]
+        
+        simulation = NDVISimulator(seed).simulate(
+            [farm["latitude"] for farm in farms],
+            [farm["longitude"] for farm in farms],
+            [farm.get("crop_type") for farm in farms],
+            dates
+        )
+        ndvi = np.round(simulation["ndvi"], 2).tolist()
+        bands = simulation["health_band"].tolist()
+        pixels = simulation["pixels"].tolist()
+        statuses = HEALTH_STATUSES.tolist()
+        date_strings = [date.isoformat() for date in dates]
+        
+        # Recommendations only depend on health band, crop and month
+        recommendations = {}
+        
+        def recommend(band, crop_type, date):
+            key = (band, crop_type, date.month)
+            if key not in recommendations:
+                recommendations[key] = self._generate_recommendations(HEALTH_BAND_VALUES[band], crop_type, date)
+            return list(recommendations[key])
+        
+        results = []
+        for i, farm in enumerate(farms):
+            crop_type = farm.get("crop_type")
+            results.append([
+                {
+                    "farm_id": farm.get("farm_id"),
+                    "latitude": farm["latitude"],
+                    "longitude": farm["longitude"],
+                    "date": date_strings[j],
+                    "ndvi_value": ndvi[i][j],
+                    "health_status": statuses[bands[i][j]],
+                    "pixel_data": pixels[i][j],
+                    "pixel_size_degrees": PIXEL_SIZE_DEGREES,
+                    "recommendations": recommend(bands[i][j], crop_type, date)
+                } for j, date in enumerate(dates)
+            ])
+        
+        return results
+    
+    def _series_dates(self, start_date, end_date):
+        """Sample dates of a time series, aligned to a fixed grid of SERIES_INTERVAL_DAYS"""
+        start_date = self._as_naive_utc(start_date)
+        end_date = self._as_naive_utc(end_date)
+        interval = timedelta(days=SERIES_INTERVAL_DAYS)
+        
+        steps = -((SERIES_ANCHOR - start_date) // interval)  # Ceiling division
+        current_date = SERIES_ANCHOR + steps * interval
+        
+        dates = []
+        while current_date <= end_date:
+            dates.append(current_date)
+            current_date += interval
+        return dates
+    
+    def _missing_ranges(self, sample_dates, cached_points):
+        """Split the sample dates missing from the cache into contiguous runs"""
+        ranges = []
+        current = []
+        for sample_date in sample_dates:
+            if to_timestamp(sample_date) in cached_points:
+                if current:
+                    ranges.append(current)
+                    current = []
+            else:
+                current.append(sample_date)
+        if current:
+            ranges.append(current)
+        return ranges
+    
+    def _as_naive_utc(self, value):
+        """Convert a datetime to naive UTC"""
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
     
     def _check_cache(self, farm_id, date=None):
         """Check if we have cached NDVI data for this farm"""
         try:
-            cache_file = self.cache_path / f"farm_{farm_id}_ndvi.json"
-            if not os.path.exists(cache_file):
+            # A specific date is an immutable observation
+            if date:
+                return self.cache.get(farm_id, date)
+            
+            latest = self.cache.get_latest(farm_id)
+            if not latest:
                 return None
                 
-            with open(cache_file, 'r') as f:
-                data = json.load(f)
-                
-            # If date is specified, check if the cached data is for that date
-            if date:
-                date_str = date.isoformat() if isinstance(date, datetime) else date
-                if data.get('date') != date_str:
-                    return None
-                    
-            # Check if cache is recent (within 7 days)
-            cache_date = datetime.fromisoformat(data.get('date').replace('Z', '+00:00'))
-            if datetime.utcnow() - cache_date > timedelta(days=7):
+            # Latest data is only served while recent (within 7 days)
+            cache_ts, data = latest
+            if time.time() - cache_ts > timedelta(days=7).total_seconds():
                 return None
                 
             return data
@@ -144,48 +252,25 @@ class SatelliteService:
             return None
     
     def _check_cache_series(self, farm_id, start_date, end_date):
-        """Check if we have cached NDVI time series data for this farm"""
+        """Get cached NDVI time series points for this farm within a date range"""
         try:
-            cache_file = self.cache_path / f"farm_{farm_id}_ndvi_series.json"
-            if not os.path.exists(cache_file):
-                return None
-                
-            with open(cache_file, 'r') as f:
-                data = json.load(f)
-                
-            # Check if cache covers the requested date range
-            cache_start = datetime.fromisoformat(data[0].get('date').replace('Z', '+00:00'))
-            cache_end = datetime.fromisoformat(data[-1].get('date').replace('Z', '+00:00'))
-            
-            if cache_start <= start_date and cache_end >= end_date:
-                # Filter to requested date range
-                filtered_data = [
-                    d for d in data 
-                    if datetime.fromisoformat(d.get('date').replace('Z', '+00:00')) >= start_date
-                    and datetime.fromisoformat(d.get('date').replace('Z', '+00:00')) <= end_date
-                ]
-                return filtered_data
-                
-            return None
+            # Indexed range scan over the requested dates
+            return dict(self.cache.get_range(farm_id, start_date, end_date))
         except Exception as e:
             logger.warning(f"Error reading cache series for farm {farm_id}: {str(e)}")
-            return None
+            return {}
     
     def _cache_data(self, farm_id, data):
         """Cache NDVI data for a farm"""
         try:
-            cache_file = self.cache_path / f"farm_{farm_id}_ndvi.json"
-            with open(cache_file, 'w') as f:
-                json.dump(data, f)
+            self.cache.put(farm_id, [data])
         except Exception as e:
             logger.warning(f"Error caching data for farm {farm_id}: {str(e)}")
     
     def _cache_time_series(self, farm_id, data):
         """Cache NDVI time series data for a farm"""
         try:
-            cache_file = self.cache_path / f"farm_{farm_id}_ndvi_series.json"
-            with open(cache_file, 'w') as f:
-                json.dump(data, f)
+            self.cache.put(farm_id, data, kind='series')
         except Exception as e:
             logger.warning(f"Error caching time series for farm {farm_id}: {str(e)}")
     
@@ -202,93 +287,11 @@ class SatelliteService:
         elif isinstance(date, str):
             date = datetime.fromisoformat(date.replace('Z', '+00:00'))
         
-        # Base NDVI value (healthy vegetation is typically 0.6-0.8)
-        base_ndvi = 0.7
-        
-        # Adjust based on crop type
-        crop_factors = {
-            "Maize": 0.9,
-            "Rice": 1.1,
-            "Cassava": 0.85,
-            "Yam": 0.8,
-            "Cocoa": 1.0,
-            "Coffee": 1.0,
-            "Tea": 0.95,
-            "Vegetables": 0.75,
-            "Fruits": 0.9,
-            "Other": 0.85
-        }
-        
-        crop_factor = crop_factors.get(crop_type, 1.0) if crop_type else 1.0
-        
-        # Adjust based on season (simplified for Ghana/Kenya)
-        # Assuming main growing season is April-October
-        month = date.month
-        if 4 <= month <= 10:
-            # Growing season
-            season_factor = 1.0 + 0.2 * np.sin((month - 4) * np.pi / 6)  # Peak in July
-        else:
-            # Dry season
-            season_factor = 0.7
-        
-        # Add some randomness based on location
-        # This creates spatial variation that would be seen in real satellite imagery
-        location_seed = int(abs(latitude * 1000) + abs(longitude * 1000))
-        np.random.seed(location_seed)
-        location_factor = np.random.uniform(0.9, 1.1)
-        
-        # Add some randomness for natural variation
-        random_factor = np.random.uniform(0.9, 1.1)
-        
-        # Calculate final NDVI value
-        ndvi_value = base_ndvi * crop_factor * season_factor * location_factor * random_factor
-        
-        # Clamp to realistic range (-1 to 1, but typically 0 to 0.9 for vegetation)
-        ndvi_value = max(-1.0, min(1.0, ndvi_value))
-        
-        # Generate pixel data (simplified representation of what would be an actual image)
-        # In a real app, this would be an actual satellite image
-        pixel_size = 0.01  # degrees (approximately 1km)
-        grid_size = 5  # 5x5 grid
-        
-        pixels = []
-        for i in range(grid_size):
-            row = []
-            for j in range(grid_size):
-                # Add spatial variation to pixels
-                pixel_variation = np.random.uniform(0.9, 1.1)
-                pixel_value = max(-1.0, min(1.0, ndvi_value * pixel_variation))
-                row.append(round(pixel_value, 2))
-            pixels.append(row)
-        
-        # Calculate health status
-        health_status = self._calculate_health_status(ndvi_value)
-        
-        # Generate farming recommendations based on NDVI
-        recommendations = self._generate_recommendations(ndvi_value, crop_type, date)
-        
-        return {
-            "farm_id": None,  # Will be set by caller if needed
-            "latitude": latitude,
-            "longitude": longitude,
-            "date": date.isoformat(),
-            "ndvi_value": round(ndvi_value, 2),
-            "health_status": health_status,
-            "pixel_data": pixels,
-            "pixel_size_degrees": pixel_size,
-            "recommendations": recommendations
-        }
-    
-    def _calculate_health_status(self, ndvi_value):
-        """Calculate crop health status based on NDVI value"""
-        if ndvi_value >= 0.7:
-            return "Excellent"
-        elif ndvi_value >= 0.5:
-            return "Good"
-        elif ndvi_value >= 0.3:
-            return "Fair"
-        else:
-            return "Poor"
+        # One-farm, one-date batch: the same deterministic stream as time series
+        return self.simulate_ndvi_batch(
+            [{"latitude": latitude, "longitude": longitude, "crop_type": crop_type}],
+            [date]
+        )[0][0]
     
     def _generate_recommendations(self, ndvi_value, crop_type, date):
         """Generate farming recommendations based on NDVI value and crop type"""
@@ -5,15 +5,18 @@ This service provides weather forecasts and climate risk assessments
 with a focus on agricultural relevance and offline capabilities.
 """
 import logging
-import numpy as np
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
 import requests
 import os
 from pathlib import Path
-import json
-import random
 
 from api.models import WeatherCondition, RiskLevel
+from api.services.forecast_cache import ForecastCache, freeze, thaw
+from api.services.weather_simulator import WeatherSimulator, CONDITIONS
+from climate.services.spatial_grid import WEATHER_GRID, CLIMATE_RISK_GRID
+from simulation import entity_rng
 
 # Configure logging
 logger = logging.getLogger('agrifinance_api.services.weather')
@@ -32,18 +35,21 @@ class WeatherService:
         self.api_key = os.environ.get('WEATHER_API_KEY')
         self.cache_path = Path(__file__).parent.parent.parent / 'cache' / 'weather'
         
-        # Create cache directory if it doesn't exist
-        os.makedirs(self.cache_path, exist_ok=True)
-        
-        # Weather conditions common in Ghana and Kenya
-        self.conditions = [
-            {"condition": WeatherCondition.SUNNY, "temp_range": (24, 34), "precip": (0, 0.1)},
-            {"condition": WeatherCondition.PARTLY_CLOUDY, "temp_range": (22, 32), "precip": (0.1, 0.3)},
-            {"condition": WeatherCondition.CLOUDY, "temp_range": (21, 30), "precip": (0.2, 0.4)},
-            {"condition": WeatherCondition.LIGHT_RAIN, "temp_range": (20, 28), "precip": (0.5, 0.7)},
-            {"condition": WeatherCondition.HEAVY_RAIN, "temp_range": (19, 26), "precip": (0.8, 1.0)},
-            {"condition": WeatherCondition.THUNDERSTORM, "temp_range": (18, 25), "precip": (0.9, 1.0)}
-        ]
+        # Parsed forecasts per weather grid cell, in memory and on disk
+        self.forecast_cache = ForecastCache(
+            self.cache_path,
+            max_bytes=int(os.environ.get('WEATHER_CACHE_MAX_BYTES', 20 * 1024 * 1024))
+        )
+        
+        # Climate risk assessments shared by every location in a risk grid cell,
+        # stored read-only in an LRU bounded like the forecast cache
+        self._risk_cache = OrderedDict()
+        self._risk_lock = threading.Lock()
+        self.risk_cache_ttl = timedelta(hours=6)
+        self.risk_cache_max_entries = 4096
+        
+        # Batched Markov-chain simulator used while no weather API is configured
+        self.simulator = WeatherSimulator()
     
     def get_weather_forecast(self, latitude, longitude, location_name=None, days=5):
         """
@@ -58,22 +64,77 @@ class WeatherService:
         Returns:
             Dictionary with weather forecast data
         """
-        # Check cache first
-        cached_forecast = self._check_cache(latitude, longitude)
-        if cached_forecast and len(cached_forecast.get('forecasts', [])) >= days:
-            # Return only the requested number of days
-            cached_forecast['forecasts'] = cached_forecast['forecasts'][:days]
-            return cached_forecast
+        location = location_name or f"Location ({latitude:.4f}, {longitude:.4f})"
         
-        # In a real implementation, we would call a weather API here
-        # For the MVP, we'll generate realistic simulated data
+        # Forecasts are shared by every location in the same weather grid cell
+        cache_key = WEATHER_GRID.key(WEATHER_GRID.cell(latitude, longitude))
+        cached_forecast = self.forecast_cache.get(cache_key)
+        if cached_forecast is None or len(cached_forecast['forecasts']) < days:
+            # In a real implementation, we would call a weather API here
+            # For the MVP, we'll generate realistic simulated data
+            forecast = self._generate_simulated_forecast(latitude, longitude, location, days)
+            cached_forecast = self.forecast_cache.put(cache_key, forecast)
+        
+        # Copy only the requested days, the cached entry is shared
+        return {
+            "location": location,
+            "coordinates": {"latitude": latitude, "longitude": longitude},
+            "generated_at": cached_forecast['generated_at'],
+            "forecasts": thaw(cached_forecast['forecasts'][:days])
+        }
+    
+    def get_cache_stats(self):
+        """Get hit, miss and eviction counters of the forecast cache"""
+        return self.forecast_cache.stats()
+    
+    def fetch_forecast(self, latitude, longitude, location_name=None, days=5):
+        """
+        Fetch a fresh forecast from the provider, bypassing the file cache.
+        
+        Used by callers that store forecasts themselves, such as the forecast provider.
+        
+        Args:
+            latitude: Latitude coordinate
+            longitude: Longitude coordinate
+            location_name: Optional location name for display
+            days: Number of days to forecast (default: 5)
+            
+        Returns:
+            Dictionary with weather forecast data starting today
+        """
         location = location_name or f"Location ({latitude:.4f}, {longitude:.4f})"
-        forecast = self._generate_simulated_forecast(latitude, longitude, location, days)
         
-        # Cache the forecast
-        self._cache_forecast(latitude, longitude, forecast)
+        # In a real implementation, we would call a weather API here
+        return self._generate_simulated_forecast(latitude, longitude, location, days)
+    
+    def get_weather_forecasts(self, locations, days=5):
+        """
+        Get weather forecasts for many locations, one lookup per weather grid cell.
         
-        return forecast
+        Args:
+            locations: List of dicts with 'latitude', 'longitude' and optional 'name'
+            days: Number of days to forecast (default: 5)
+            
+        Returns:
+            List of forecast dictionaries in the same order as locations
+        """
+        forecasts = [None] * len(locations)
+        
+        def fetch(cell, latitude, longitude):
+            return self.get_weather_forecast(latitude, longitude, days=days)
+        
+        indexed = list(enumerate(locations))
+        for (index, location), forecast in WEATHER_GRID.fan_out(
+            indexed, lambda item: (item[1]['latitude'], item[1]['longitude']), fetch
+        ):
+            latitude, longitude = location['latitude'], location['longitude']
+            forecasts[index] = {
+                **forecast,
+                "location": location.get('name') or f"Location ({latitude:.4f}, {longitude:.4f})",
+                "coordinates": {"latitude": latitude, "longitude": longitude}
+            }
+        
+        return forecasts
     
     def get_climate_risk(self, latitude, longitude, crop_type=None):
         """
@@ -87,9 +148,56 @@ class WeatherService:
         Returns:
             Dictionary with climate risk data
         """
+        # Assessments are shared by every location in the same risk grid cell
+        cache_key = (self.risk_cell(latitude, longitude), crop_type)
+        with self._risk_lock:
+            cached = self._risk_cache.get(cache_key)
+            if cached and datetime.utcnow() - cached[0] < self.risk_cache_ttl:
+                self._risk_cache.move_to_end(cache_key)
+                return {**thaw(cached[1]), "latitude": latitude, "longitude": longitude}
+        
+        risk = self._assess_climate_risk(latitude, longitude, crop_type)
+        with self._risk_lock:
+            self._risk_cache[cache_key] = (datetime.utcnow(), freeze(risk))
+            self._risk_cache.move_to_end(cache_key)
+            while len(self._risk_cache) > self.risk_cache_max_entries:
+                self._risk_cache.popitem(last=False)
+        return risk
+    
+    def get_climate_risks(self, locations):
+        """
+        Get climate risk assessments for many locations, one per risk grid cell and crop.
+        
+        Args:
+            locations: List of dicts with 'latitude', 'longitude' and optional 'crop_type'
+            
+        Returns:
+            List of climate risk dictionaries in the same order as locations
+        """
+        return [
+            self.get_climate_risk(location['latitude'], location['longitude'], location.get('crop_type'))
+            for location in locations
+        ]
+    
+    def risk_cell(self, latitude, longitude):
+        """Risk grid cell key for a location, 'unlocated' without coordinates"""
+        if latitude is None or longitude is None:
+            return 'unlocated'
+        return CLIMATE_RISK_GRID.key(CLIMATE_RISK_GRID.cell(latitude, longitude))
+    
+    def _assess_climate_risk(self, latitude, longitude, crop_type=None):
+        """Assess climate risk for a location"""
+        # Deterministic per risk cell, crop and day
+        rng = entity_rng(
+            'climate_risk',
+            self.risk_cell(latitude, longitude),
+            crop_type or 'any',
+            datetime.utcnow()
+        )
+        
         # Base risk on location
         # This would be much more sophisticated in a real app
-        base_risk = random.uniform(0.2, 0.8)
+        base_risk = rng.uniform(0.2, 0.8)
         
         # Adjust for crop type
         crop_risk_factors = {
@@ -109,9 +217,9 @@ class WeatherService:
         adjusted_risk = base_risk * crop_factor
         
         # Calculate specific risks
-        drought_risk = min(1.0, adjusted_risk * random.uniform(0.8, 1.2))
-        flood_risk = min(1.0, adjusted_risk * random.uniform(0.8, 1.2))
-        pest_risk = min(1.0, adjusted_risk * random.uniform(0.8, 1.2))
+        drought_risk = min(1.0, adjusted_risk * rng.uniform(0.8, 1.2))
+        flood_risk = min(1.0, adjusted_risk * rng.uniform(0.8, 1.2))
+        pest_risk = min(1.0, adjusted_risk * rng.uniform(0.8, 1.2))
         
         # Calculate overall risk score (0-100)
         risk_score = round((drought_risk * 0.4 + flood_risk * 0.4 + pest_risk * 0.2) * 100)
@@ -148,42 +256,34 @@ class WeatherService:
             "mitigation_strategies": mitigation_strategies
         }
     
-    def _check_cache(self, latitude, longitude):
-        """Check if we have cached forecast data for this location"""
-        try:
-            # Round coordinates to reduce cache fragmentation
-            lat_rounded = round(latitude, 2)
-            lon_rounded = round(longitude, 2)
-            
-            cache_file = self.cache_path / f"forecast_{lat_rounded}_{lon_rounded}.json"
-            if not os.path.exists(cache_file):
-                return None
-                
-            with open(cache_file, 'r') as f:
-                data = json.load(f)
-                
-            # Check if cache is recent (within 6 hours)
-            cache_date = datetime.fromisoformat(data.get('generated_at').replace('Z', '+00:00'))
-            if datetime.utcnow() - cache_date > timedelta(hours=6):
-                return None
-                
-            return data
-        except Exception as e:
-            logger.warning(f"Error reading weather cache for {latitude}, {longitude}: {str(e)}")
-            return None
-    
-    def _cache_forecast(self, latitude, longitude, forecast):
-        """Cache forecast data for a location"""
-        try:
-            # Round coordinates to reduce cache fragmentation
-            lat_rounded = round(latitude, 2)
-            lon_rounded = round(longitude, 2)
+    def generate_forecasts(self, locations, days=5):
+        """
+        Simulate forecasts for many locations in one batched call.
+        
+        Used for bulk forecast seeding and load tests.
+        
+        Args:
+            locations: List of dicts with 'latitude', 'longitude' and optional 'name'
+            days: Number of days to forecast (default: 5)
             
-            cache_file = self.cache_path / f"forecast_{lat_rounded}_{lon_rounded}.json"
-            with open(cache_file, 'w') as f:
-                json.dump(forecast, f)
-        except Exception as e:
-            logger.warning(f"Error caching forecast for {latitude}, {longitude}: {str(e)}")
+        Returns:
+            List of forecast dictionaries in the same order as locations
+        """
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        dates = [today + timedelta(days=i) for i in range(days)]
+        cell_keys = [
+            WEATHER_GRID.key(WEATHER_GRID.cell(location['latitude'], location['longitude']))
+            for location in locations
+        ]
+        simulated = self.simulator.simulate(cell_keys, dates)
+        
+        return [
+            self._build_forecast(
+                simulated, index, dates,
+                location['latitude'], location['longitude'],
+                location.get('name') or f"Location ({location['latitude']:.4f}, {location['longitude']:.4f})"
+            ) for index, location in enumerate(locations)
+        ]
     
     def _generate_simulated_forecast(self, latitude, longitude, location, days):
         """
@@ -193,69 +293,40 @@ class WeatherService:
         day-to-day transitions that make meteorological sense.
         """
         today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        forecasts = []
+        dates = [today + timedelta(days=i) for i in range(days)]
         
-        # Generate a realistic pattern
-        # This is simplified, but could be made more realistic with Markov chains
-        # Start with a random condition, weighted toward good weather
-        current_condition_idx = np.random.choice(
-            [0, 1, 2, 3, 4, 5],  # Indices into self.conditions
-            p=[0.3, 0.3, 0.2, 0.1, 0.05, 0.05]  # Probabilities (higher for good weather)
-        )
+        # Deterministic per weather cell and day, so every location in a cell agrees
+        simulated = self.simulator.simulate([WEATHER_GRID.key(WEATHER_GRID.cell(latitude, longitude))], dates)
         
-        # For each day in the forecast
-        for i in range(days):
-            day = today + timedelta(days=i)
-            day_name = day.strftime("%a") if i > 0 else "Today"
-            
-            # Get the current condition
-            weather_info = self.conditions[current_condition_idx]
-            
-            # Generate realistic temperatures
-            temp_low = round(random.uniform(*weather_info["temp_range"]) - random.uniform(2, 4), 1)
-            temp_high = round(random.uniform(*weather_info["temp_range"]), 1)
-            
-            # Generate precipitation data
-            precip_chance = round(random.uniform(*weather_info["precip"]), 2)
-            precip_amount = round(random.uniform(0, 30) * precip_chance, 1) if precip_chance > 0.3 else 0
-            
-            # Generate farming recommendations based on weather
-            recommendation = self._generate_farming_recommendation(
-                weather_info["condition"], 
-                temp_high, 
-                precip_chance
-            )
+        return self._build_forecast(simulated, 0, dates, latitude, longitude, location)
+    
+    def _build_forecast(self, simulated, index, dates, latitude, longitude, location):
+        """Forecast dictionary for one row of a simulation result"""
+        forecasts = []
+        for i, day in enumerate(dates):
+            condition = CONDITIONS[simulated['condition'][index, i]]
+            temp_high = float(simulated['temperature_high'][index, i])
+            precip_chance = float(simulated['precipitation_chance'][index, i])
             
-            # Create forecast object
-            forecast = {
+            forecasts.append({
                 "date": day.isoformat(),
-                "day_name": day_name,
-                "condition": weather_info["condition"].value,
+                "day_name": day.strftime("%a") if i > 0 else "Today",
+                "condition": condition.value,
                 "temperature": {
                     "high": temp_high,
-                    "low": temp_low,
+                    "low": float(simulated['temperature_low'][index, i]),
                     "unit": "C"
                 },
                 "precipitation": {
                     "chance": precip_chance,
-                    "amount": precip_amount,
+                    "amount": float(simulated['precipitation_amount'][index, i]),
                     "unit": "mm"
                 },
-                "humidity": round(random.uniform(60, 90), 1),
-                "wind_speed": round(random.uniform(5, 20), 1),
+                "humidity": float(simulated['humidity'][index, i]),
+                "wind_speed": float(simulated['wind_speed'][index, i]),
                 "wind_unit": "km/h",
-                "farming_recommendation": recommendation
-            }
-            
-            forecasts.append(forecast)
-            
-            # Transition to next day's weather (weather tends to persist but can change)
-            # This creates a more realistic sequence than purely random conditions
-            transition_probs = self._get_transition_probabilities(current_condition_idx)
-            current_condition_idx = np.random.choice(
-                range(len(self.conditions)),
-                p=transition_probs
-            )
+                "farming_recommendation": self._generate_farming_recommendation(condition, temp_high, precip_chance)
+            })
         
         return {
             "location": location,
@@ -267,28 +338,6 @@ class WeatherService:
             "forecasts": forecasts
         }
     
-    def _get_transition_probabilities(self, current_idx):
-        """
-        Get probabilities for transitioning from current weather to next day's weather.
-        Weather tends to persist but can change gradually.
-        """
-        # Number of possible conditions
-        n = len(self.conditions)
-        
-        # Start with low probability for all transitions
-        probs = [0.05] * n
-        
-        # Higher probability to stay the same
-        probs[current_idx] = 0.4
-        
-        # Higher probabilities for adjacent conditions (gradual changes)
-        for offset in [-1, 1]:
-            idx = (current_idx + offset) % n
-            probs[idx] = 0.2
-        
-        # Normalize to ensure sum is 1
-        return [p / sum(probs) for p in probs]
-    
     def _generate_farming_recommendation(self, condition, temp_high, precip_chance):
         """Generate farming recommendations based on weather conditions"""
         if condition == WeatherCondition.SUNNY and temp_high > 30:
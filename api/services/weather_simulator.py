@@ -0,0 +1,159 @@
+"""
+Vectorized Markov-chain weather simulator.
+
+Produces simulated forecasts for many weather grid cells and days in one pass.
+The condition transition matrix is built once; each day's next condition is
+drawn for every cell at the same time by searching the cumulative transition
+probabilities of the current conditions. Used by WeatherService for single
+forecasts and directly for bulk forecast seeding and load tests.
+"""
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from api.models import WeatherCondition
+from simulation import keyed_uniform
+
+# Weather conditions common in Ghana and Kenya, in chain order
+CONDITIONS = (
+    WeatherCondition.SUNNY,
+    WeatherCondition.PARTLY_CLOUDY,
+    WeatherCondition.CLOUDY,
+    WeatherCondition.LIGHT_RAIN,
+    WeatherCondition.HEAVY_RAIN,
+    WeatherCondition.THUNDERSTORM
+)
+
+# Temperature (Celsius) and precipitation chance ranges per condition
+TEMPERATURE_RANGES = np.array([(24, 34), (22, 32), (21, 30), (20, 28), (19, 26), (18, 25)], dtype=np.float64)
+PRECIPITATION_RANGES = np.array([(0, 0.1), (0.1, 0.3), (0.2, 0.4), (0.5, 0.7), (0.8, 1.0), (0.9, 1.0)])
+
+# First-day condition probabilities, weighted toward good weather
+INITIAL_PROBABILITIES = np.array([0.3, 0.3, 0.2, 0.1, 0.05, 0.05])
+
+
+def transition_matrix(n=len(CONDITIONS), stay=0.4, adjacent=0.2, other=0.05):
+    """
+    Day-to-day condition transition matrix
+
+    Weather tends to persist (stay), changes gradually to the neighbouring
+    conditions (adjacent) and rarely jumps further (other). Rows sum to 1.
+    """
+    matrix = np.full((n, n), other)
+    index = np.arange(n)
+    matrix[index, (index - 1) % n] = adjacent
+    matrix[index, (index + 1) % n] = adjacent
+    matrix[index, index] = stay
+    return matrix / matrix.sum(axis=1, keepdims=True)
+
+
+TRANSITION_MATRIX = transition_matrix()
+_CUMULATIVE_TRANSITIONS = np.cumsum(TRANSITION_MATRIX, axis=1)
+_CUMULATIVE_INITIAL = np.cumsum(INITIAL_PROBABILITIES)
+
+# Uniform draws per cell and day: condition, two temperatures, dip, precipitation chance/amount, humidity, wind
+_DRAWS = 8
+
+
+class WeatherSimulator:
+    """
+    Simulates (n_cells x n_days) weather forecasts
+
+    Random draws are keyed by (cell, date), so a cell gets the same forecast
+    whether it is simulated alone or as part of a batch.
+    """
+
+    def __init__(self, seed=None):
+        """
+        Initialize the simulator
+
+        Args:
+            seed: Simulation seed, None for the global SIMULATION_SEED
+        """
+        self.seed = seed
+
+    def simulate(self, cell_keys, dates):
+        """
+        Simulate forecasts for every cell on every date
+
+        Args:
+            cell_keys: Weather grid cell keys (n_cells)
+            dates: Consecutive forecast dates (n_days)
+
+        Returns:
+            Dictionary of (n_cells x n_days) arrays: condition (index into CONDITIONS),
+            temperature_high, temperature_low, precipitation_chance,
+            precipitation_amount, humidity and wind_speed
+        """
+        n_cells, n_days = len(cell_keys), len(dates)
+        draws = keyed_uniform('weather', cell_keys, dates, draws=(_DRAWS,), seed=self.seed)
+
+        # Markov chain: one cumulative-probability search per day for all cells
+        conditions = np.empty((n_cells, n_days), dtype=np.int64)
+        if n_days:
+            conditions[:, 0] = np.searchsorted(_CUMULATIVE_INITIAL, draws[:, 0, 0], side='right')
+        for day in range(1, n_days):
+            cumulative = _CUMULATIVE_TRANSITIONS[conditions[:, day - 1]]
+            conditions[:, day] = np.sum(cumulative <= draws[:, day, 0, None], axis=1)
+        np.minimum(conditions, len(CONDITIONS) - 1, out=conditions)
+
+        temp_low, temp_high = TEMPERATURE_RANGES[conditions, 0], TEMPERATURE_RANGES[conditions, 1]
+        temp_span = temp_high - temp_low
+        precip_low, precip_high = PRECIPITATION_RANGES[conditions, 0], PRECIPITATION_RANGES[conditions, 1]
+
+        precipitation_chance = np.round(precip_low + (precip_high - precip_low) * draws[..., 4], 2)
+        precipitation_amount = np.where(
+            precipitation_chance > 0.3,
+            np.round(30 * draws[..., 5] * precipitation_chance, 1),
+            0.0
+        )
+
+        return {
+            'condition': conditions,
+            'temperature_high': np.round(temp_low + temp_span * draws[..., 1], 1),
+            'temperature_low': np.round(temp_low + temp_span * draws[..., 2] - (2 + 2 * draws[..., 3]), 1),
+            'precipitation_chance': precipitation_chance,
+            'precipitation_amount': precipitation_amount,
+            'humidity': np.round(60 + 30 * draws[..., 6], 1),
+            'wind_speed': np.round(5 + 15 * draws[..., 7], 1)
+        }
+
+
+def benchmark(cells=10000, days=7, seed=0):
+    """
+    Time a batched simulation
+
+    Args:
+        cells (int): Number of weather grid cells
+        days (int): Forecast days per cell
+        seed (int): Simulation seed
+
+    Returns:
+        dict: Timing in seconds and location-days per second
+    """
+    cell_keys = [f"wx:{index}:0" for index in range(cells)]
+    dates = [date(2024, 1, 1) + timedelta(days=day) for day in range(days)]
+
+    started = time.perf_counter()
+    WeatherSimulator(seed).simulate(cell_keys, dates)
+    elapsed = time.perf_counter() - started
+
+    return {
+        'cells': cells,
+        'days': days,
+        'seconds': round(elapsed, 4),
+        'location_days_per_second': round(cells * days / elapsed) if elapsed else None
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description='Benchmark the batched weather simulator')
+    parser.add_argument('--cells', type=int, default=10000)
+    parser.add_argument('--days', type=int, default=7)
+    args = parser.parse_args()
+
+    print(json.dumps(benchmark(args.cells, args.days), indent=2))
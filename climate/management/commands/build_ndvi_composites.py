@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand
+from core.models import Farm
+from climate.services.ndvi_composite_service import NDVICompositeService, COMPOSITE_METHODS
+
+
+class Command(BaseCommand):
+    help = 'Build cloud-masked NDVI composites for all farms'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90, help='Number of past days to composite')
+        parser.add_argument('--window', type=int, default=16, help='Composite window length in days')
+        parser.add_argument('--method', choices=COMPOSITE_METHODS, default='max', help='Compositing method')
+        parser.add_argument('--max-cloud', type=float, default=30.0, help='Maximum cloud cover percentage')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per INSERT statement')
+
+    def handle(self, *args, **options):
+        service = NDVICompositeService(
+            window_days=options['window'],
+            method=options['method'],
+            max_cloud_cover=options['max_cloud']
+        )
+        end_date = datetime.now().date()
+
+        summary = service.build_composites(
+            Farm.objects.only('id'),
+            start_date=end_date - timedelta(days=options['days']),
+            end_date=end_date,
+            batch_size=options['batch_size']
+        )
+
+        self.stdout.write(
+            f"Stored {summary['composites']} '{summary['source']}' composites from "
+            f"{summary['observations']} observations ({summary['discarded']} discarded as cloudy)"
+        )
+        self.stdout.write(self.style.SUCCESS('NDVI composites complete'))
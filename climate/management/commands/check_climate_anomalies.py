@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from climate.services.climate_risk_service import ClimateRiskService
+
+
+class Command(BaseCommand):
+    help = 'Store seasonal anomaly alerts for every region with weather data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window', type=int, default=30, help='Days in the recent anomaly window')
+
+    def handle(self, *args, **options):
+        summary = ClimateRiskService().record_seasonal_anomaly_alerts(window_days=options['window'])
+
+        self.stdout.write(
+            f"Checked {summary['regions']} regions, stored {summary['alerts']} seasonal anomaly alerts"
+        )
+        self.stdout.write(self.style.SUCCESS('Climate anomaly check complete'))
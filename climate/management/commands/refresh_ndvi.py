@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from climate.services.ndvi_service import NDVIService
+
+
+class Command(BaseCommand):
+    help = 'Fetch and store the latest NDVI data for all farms'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Number of past days to request')
+        parser.add_argument('--workers', type=int, default=8, help='Maximum number of requests in flight')
+        parser.add_argument('--rate', type=float, default=None, help='Maximum requests per second')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per INSERT statement')
+
+    def handle(self, *args, **options):
+        summary = NDVIService().refresh_all_farms(
+            days=options['days'],
+            max_workers=options['workers'],
+            requests_per_second=options['rate'],
+            batch_size=options['batch_size']
+        )
+
+        self.stdout.write(
+            f"Refreshed {summary['farms_updated']} of {summary['farms']} farms "
+            f"from {summary['cells_with_data']} of {summary['cells']} grid cells "
+            f"({summary['failed_cells']} failed)"
+        )
+        for stage, seconds in summary['timings'].items():
+            self.stdout.write(f"  {stage}: {seconds}s")
+
+        self.stdout.write(self.style.SUCCESS('NDVI refresh complete'))
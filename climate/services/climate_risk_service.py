@@ -1,7 +1,10 @@
 import numpy as np
 from datetime import datetime, timedelta
-from django.db.models import Avg, Max, Min
+from django.db.models import Avg, Count, Max, Min, Sum, F, Q, Window
+from django.db.models.functions import RowNumber
 from ..models import ClimateRisk, WeatherData, NDVIData, LoanClimateAdjustment
+from .ndvi_composite_service import COMPOSITE_SOURCE_PREFIX, SCORING_COMPOSITE_SOURCE
+from .weather_service import WeatherService
 from core.models import Loan, Farm, Region, Crop
 
 class ClimateRiskService:
@@ -9,6 +12,18 @@ class ClimateRiskService:
     Service for assessing climate risks for agricultural loans
     """
     
+    # Seasonal anomaly statuses that raise a regional alert, with the alert's mitigation advice
+    ANOMALY_ALERTS = {
+        'MUCH_WARMER': 'Monitor crops for heat stress, irrigate during the coolest hours',
+        'MUCH_COOLER': 'Delay planting of temperature-sensitive crops',
+        'MUCH_WETTER': 'Clear drainage channels and watch for waterlogging and fungal disease',
+        'MUCH_DRIER': 'Prioritise irrigation and mulching to conserve soil moisture'
+    }
+    
+    # NDVI variability per farm, shared across service instances.
+    # Maps farm_id -> (NDVI data version, window size, variability)
+    _vulnerability_cache = {}
+    
     def __init__(self):
         """
         Initialize the climate risk service
@@ -369,56 +384,235 @@ class ClimateRiskService:
                 }
             }
     
+    def record_seasonal_anomaly_alerts(self, regions=None, window_days=30):
+        """
+        Store alerts for regions with strong seasonal weather anomalies
+        
+        Anomalies of all regions are computed in one call and every region whose
+        recent temperature or precipitation is far from its baseline gets a
+        'SEASONAL_ANOMALY' climate risk, written with one bulk upsert. These risks
+        appear on the climate dashboard with the region's other risks.
+        
+        Args:
+            regions (iterable, optional): Regions to check, all regions with weather data if None
+            window_days (int): Length of the recent anomaly window in days
+            
+        Returns:
+            dict: Number of regions checked and alerts stored
+        """
+        anomalies = WeatherService().calculate_seasonal_anomalies_bulk(regions, window_days=window_days)
+        today = datetime.now().date()
+        
+        alerts = []
+        for region_id, anomaly in anomalies.items():
+            if not anomaly['success']:
+                continue
+            statuses = [
+                status for status in (anomaly['temp_status'], anomaly['precip_status'])
+                if status in self.ANOMALY_ALERTS
+            ]
+            if not statuses:
+                continue
+            alerts.append(ClimateRisk(
+                region_id=region_id,
+                risk_type='SEASONAL_ANOMALY',
+                risk_level='HIGH',
+                assessment_date=today,
+                valid_until=today + timedelta(days=window_days),
+                probability=100,  # The anomaly is observed, not forecast
+                potential_impact=(
+                    f"Last {window_days} days: temperature {anomaly['temp_anomaly'] or 0:+.1f} C and "
+                    f"precipitation {anomaly['precip_anomaly'] or 0:+.1f} mm/day against the regional baseline "
+                    f"({', '.join(status.replace('_', ' ').lower() for status in statuses)})"
+                ),
+                mitigation_measures='; '.join(self.ANOMALY_ALERTS[status] for status in statuses)
+            ))
+        
+        if alerts:
+            ClimateRisk.objects.bulk_create(
+                alerts,
+                update_conflicts=True,
+                unique_fields=['region', 'risk_type', 'assessment_date'],
+                update_fields=['risk_level', 'valid_until', 'probability', 'potential_impact', 'mitigation_measures']
+            )
+        
+        return {'regions': len(anomalies), 'alerts': len(alerts)}
+    
     def assess_farm_vulnerability(self, farm):
         """
         Assess a farm's vulnerability to climate risks
         
+        Uses the same NDVI records and cache as assess_farms_vulnerability, so
+        a farm is assessed identically alone and in a batch.
+        
         Args:
             farm (Farm): Farm to assess
             
         Returns:
             dict: Farm vulnerability assessment
         """
-        try:
-            # Get NDVI data for the farm
-            ndvi_data = NDVIData.objects.filter(farm=farm).order_by('-date')[:12]  # Last 12 records
-            
-            if not ndvi_data:
-                return {
-                    'vulnerability_level': 'UNKNOWN',
-                    'message': 'Insufficient NDVI data for assessment'
-                }
+        return self.assess_farms_vulnerability([farm])[farm.id]
+    
+    def assess_farms_vulnerability(self, farms, records=12):
+        """
+        Assess climate vulnerability for many farms at once
+        
+        The last ``records`` NDVI values of every farm are fetched with a single
+        windowed query (ROW_NUMBER() partitioned by farm) and their standard
+        deviations are computed in one vectorized pass. Results are cached per
+        farm and reused until a newer NDVI record arrives for that farm or its
+        composites are rebuilt.
+        
+        Args:
+            farms (iterable): Farm objects to assess
+            records (int): Number of most recent NDVI records per farm
             
-            # Calculate NDVI variability
-            ndvi_values = [float(data.ndvi_average) for data in ndvi_data]
-            ndvi_variability = np.std(ndvi_values) if len(ndvi_values) > 1 else 0
+        Returns:
+            dict: Farm vulnerability assessments keyed by farm id
+        """
+        farms = list(farms)
+        if not farms:
+            return {}
+        
+        try:
+            farm_ids = [farm.id for farm in farms]
+            
+            # Latest NDVI date per farm decides which cache entries are still valid.
+            # Composites are dated at the start of their window, so their count and
+            # sum are part of the version too: rebuilt composites invalidate the entry.
+            scoring_composite = Q(source=SCORING_COMPOSITE_SOURCE)
+            data_versions = {
+                farm_id: (latest_date, composites, composite_sum)
+                for farm_id, latest_date, composites, composite_sum in (
+                    NDVIData.objects.filter(farm_id__in=farm_ids)
+                    .values('farm_id')
+                    .annotate(
+                        latest_date=Max('date'),
+                        composites=Count('id', filter=scoring_composite),
+                        composite_sum=Sum('ndvi_average', filter=scoring_composite)
+                    )
+                    .values_list('farm_id', 'latest_date', 'composites', 'composite_sum')
+                )
+            }
             
-            # Assess vulnerability based on irrigation and NDVI variability
-            if farm.irrigation:
-                if ndvi_variability < 0.05:
-                    vulnerability = 'LOW'
-                elif ndvi_variability < 0.1:
-                    vulnerability = 'MEDIUM'
+            variability = {}
+            stale_ids = []
+            for farm_id, data_version in data_versions.items():
+                cached = self._vulnerability_cache.get(farm_id)
+                if cached and cached[0] == data_version and cached[1] == records:
+                    variability[farm_id] = cached[2]
                 else:
-                    vulnerability = 'HIGH'
-            else:
-                if ndvi_variability < 0.08:
-                    vulnerability = 'MEDIUM'
-                else:
-                    vulnerability = 'HIGH'
+                    stale_ids.append(farm_id)
+            
+            if stale_ids:
+                computed = self._compute_ndvi_variability(stale_ids, records)
+                for farm_id, value in computed.items():
+                    variability[farm_id] = value
+                    self._vulnerability_cache[farm_id] = (data_versions[farm_id], records, value)
+            
+            results = {}
+            for farm in farms:
+                if farm.id not in variability:
+                    results[farm.id] = {
+                        'vulnerability_level': 'UNKNOWN',
+                        'message': 'Insufficient NDVI data for assessment'
+                    }
+                    continue
+                
+                ndvi_variability = variability[farm.id]
+                results[farm.id] = {
+                    'vulnerability_level': self._classify_vulnerability(farm.irrigation, ndvi_variability),
+                    'ndvi_variability': ndvi_variability,
+                    'has_irrigation': farm.irrigation
+                }
             
-            return {
-                'vulnerability_level': vulnerability,
-                'ndvi_variability': ndvi_variability,
-                'has_irrigation': farm.irrigation
-            }
+            return results
             
         except Exception as e:
             return {
-                'vulnerability_level': 'ERROR',
-                'message': f'Error assessing farm vulnerability: {str(e)}'
+                farm.id: {
+                    'vulnerability_level': 'ERROR',
+                    'message': f'Error assessing farm vulnerability: {str(e)}'
+                } for farm in farms
             }
     
+    def _compute_ndvi_variability(self, farm_ids, records):
+        """
+        Compute NDVI standard deviation over the last records of each farm
+        
+        Farms with stored 16-day maximum-value composites are measured on those,
+        so cloud-contaminated raw points do not inflate their variability. Other
+        farms fall back to their raw NDVI records.
+        
+        Args:
+            farm_ids (list): IDs of the farms to compute
+            records (int): Number of most recent NDVI records per farm
+            
+        Returns:
+            dict: NDVI variability keyed by farm id
+        """
+        composite_ids = set(
+            NDVIData.objects.filter(farm_id__in=farm_ids, source=SCORING_COMPOSITE_SOURCE)
+            .values_list('farm_id', flat=True)
+            .distinct()
+        )
+        raw_ids = [farm_id for farm_id in farm_ids if farm_id not in composite_ids]
+        
+        rows = list(
+            NDVIData.objects.filter(
+                Q(farm_id__in=composite_ids, source=SCORING_COMPOSITE_SOURCE) |
+                (Q(farm_id__in=raw_ids) & ~Q(source__startswith=COMPOSITE_SOURCE_PREFIX))
+            )
+            .annotate(row_number=Window(
+                expression=RowNumber(),
+                partition_by=[F('farm_id')],
+                order_by=F('date').desc()
+            ))
+            .filter(row_number__lte=records)
+            .values_list('farm_id', 'row_number', 'ndvi_average')
+        )
+        
+        if not rows:
+            return {}
+        
+        # Scatter values into a farms x records matrix padded with NaN
+        row_farm_ids = np.array([row[0] for row in rows])
+        positions = np.array([row[1] for row in rows]) - 1
+        values = np.array([float(row[2]) for row in rows])
+        
+        unique_ids, farm_index = np.unique(row_farm_ids, return_inverse=True)
+        matrix = np.full((len(unique_ids), records), np.nan)
+        matrix[farm_index, positions] = values
+        
+        counts = np.sum(~np.isnan(matrix), axis=1)
+        std_devs = np.nanstd(matrix, axis=1)
+        std_devs = np.where(counts > 1, std_devs, 0.0)
+        
+        return {int(farm_id): float(std) for farm_id, std in zip(unique_ids, std_devs)}
+    
+    def _classify_vulnerability(self, has_irrigation, ndvi_variability):
+        """
+        Map NDVI variability to a vulnerability level
+        
+        Args:
+            has_irrigation (bool): Whether the farm is irrigated
+            ndvi_variability (float): Standard deviation of recent NDVI values
+            
+        Returns:
+            str: Vulnerability level
+        """
+        # Assess vulnerability based on irrigation and NDVI variability
+        if has_irrigation:
+            if ndvi_variability < 0.05:
+                return 'LOW'
+            elif ndvi_variability < 0.1:
+                return 'MEDIUM'
+            return 'HIGH'
+        
+        if ndvi_variability < 0.08:
+            return 'MEDIUM'
+        return 'HIGH'
+    
     def calculate_climate_adjusted_loan_terms(self, loan):
         """
         Calculate climate-adjusted loan terms based on risk assessment
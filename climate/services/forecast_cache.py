@@ -0,0 +1,137 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.cache import caches
+from django.db import close_old_connections
+from django.utils import timezone
+
+
+class RegionForecastCache:
+    """
+    Two-level cache of display-ready region forecasts with stale-while-revalidate
+
+    Entries live in an in-process dict in front of the shared 'forecasts' cache
+    (file-based, see settings.CACHES), so every worker sees a refresh done by
+    any other. An entry is fresh while it belongs to today's forecast date and
+    is younger than the TTL. Stale entries are served immediately while a
+    background refresh replaces them; concurrent refreshes for the same region
+    are coalesced onto a single fetch.
+    """
+
+    def __init__(self, ttl_seconds=3 * 60 * 60, cache_alias='forecasts', max_workers=2):
+        """
+        Initialize the forecast cache
+
+        Args:
+            ttl_seconds (int): Age after which a same-day entry is considered stale
+            cache_alias (str): Django cache alias used as the shared level
+            max_workers (int): Threads available for background refreshes
+        """
+        self.ttl_seconds = ttl_seconds
+        self.cache_alias = cache_alias
+        self._local = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='forecast-refresh')
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias]
+
+    def get(self, region, days, loader):
+        """
+        Get a region forecast, refreshing it with the loader when needed
+
+        Args:
+            region (Region): Region object
+            days (int): Number of forecast days
+            loader (callable): Called as loader(region, days), returns the forecast list
+
+        Returns:
+            list: Forecast data ready for display
+        """
+        key = self._key(region.id, days)
+        entry = self._local.get(key)
+        if entry is None:
+            entry = self.shared.get(key)
+            if entry is not None:
+                self._local[key] = entry
+
+        if entry is None:
+            # Nothing to serve yet, wait for the (possibly shared) refresh
+            return self._refresh(key, region, days, loader).result()
+
+        if not self._is_fresh(entry):
+            self._refresh(key, region, days, loader)
+
+        return entry['data']
+
+    def invalidate(self, region, days):
+        key = self._key(region.id, days)
+        self._local.pop(key, None)
+        self.shared.delete(key)
+
+    def _refresh(self, key, region, days, loader):
+        """
+        Start a refresh for a key unless one is already running
+
+        Returns:
+            Future: Resolves to the refreshed forecast list
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._executor.submit(self._load, key, region, days, loader)
+                self._inflight[key] = future
+            return future
+
+    def _load(self, key, region, days, loader):
+        lock_key = f"{key}:refreshing"
+        try:
+            # Another process is already refreshing: keep serving what we have
+            acquired = self.shared.add(lock_key, True, timeout=60)
+            if not acquired:
+                entry = self.shared.get(key)
+                if entry is not None:
+                    self._local[key] = entry
+                    return entry['data']
+                entry = self._local.get(key)
+                if entry is not None:
+                    return entry['data']
+
+            try:
+                data = loader(region, days)
+            finally:
+                if acquired:
+                    self.shared.delete(lock_key)
+
+            # Never replace a usable entry with an empty result
+            if data:
+                entry = {
+                    'forecast_date': timezone.now().date().isoformat(),
+                    'fetched_at': time.time(),
+                    'data': data
+                }
+                self._local[key] = entry
+                self.shared.set(key, entry, timeout=None)
+                return data
+
+            entry = self._local.get(key)
+            return entry['data'] if entry else data
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            close_old_connections()
+
+    def _is_fresh(self, entry):
+        return (
+            entry['forecast_date'] == timezone.now().date().isoformat()
+            and time.time() - entry['fetched_at'] < self.ttl_seconds
+        )
+
+    def _key(self, region_id, days):
+        return f"climate:forecast:{region_id}:{days}"
+
+
+# Shared by every WeatherService instance in the process
+forecast_cache = RegionForecastCache()
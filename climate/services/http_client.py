@@ -0,0 +1,65 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def build_session(pool_size=10, retries=3, backoff_factor=0.5):
+    """
+    Build a pooled HTTP session with retry and exponential backoff
+
+    Args:
+        pool_size (int): Maximum number of keep-alive connections per host
+        retries (int): Number of retries for failed requests
+        backoff_factor (float): Base delay in seconds for exponential backoff
+
+    Returns:
+        requests.Session: Configured session
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=['GET'],
+        respect_retry_after_header=True
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter spacing calls evenly to a maximum rate
+    """
+
+    def __init__(self, requests_per_second=None):
+        """
+        Initialize the rate limiter
+
+        Args:
+            requests_per_second (float, optional): Maximum call rate. None disables limiting.
+        """
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """
+        Block until the next call slot is available
+        """
+        if not self.interval:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
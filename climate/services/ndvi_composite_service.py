@@ -0,0 +1,193 @@
+import numpy as np
+from datetime import date, datetime, timedelta
+from django.db import transaction
+from ..models import NDVIData
+
+# Composite windows are counted from this date so every run produces the same periods
+COMPOSITE_ANCHOR = date(2000, 1, 1)
+
+# Stored composites use sources starting with this prefix
+COMPOSITE_SOURCE_PREFIX = 'Composite'
+
+COMPOSITE_METHODS = ('max', 'weighted')
+
+
+def composite_source(method, window_days):
+    """
+    Source name under which composites of a method and window are stored
+    """
+    label = 'MVC' if method == 'max' else 'QW'
+    return f"{COMPOSITE_SOURCE_PREFIX} {label} {window_days}d"
+
+
+# Composite read by risk scoring when a farm has one
+SCORING_COMPOSITE_SOURCE = composite_source('max', 16)
+
+
+class NDVICompositeService:
+    """
+    Service for building cloud-masked NDVI composites per farm
+
+    Raw NDVI observations are grouped into fixed 8 or 16 day windows.
+    Observations whose imagery is too cloudy are discarded, and each window is
+    reduced to one value: the maximum NDVI (maximum-value compositing, which
+    also suppresses residual cloud and haze) or the mean weighted by clear-sky
+    fraction. Composites are stored as NDVIData so downstream scoring reads one
+    clean value per window.
+
+    Cloud cover is read from the observation's SatelliteImagery. NASA POWER
+    ingestion fills it with the day's cloud amount over the farm's grid cell,
+    not a per-pixel cloud mask. Observations without imagery, such as raster
+    tile ingests, have unknown cloud cover and are kept with
+    unknown_cloud_weight.
+    """
+
+    def __init__(self, window_days=16, method='max', max_cloud_cover=30.0, unknown_cloud_weight=0.5):
+        """
+        Initialize the composite service
+
+        Args:
+            window_days (int): Composite window length, typically 8 or 16
+            method (str): 'max' for maximum-value or 'weighted' for quality-weighted composites
+            max_cloud_cover (float): Cloud cover percentage above which observations are discarded
+            unknown_cloud_weight (float): Quality weight of observations without cloud information
+        """
+        if method not in COMPOSITE_METHODS:
+            raise ValueError(f"Unknown composite method: {method}")
+
+        self.window_days = window_days
+        self.method = method
+        self.max_cloud_cover = max_cloud_cover
+        self.unknown_cloud_weight = unknown_cloud_weight
+
+    @property
+    def source(self):
+        return composite_source(self.method, self.window_days)
+
+    def window_start(self, day):
+        """
+        First day of the composite window containing a date
+        """
+        offset = (day - COMPOSITE_ANCHOR).days // self.window_days
+        return COMPOSITE_ANCHOR + timedelta(days=offset * self.window_days)
+
+    def build_composites(self, farms, start_date=None, end_date=None, batch_size=500):
+        """
+        Build and store composites for every farm and window in a date range
+
+        Args:
+            farms (iterable): Farm objects
+            start_date (date, optional): Start of the range, defaults to 90 days ago
+            end_date (date, optional): End of the range, defaults to today
+            batch_size (int): Rows per INSERT statement
+
+        Returns:
+            dict: Summary with observation, discarded and composite counts
+        """
+        farm_ids = [farm.id for farm in farms]
+        end_date = end_date or datetime.now().date()
+        start_date = self.window_start(start_date or end_date - timedelta(days=90))
+
+        rows = list(
+            NDVIData.objects.filter(
+                farm_id__in=farm_ids,
+                date__gte=start_date,
+                date__lte=end_date
+            ).exclude(
+                source__startswith=COMPOSITE_SOURCE_PREFIX
+            ).values_list('farm_id', 'date', 'ndvi_average', 'imagery__cloud_cover_percentage')
+        )
+
+        composites = self.composite(rows, start_date)
+
+        records = [
+            NDVIData(
+                farm_id=farm_id,
+                date=window_date,
+                source=self.source,
+                ndvi_average=round(values['ndvi'], 3),
+                ndvi_min=round(values['min'], 3),
+                ndvi_max=round(values['max'], 3)
+            ) for (farm_id, window_date), values in composites['windows'].items()
+        ]
+
+        if records:
+            with transaction.atomic():
+                NDVIData.objects.bulk_create(
+                    records,
+                    batch_size=batch_size,
+                    update_conflicts=True,
+                    unique_fields=['farm', 'date', 'source'],
+                    update_fields=['ndvi_average', 'ndvi_min', 'ndvi_max']
+                )
+
+        return {
+            'source': self.source,
+            'observations': composites['observations'],
+            'discarded': composites['discarded'],
+            'composites': len(records)
+        }
+
+    def composite(self, rows, start_date):
+        """
+        Reduce raw observations to one value per farm and window
+
+        All farms are processed together: observations are scattered into a flat
+        (farm, window) index and reduced with ufunc.at and bincount.
+
+        Args:
+            rows (list): Tuples of (farm_id, date, ndvi, cloud_cover_percentage or None)
+            start_date (date): Start of the first window
+
+        Returns:
+            dict: 'windows' maps (farm_id, window start date) to ndvi/min/max, plus counts
+        """
+        if not rows:
+            return {'windows': {}, 'observations': 0, 'discarded': 0}
+
+        farm_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        days = np.array([(row[1] - start_date).days for row in rows], dtype=np.int64)
+        ndvi = np.array([float(row[2]) for row in rows], dtype=np.float64)
+        cloud = np.array([np.nan if row[3] is None else float(row[3]) for row in rows], dtype=np.float64)
+
+        # Cloud masking: drop contaminated observations and invalid NDVI
+        clear = ~(cloud > self.max_cloud_cover) & (ndvi >= -1.0) & (ndvi <= 1.0)
+        weights = np.where(np.isnan(cloud), self.unknown_cloud_weight, 1.0 - cloud / 100.0)
+        clear &= weights > 0
+
+        unique_ids, farm_index = np.unique(farm_ids, return_inverse=True)
+        window_index = days // self.window_days
+        n_windows = int(window_index.max()) + 1
+        cells = farm_index * n_windows + window_index
+
+        cells, ndvi, weights = cells[clear], ndvi[clear], weights[clear]
+        size = len(unique_ids) * n_windows
+
+        counts = np.bincount(cells, minlength=size)
+        minimums = np.full(size, np.inf)
+        maximums = np.full(size, -np.inf)
+        np.minimum.at(minimums, cells, ndvi)
+        np.maximum.at(maximums, cells, ndvi)
+
+        if self.method == 'max':
+            values = maximums
+        else:
+            weight_sums = np.bincount(cells, weights=weights, minlength=size)
+            weighted = np.bincount(cells, weights=weights * ndvi, minlength=size)
+            values = np.divide(weighted, weight_sums, out=np.full(size, np.nan), where=weight_sums > 0)
+
+        windows = {}
+        for cell in np.flatnonzero(counts):
+            farm_id = int(unique_ids[cell // n_windows])
+            window_date = start_date + timedelta(days=int(cell % n_windows) * self.window_days)
+            windows[(farm_id, window_date)] = {
+                'ndvi': float(values[cell]),
+                'min': float(minimums[cell]),
+                'max': float(maximums[cell])
+            }
+
+        return {
+            'windows': windows,
+            'observations': len(rows),
+            'discarded': int(len(rows) - clear.sum())
+        }
@@ -0,0 +1,393 @@
+import json
+import math
+import os
+import threading
+import numpy as np
+from collections import OrderedDict
+from datetime import datetime
+from django.contrib.gis.geos import Polygon
+from core.models import Farm
+from ..models import NDVIData
+
+try:
+    import rasterio
+except ImportError:  # GeoTIFF support is optional, NumPy tiles always work
+    rasterio = None
+
+
+class NDVITile:
+    """
+    A georeferenced single-band NDVI raster in geographic coordinates (EPSG:4326)
+    """
+
+    def __init__(self, data, transform, date, nodata=None, scale=1.0, source='NDVI Raster', name=None):
+        """
+        Initialize the tile
+
+        Args:
+            data (numpy.ndarray): 2D NDVI array, possibly memory-mapped
+            transform (tuple): (x_origin, pixel_width, y_origin, pixel_height) of the top-left corner
+            date (date): Acquisition date of the tile
+            nodata (float, optional): Raw value marking missing pixels
+            scale (float): Factor converting raw values to NDVI (e.g. 0.0001 for MODIS)
+            source (str): Source name written to NDVIData
+            name (str, optional): Tile name for reporting
+        """
+        self.data = data
+        self.transform = tuple(float(value) for value in transform)
+        self.date = date
+        self.nodata = nodata
+        self.scale = scale
+        self.source = source
+        self.name = name
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def bounds(self):
+        """
+        Tile extent as (xmin, ymin, xmax, ymax)
+        """
+        x0, dx, y0, dy = self.transform
+        rows, cols = self.shape
+        x1 = x0 + cols * dx
+        y1 = y0 + rows * dy
+        return (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+
+    @property
+    def grid_key(self):
+        """
+        Identifies the pixel grid, tiles sharing a grid can reuse farm masks
+        """
+        return (self.shape, self.transform)
+
+
+class NDVIRasterService:
+    """
+    Service for ingesting NDVI raster tiles and computing per-farm zonal statistics
+
+    Tiles are read with memory-mapped I/O where possible. Each farm polygon is
+    rasterized once per pixel grid into a list of pixel indices; all farms in a
+    tile are then reduced in a single vectorized pass and written as NDVIData
+    in bulk.
+    """
+
+    def __init__(self, source='NDVI Raster', max_masks=32):
+        """
+        Initialize the raster service
+
+        Args:
+            source (str): Default source name for tiles without metadata
+            max_masks (int): Rasterized mask sets kept, least recently used are dropped
+        """
+        self.source = source
+        self.max_masks = max_masks
+        self._mask_cache = OrderedDict()
+        self._mask_lock = threading.Lock()
+
+    def load_tile(self, path):
+        """
+        Load an NDVI tile from disk
+
+        NumPy tiles (.npy) are memory-mapped and need a JSON sidecar
+        (same name, .json extension) with 'date' and 'transform' keys and
+        optional 'nodata', 'scale' and 'source'. GeoTIFF tiles (.tif, .tiff)
+        require rasterio and take the date from the sidecar or a 'date' tag.
+
+        Args:
+            path (str): Path to the tile
+
+        Returns:
+            NDVITile: The loaded tile
+        """
+        extension = os.path.splitext(path)[1].lower()
+        name = os.path.basename(path)
+
+        if extension == '.npy':
+            metadata = self._read_sidecar(path)
+            if metadata is None:
+                raise ValueError(f"Missing metadata sidecar for NDVI tile {name}")
+
+            return NDVITile(
+                data=np.load(path, mmap_mode='r'),
+                transform=metadata['transform'],
+                date=self._parse_date(metadata['date']),
+                nodata=metadata.get('nodata'),
+                scale=metadata.get('scale', 1.0),
+                source=metadata.get('source', self.source),
+                name=name
+            )
+
+        if extension in ('.tif', '.tiff'):
+            if rasterio is None:
+                raise ImportError("rasterio is required to read GeoTIFF NDVI tiles")
+
+            metadata = self._read_sidecar(path) or {}
+            with rasterio.open(path) as dataset:
+                data = dataset.read(1)
+                affine = dataset.transform
+                nodata = dataset.nodata
+                tags = dataset.tags()
+                scale = dataset.scales[0] if dataset.scales else 1.0
+
+            date_value = metadata.get('date') or tags.get('date')
+            if not date_value:
+                raise ValueError(f"No acquisition date for NDVI tile {name}")
+
+            return NDVITile(
+                data=data,
+                transform=(affine.c, affine.a, affine.f, affine.e),
+                date=self._parse_date(date_value),
+                nodata=metadata.get('nodata', nodata),
+                scale=metadata.get('scale', scale),
+                source=metadata.get('source', self.source),
+                name=name
+            )
+
+        raise ValueError(f"Unsupported NDVI tile format: {name}")
+
+    def build_farm_masks(self, tile, farms):
+        """
+        Rasterize farm polygons onto the tile grid
+
+        Masks are cached per pixel grid and farm geometry, so later tiles on the
+        same grid (e.g. the next acquisition date) reuse them. The cache keeps
+        the max_masks most recently used mask sets.
+
+        Args:
+            tile (NDVITile): Tile defining the pixel grid
+            farms (list): Farm objects with polygon locations
+
+        Returns:
+            tuple: (farm ids array, flat pixel indices, farm position of each pixel)
+        """
+        key = (tile.grid_key, tuple((farm.id, hash(bytes(farm.location.wkb))) for farm in farms))
+        with self._mask_lock:
+            cached = self._mask_cache.get(key)
+            if cached is not None:
+                self._mask_cache.move_to_end(key)
+                return cached
+
+        rows, cols = tile.shape
+        pixel_chunks = []
+        farm_chunks = []
+
+        for position, farm in enumerate(farms):
+            pixel_rows, pixel_cols = self._rasterize_polygon(farm.location, tile)
+            if len(pixel_rows) == 0:
+                continue
+            pixel_chunks.append(pixel_rows * cols + pixel_cols)
+            farm_chunks.append(np.full(len(pixel_rows), position, dtype=np.int64))
+
+        farm_ids = np.array([farm.id for farm in farms], dtype=np.int64)
+        if pixel_chunks:
+            pixel_index = np.concatenate(pixel_chunks)
+            farm_index = np.concatenate(farm_chunks)
+        else:
+            pixel_index = np.empty(0, dtype=np.int64)
+            farm_index = np.empty(0, dtype=np.int64)
+
+        masks = (farm_ids, pixel_index, farm_index)
+        with self._mask_lock:
+            self._mask_cache[key] = masks
+            while len(self._mask_cache) > self.max_masks:
+                self._mask_cache.popitem(last=False)
+        return masks
+
+    def calculate_zonal_statistics(self, tile, farms):
+        """
+        Compute NDVI mean, min and max for every farm in one vectorized pass
+
+        Args:
+            tile (NDVITile): NDVI tile
+            farms (list): Farm objects with polygon locations
+
+        Returns:
+            dict: Statistics keyed by farm id ('average', 'min', 'max', 'pixel_count')
+        """
+        farm_ids, pixel_index, farm_index = self.build_farm_masks(tile, farms)
+        if len(pixel_index) == 0:
+            return {}
+
+        # Fancy indexing on a memory-mapped tile only touches the pages under farms
+        values = tile.data.reshape(-1)[pixel_index].astype(np.float64)
+
+        valid = np.isfinite(values)
+        if tile.nodata is not None:
+            valid &= values != tile.nodata
+        values = values * tile.scale
+        valid &= (values >= -1.0) & (values <= 1.0)
+
+        values = values[valid]
+        positions = farm_index[valid]
+        farm_count = len(farm_ids)
+
+        counts = np.bincount(positions, minlength=farm_count)
+        sums = np.bincount(positions, weights=values, minlength=farm_count)
+        minimums = np.full(farm_count, np.inf)
+        maximums = np.full(farm_count, -np.inf)
+        np.minimum.at(minimums, positions, values)
+        np.maximum.at(maximums, positions, values)
+
+        statistics = {}
+        for position in np.flatnonzero(counts):
+            statistics[int(farm_ids[position])] = {
+                'average': float(sums[position] / counts[position]),
+                'min': float(minimums[position]),
+                'max': float(maximums[position]),
+                'pixel_count': int(counts[position])
+            }
+
+        return statistics
+
+    def ingest_tile(self, tile, farms=None, batch_size=500):
+        """
+        Compute zonal statistics for a tile and store them as NDVIData
+
+        Args:
+            tile (NDVITile or str): Tile or path to a tile
+            farms (iterable, optional): Farms to process, defaults to farms overlapping the tile
+            batch_size (int): Rows per INSERT statement
+
+        Returns:
+            dict: Ingestion summary
+        """
+        if isinstance(tile, str):
+            tile = self.load_tile(tile)
+
+        if farms is None:
+            farms = Farm.objects.filter(
+                location__bboverlaps=Polygon.from_bbox(tile.bounds)
+            ).only('id', 'location').order_by('id')
+        farms = [farm for farm in farms if farm.location]
+
+        statistics = self.calculate_zonal_statistics(tile, farms)
+
+        records = [
+            NDVIData(
+                farm_id=farm_id,
+                date=tile.date,
+                source=tile.source,
+                ndvi_average=round(stats['average'], 3),
+                ndvi_min=round(stats['min'], 3),
+                ndvi_max=round(stats['max'], 3)
+            ) for farm_id, stats in statistics.items()
+        ]
+
+        if records:
+            NDVIData.objects.bulk_create(
+                records,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['farm', 'date', 'source'],
+                update_fields=['ndvi_average', 'ndvi_min', 'ndvi_max']
+            )
+
+        return {
+            'tile': tile.name,
+            'date': tile.date,
+            'farms': len(farms),
+            'farms_with_data': len(records)
+        }
+
+    def ingest_directory(self, directory, batch_size=500):
+        """
+        Ingest every NDVI tile in a directory
+
+        Args:
+            directory (str): Directory containing .npy/.tif tiles
+            batch_size (int): Rows per INSERT statement
+
+        Returns:
+            list: Ingestion summary per tile
+        """
+        summaries = []
+        for filename in sorted(os.listdir(directory)):
+            if os.path.splitext(filename)[1].lower() not in ('.npy', '.tif', '.tiff'):
+                continue
+            summaries.append(self.ingest_tile(os.path.join(directory, filename), batch_size=batch_size))
+        return summaries
+
+    def _rasterize_polygon(self, polygon, tile):
+        """
+        Find the pixels whose centres fall inside a polygon
+
+        Farms smaller than a pixel get the pixel containing their centroid.
+
+        Args:
+            polygon (Polygon): Farm polygon in tile coordinates
+            tile (NDVITile): Tile defining the pixel grid
+
+        Returns:
+            tuple: (row indices, column indices) arrays
+        """
+        x0, dx, y0, dy = tile.transform
+        rows, cols = tile.shape
+        xmin, ymin, xmax, ymax = polygon.extent
+
+        col_range = self._pixel_range(xmin, xmax, x0, dx, cols)
+        row_range = self._pixel_range(ymin, ymax, y0, dy, rows)
+
+        if col_range and row_range:
+            grid_rows, grid_cols = np.meshgrid(
+                np.arange(row_range[0], row_range[1] + 1),
+                np.arange(col_range[0], col_range[1] + 1),
+                indexing='ij'
+            )
+            grid_rows = grid_rows.ravel()
+            grid_cols = grid_cols.ravel()
+            xs = x0 + (grid_cols + 0.5) * dx
+            ys = y0 + (grid_rows + 0.5) * dy
+
+            inside = self._points_in_ring(xs, ys, polygon[0].coords)
+            for hole in polygon[1:]:
+                inside &= ~self._points_in_ring(xs, ys, hole.coords)
+
+            if inside.any():
+                return grid_rows[inside], grid_cols[inside]
+
+        centroid = polygon.centroid
+        col = int(math.floor((centroid.x - x0) / dx))
+        row = int(math.floor((centroid.y - y0) / dy))
+        if 0 <= row < rows and 0 <= col < cols:
+            return np.array([row]), np.array([col])
+
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    def _pixel_range(self, low, high, origin, size, count):
+        """
+        Inclusive range of pixel indices whose centres lie within [low, high]
+        """
+        a = (low - origin) / size - 0.5
+        b = (high - origin) / size - 0.5
+        start = max(0, math.ceil(min(a, b)))
+        stop = min(count - 1, math.floor(max(a, b)))
+        return (start, stop) if start <= stop else None
+
+    def _points_in_ring(self, xs, ys, ring_coords):
+        """
+        Even-odd ray casting test of many points against one closed ring
+        """
+        ring = np.asarray(ring_coords, dtype=np.float64)
+        inside = np.zeros(xs.shape, dtype=bool)
+
+        for (ax, ay), (bx, by) in zip(ring[:-1], ring[1:]):
+            if ay == by:
+                continue
+            crosses = (ay > ys) != (by > ys)
+            x_intersect = ax + (ys - ay) * (bx - ax) / (by - ay)
+            inside ^= crosses & (xs < x_intersect)
+
+        return inside
+
+    def _read_sidecar(self, path):
+        sidecar = os.path.splitext(path)[0] + '.json'
+        if not os.path.exists(sidecar):
+            return None
+        with open(sidecar, 'r') as f:
+            return json.load(f)
+
+    def _parse_date(self, value):
+        return datetime.strptime(value, '%Y-%m-%d').date()
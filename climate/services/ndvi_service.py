@@ -1,10 +1,32 @@
 import os
+import time
 import requests
 import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from ..models import SatelliteImagery, NDVIData
+from .http_client import build_session, RateLimiter
+from .spatial_grid import NDVI_GRID, farm_centroid
+from .ndvi_trend_engine import NDVITrendEngine
+from .ndvi_composite_service import COMPOSITE_SOURCE_PREFIX
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, F, Window
+from django.db.models.functions import ExtractMonth, RowNumber
+from core.models import Farm
+
+# MODIS NDVI pixel size in metres
+MODIS_RESOLUTION = 250
+
+# NASA POWER marks missing values with this fill value
+POWER_FILL_VALUE = -999
+
+# NASA POWER daily parameters requested per point: NDVI and cloud amount (%)
+POWER_PARAMETERS = "NDVI,CLOUD_AMT"
+
+# Seconds a computed monthly NDVI climatology is reused
+CLIMATOLOGY_MAX_AGE = 24 * 3600
 
 class NDVIService:
     """
@@ -12,6 +34,10 @@ class NDVIService:
     from NASA MODIS satellite imagery.
     """
     
+    # Long-run monthly NDVI climatology, shared across service instances.
+    # Holds (computed at, 12 monthly means) once computed
+    _climatology_cache = None
+    
     def __init__(self):
         """
         Initialize the NDVI service with API credentials
@@ -49,7 +75,7 @@ class NDVIService:
             "latitude": latitude,
             "longitude": longitude,
             "community": "AG",
-            "parameters": "NDVI",
+            "parameters": POWER_PARAMETERS,
             "format": "JSON",
             "user": "agrifinance"
         }
@@ -164,10 +190,8 @@ class NDVIService:
                     'message': 'Farm location not defined'
                 }
                 
-            # Extract centroid as approximate farm location
-            centroid = farm.location.centroid
-            latitude = centroid.y
-            longitude = centroid.x
+            # Request the centre of the farm's MODIS cell so neighbouring farms share a response
+            latitude, longitude = NDVI_GRID.snap(*farm_centroid(farm))
             
             # Fetch NDVI data for last 30 days
             end_date = datetime.now()
@@ -208,6 +232,7 @@ class NDVIService:
                 defaults={
                     'resolution': 250,  # MODIS NDVI resolution in meters
                     'url': 'https://power.larc.nasa.gov/',  # Base URL of data source
+                    'cloud_cover_percentage': self._cloud_cover(ndvi_data, latest_date.strftime("%Y%m%d")),
                 }
             )
             
@@ -239,6 +264,230 @@ class NDVIService:
                 'message': f'Error: {str(e)}'
             }
     
+    def refresh_all_farms(self, farms=None, days=30, max_workers=8, requests_per_second=None,
+                          retries=3, timeout=30, batch_size=500):
+        """
+        Fetch and store the latest NDVI data for many farms at once
+        
+        Farms whose centroids fall in the same MODIS grid cell share one request.
+        Cells are fetched concurrently over a pooled session with optional rate
+        limiting, and the results are upserted as SatelliteImagery and NDVIData
+        in bulk.
+        
+        Args:
+            farms (iterable, optional): Farms to refresh, defaults to all farms with a location
+            days (int): Number of past days to request per cell
+            max_workers (int): Maximum number of requests in flight
+            requests_per_second (float, optional): Maximum request rate
+            retries (int): Number of retries per request
+            timeout (float): Request timeout in seconds
+            batch_size (int): Rows per INSERT statement
+            
+        Returns:
+            dict: Refresh summary with per-stage timings in seconds
+        """
+        timings = {}
+        
+        started = time.perf_counter()
+        if farms is None:
+            farms = Farm.objects.exclude(location=None).select_related('farmer').only(
+                'id', 'location', 'farmer__region'
+            )
+        
+        cells = NDVI_GRID.group(farms, farm_centroid)
+        timings['load'] = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days)
+        limiter = RateLimiter(requests_per_second)
+        responses = {}
+        failed_cells = 0
+        
+        def fetch_cell(session, cell):
+            latitude, longitude = NDVI_GRID.center(cell)
+            params = {
+                "start": start_date.strftime("%Y%m%d"),
+                "end": end_date.strftime("%Y%m%d"),
+                "latitude": round(latitude, 5),
+                "longitude": round(longitude, 5),
+                "community": "AG",
+                "parameters": POWER_PARAMETERS,
+                "format": "JSON",
+                "user": "agrifinance"
+            }
+            if self.api_key:
+                params["api_key"] = self.api_key
+            limiter.wait()
+            response = session.get(self.base_url, params=params, timeout=timeout)
+            response.raise_for_status()
+            return response.json()
+        
+        if cells:
+            with build_session(pool_size=max_workers, retries=retries) as session:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = {executor.submit(fetch_cell, session, cell): cell for cell in cells}
+                    
+                    for future in as_completed(futures):
+                        cell = futures[future]
+                        try:
+                            responses[cell] = future.result()
+                        except (requests.RequestException, ValueError) as e:
+                            print(f"Error fetching NDVI data for cell {cell}: {e}")
+                            failed_cells += 1
+        timings['fetch'] = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        cell_results = {}
+        for cell, data in responses.items():
+            parsed = self._parse_ndvi_series(data)
+            if parsed is not None:
+                cell_results[cell] = parsed
+        timings['process'] = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        stored = self._bulk_store_cell_results(cells, cell_results, batch_size)
+        timings['store'] = time.perf_counter() - started
+        
+        return {
+            'farms': sum(len(cell_farms) for cell_farms in cells.values()),
+            'cells': len(cells),
+            'failed_cells': failed_cells,
+            'cells_with_data': len(cell_results),
+            'farms_updated': stored,
+            'timings': {stage: round(seconds, 3) for stage, seconds in timings.items()}
+        }
+    
+    def _parse_ndvi_series(self, data):
+        """
+        Extract the latest NDVI value and period statistics from a NASA POWER response
+        
+        Args:
+            data (dict): Raw API response data
+            
+        Returns:
+            dict: Latest date and value with min/max and the day's cloud cover,
+                or None without valid data
+        """
+        try:
+            ndvi_values = data['properties']['parameter']['NDVI']
+        except (KeyError, TypeError):
+            return None
+        
+        if not ndvi_values:
+            return None
+        
+        # Dates are YYYYMMDD strings, so lexical order is chronological
+        dates = sorted(ndvi_values)
+        values = np.array([ndvi_values[d] for d in dates], dtype=np.float64)
+        valid = np.isfinite(values) & (values != POWER_FILL_VALUE)
+        
+        if not valid.any():
+            return None
+        
+        latest = np.flatnonzero(valid)[-1]
+        values = values[valid]
+        
+        return {
+            'date': datetime.strptime(dates[latest], "%Y%m%d").date(),
+            'ndvi': float(values[-1]),
+            'min': float(values.min()),
+            'max': float(values.max()),
+            'cloud_cover': self._cloud_cover(data, dates[latest])
+        }
+    
+    def _cloud_cover(self, data, date_key):
+        """
+        Cloud amount of one day from a NASA POWER response
+        
+        Args:
+            data (dict): Raw API response data
+            date_key (str): Date as YYYYMMDD
+            
+        Returns:
+            float: Cloud cover percentage, or None if not reported
+        """
+        try:
+            value = data['properties']['parameter']['CLOUD_AMT'][date_key]
+        except (KeyError, TypeError):
+            return None
+        
+        if value is None or not np.isfinite(value) or value == POWER_FILL_VALUE:
+            return None
+        return round(float(value), 2)
+    
+    def _bulk_store_cell_results(self, cells, cell_results, batch_size=500):
+        """
+        Upsert imagery and NDVI records for every farm in the fetched cells
+        
+        Returns:
+            int: Number of farms whose NDVI data was stored
+        """
+        # Cloud cover of a region's imagery is the mean over its cells reporting one
+        imagery_clouds = {}
+        for cell, result in cell_results.items():
+            for farm in cells[cell]:
+                clouds = imagery_clouds.setdefault((farm.farmer.region_id, result['date']), {})
+                if result['cloud_cover'] is not None:
+                    clouds[cell] = result['cloud_cover']
+        
+        if not imagery_clouds:
+            return 0
+        
+        with transaction.atomic():
+            SatelliteImagery.objects.bulk_create(
+                [
+                    SatelliteImagery(
+                        region_id=region_id,
+                        date=date,
+                        satellite='MODIS',
+                        imagery_type='NDVI',
+                        resolution=MODIS_RESOLUTION,
+                        url='https://power.larc.nasa.gov/',
+                        cloud_cover_percentage=(
+                            round(sum(clouds.values()) / len(clouds), 2) if clouds else None
+                        )
+                    ) for (region_id, date), clouds in imagery_clouds.items()
+                ],
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['region', 'date', 'satellite', 'imagery_type'],
+                update_fields=['resolution', 'url', 'cloud_cover_percentage']
+            )
+            
+            imagery_ids = {
+                (region_id, date): imagery_id
+                for imagery_id, region_id, date in SatelliteImagery.objects.filter(
+                    satellite='MODIS',
+                    imagery_type='NDVI',
+                    region_id__in={key[0] for key in imagery_clouds},
+                    date__in={key[1] for key in imagery_clouds}
+                ).values_list('id', 'region_id', 'date')
+            }
+            
+            records = []
+            for cell, result in cell_results.items():
+                for farm in cells[cell]:
+                    records.append(NDVIData(
+                        farm_id=farm.id,
+                        date=result['date'],
+                        source='NASA POWER',
+                        ndvi_average=result['ndvi'],
+                        ndvi_min=result['min'],
+                        ndvi_max=result['max'],
+                        imagery_id=imagery_ids.get((farm.farmer.region_id, result['date']))
+                    ))
+            
+            NDVIData.objects.bulk_create(
+                records,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['farm', 'date', 'source'],
+                update_fields=['ndvi_average', 'ndvi_min', 'ndvi_max', 'imagery']
+            )
+        
+        return len(records)
+    
     def get_historical_ndvi_trend(self, farm, months=12):
         """
         Get historical NDVI trend data for a farm
@@ -250,51 +499,109 @@ class NDVIService:
         Returns:
             dict: Historical NDVI trend data
         """
+        return self.get_historical_ndvi_trends([farm], months=months)[farm.id]
+    
+    def get_historical_ndvi_trends(self, farms, months=12, records=None):
+        """
+        Get historical NDVI trend data for many farms in one pass
+        
+        All series are loaded with a single query and analysed together by the
+        batched trend engine: OLS slope, trend seasonally adjusted against the
+        long-run monthly NDVI climatology, and residual anomaly flags.
+        
+        Args:
+            farms (iterable): Farm objects
+            months (int): Number of months of historical data to include
+            records (int, optional): Keep only the most recent records per farm instead
+            
+        Returns:
+            dict: Historical NDVI trend data keyed by farm id
+        """
+        farms = list(farms)
+        farm_ids = [farm.id for farm in farms]
+        
         try:
-            # Get NDVI data for the specified period
-            start_date = datetime.now() - timedelta(days=30*months)
+            queryset = NDVIData.objects.filter(farm_id__in=farm_ids).exclude(
+                source__startswith=COMPOSITE_SOURCE_PREFIX
+            )
+            if records:
+                queryset = queryset.annotate(row_number=Window(
+                    expression=RowNumber(),
+                    partition_by=[F('farm_id')],
+                    order_by=F('date').desc()
+                )).filter(row_number__lte=records)
+            else:
+                start_date = datetime.now() - timedelta(days=30*months)
+                queryset = queryset.filter(date__gte=start_date.date())
             
-            ndvi_data = NDVIData.objects.filter(
-                farm=farm,
-                date__gte=start_date.date()
-            ).order_by('date')
+            rows = list(queryset.order_by('farm_id', 'date').values_list('farm_id', 'date', 'ndvi_average'))
             
-            if not ndvi_data:
-                return {
-                    'success': False,
-                    'message': 'No historical NDVI data available'
-                }
+            engine = NDVITrendEngine()
+            ids, values, month_index = engine.build_matrix(rows)
+            analysis = engine.analyze(values, month_index, self._monthly_ndvi_climatology())
             
-            # Prepare data for trend analysis
-            dates = [data.date for data in ndvi_data]
-            values = [float(data.ndvi_average) for data in ndvi_data]
+            dates = {}
+            for farm_id, date, _ in rows:
+                dates.setdefault(farm_id, []).append(date.strftime('%Y-%m-%d'))
             
-            # Calculate trend (simple linear regression)
-            x = np.arange(len(values))
-            if len(x) > 1:  # Need at least 2 points for regression
-                z = np.polyfit(x, values, 1)
-                slope = z[0]
-                
-                # Determine trend direction
-                if slope > 0.01:
-                    trend = 'IMPROVING'
-                elif slope < -0.01:
-                    trend = 'DECLINING'
-                else:
-                    trend = 'STABLE'
-            else:
-                trend = 'INSUFFICIENT_DATA'
+            results = {}
+            for position, farm_id in enumerate(ids.tolist()):
+                count = int(analysis['observations'][position])
+                results[farm_id] = {
+                    'success': True,
+                    'dates': dates[farm_id],
+                    'values': values[position, :count].tolist(),
+                    'trend': str(analysis['trend'][position]),
+                    'slope': self._finite_or_none(analysis['slope'][position]),
+                    'seasonal_slope': self._finite_or_none(analysis['seasonal_slope'][position]),
+                    'average': float(analysis['average'][position]),
+                    'latest_anomaly': bool(analysis['latest_anomaly'][position]),
+                    'anomaly_count': int(analysis['anomaly_count'][position])
+                }
             
-            return {
-                'success': True,
-                'dates': [d.strftime('%Y-%m-%d') for d in dates],
-                'values': values,
-                'trend': trend,
-                'average': np.mean(values) if values else None
-            }
+            for farm_id in farm_ids:
+                if farm_id not in results:
+                    results[farm_id] = {
+                        'success': False,
+                        'message': 'No historical NDVI data available'
+                    }
+            
+            return results
             
         except Exception as e:
             return {
-                'success': False,
-                'message': f'Error: {str(e)}'
+                farm_id: {
+                    'success': False,
+                    'message': f'Error: {str(e)}'
+                } for farm_id in farm_ids
             }
+    
+    def _monthly_ndvi_climatology(self):
+        """
+        Long-run mean NDVI per calendar month across all farms
+        
+        The climatology changes slowly, so it is computed at most once per
+        CLIMATOLOGY_MAX_AGE and shared by every trend request.
+        
+        Returns:
+            numpy.ndarray: 12 monthly means, NaN for months without data
+        """
+        cached = NDVIService._climatology_cache
+        if cached and time.time() - cached[0] < CLIMATOLOGY_MAX_AGE:
+            return cached[1]
+        
+        climatology = np.full(12, np.nan)
+        for month, average in (
+            NDVIData.objects.exclude(source__startswith=COMPOSITE_SOURCE_PREFIX)
+            .annotate(month=ExtractMonth('date'))
+            .values('month')
+            .annotate(average=Avg('ndvi_average'))
+            .values_list('month', 'average')
+        ):
+            climatology[month - 1] = float(average)
+        climatology.setflags(write=False)
+        NDVIService._climatology_cache = (time.time(), climatology)
+        return climatology
+    
+    def _finite_or_none(self, value):
+        return float(value) if np.isfinite(value) else None
@@ -0,0 +1,208 @@
+"""
+Batched NDVI trend analysis.
+
+Fits an ordinary least squares line to every farm's NDVI series at once using
+the closed-form slope over a NaN-padded farms x observations matrix, instead
+of calling np.polyfit per farm. Benchmark against the per-farm loop with:
+
+    python -m climate.services.ndvi_trend_engine --farms 5000 --observations 24
+"""
+import time
+import numpy as np
+
+# Slope per observation above which a series counts as improving or declining
+TREND_THRESHOLD = 0.01
+
+# Residual z-score beyond which an observation is flagged as anomalous
+ANOMALY_ZSCORE = 2.0
+
+
+class NDVITrendEngine:
+    """
+    Vectorized NDVI trend, seasonal adjustment and anomaly detection for many farms
+    """
+
+    def __init__(self, trend_threshold=TREND_THRESHOLD, anomaly_zscore=ANOMALY_ZSCORE):
+        """
+        Initialize the trend engine
+
+        Args:
+            trend_threshold (float): Slope per observation separating STABLE from IMPROVING/DECLINING
+            anomaly_zscore (float): Residual z-score above which an observation is anomalous
+        """
+        self.trend_threshold = trend_threshold
+        self.anomaly_zscore = anomaly_zscore
+
+    def build_matrix(self, rows):
+        """
+        Pack (farm_id, date, value) rows into left-aligned padded matrices
+
+        Args:
+            rows (list): Tuples of (farm_id, date, ndvi), ordered by farm then date
+
+        Returns:
+            tuple: (farm ids array, values matrix padded with NaN, calendar month matrix padded with -1)
+        """
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty((0, 0)), np.empty((0, 0), dtype=np.int64)
+
+        farm_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        months = np.array([row[1].month - 1 for row in rows], dtype=np.int64)
+        values = np.array([float(row[2]) for row in rows], dtype=np.float64)
+
+        unique_ids, starts, counts = np.unique(farm_ids, return_index=True, return_counts=True)
+        farm_index = np.repeat(np.arange(len(unique_ids)), counts)
+        positions = np.arange(len(rows)) - np.repeat(starts, counts)
+
+        value_matrix = np.full((len(unique_ids), counts.max()), np.nan)
+        month_matrix = np.full(value_matrix.shape, -1, dtype=np.int64)
+        value_matrix[farm_index, positions] = values
+        month_matrix[farm_index, positions] = months
+
+        return unique_ids, value_matrix, month_matrix
+
+    def fit_slopes(self, values):
+        """
+        Closed-form OLS fit of value against observation index for every row
+
+        Args:
+            values (numpy.ndarray): farms x observations matrix, NaN where missing
+
+        Returns:
+            tuple: (slopes, intercepts, observation counts); slope is NaN with fewer than 2 points
+        """
+        mask = ~np.isnan(values)
+        x = np.broadcast_to(np.arange(values.shape[1], dtype=np.float64), values.shape)
+        xm = np.where(mask, x, 0.0)
+        ym = np.where(mask, values, 0.0)
+
+        n = mask.sum(axis=1).astype(np.float64)
+        sx = xm.sum(axis=1)
+        sy = ym.sum(axis=1)
+        sxx = (xm * xm).sum(axis=1)
+        sxy = (xm * ym).sum(axis=1)
+
+        denominator = n * sxx - sx * sx
+        slopes = np.full(len(n), np.nan)
+        np.divide(n * sxy - sx * sy, denominator, out=slopes, where=denominator > 0)
+
+        intercepts = np.full(len(n), np.nan)
+        np.divide(sy - np.nan_to_num(slopes) * sx, n, out=intercepts, where=n > 0)
+
+        return slopes, intercepts, n.astype(np.int64)
+
+    def analyze(self, values, months, climatology=None):
+        """
+        Compute trends, seasonally adjusted trends and anomaly flags
+
+        Args:
+            values (numpy.ndarray): farms x observations NDVI matrix, left-aligned, NaN padded
+            months (numpy.ndarray): Matching calendar month index (0-11), -1 where padded
+            climatology (numpy.ndarray, optional): Mean NDVI per calendar month. Defaults to
+                the monthly means of the batch itself.
+
+        Returns:
+            dict: Per-farm arrays ('slope', 'seasonal_slope', 'trend', 'average', 'observations',
+                'latest', 'latest_zscore', 'latest_anomaly', 'anomaly_count', 'seasonal_anomaly')
+        """
+        mask = ~np.isnan(values)
+        slopes, intercepts, counts = self.fit_slopes(values)
+        rows = np.arange(values.shape[0])
+        last = np.maximum(counts - 1, 0)
+
+        # Residuals against each farm's own fitted line
+        x = np.arange(values.shape[1], dtype=np.float64)
+        fitted = intercepts[:, None] + np.nan_to_num(slopes)[:, None] * x
+        residuals = np.where(mask, values - fitted, 0.0)
+        dof = np.maximum(counts - 2, 1)
+        residual_std = np.sqrt((residuals ** 2).sum(axis=1) / dof)
+        zscores = np.zeros(values.shape)
+        np.divide(residuals, residual_std[:, None], out=zscores, where=residual_std[:, None] > 0)
+        anomalous = mask & (np.abs(zscores) > self.anomaly_zscore) & (counts[:, None] > 2)
+
+        # Seasonal adjustment removes the expected NDVI for each calendar month
+        if climatology is None:
+            month_sums = np.bincount(months[mask], weights=values[mask], minlength=12)
+            month_counts = np.bincount(months[mask], minlength=12)
+            climatology = np.full(12, np.nan)
+            np.divide(month_sums, month_counts, out=climatology, where=month_counts > 0)
+        climatology = np.asarray(climatology, dtype=np.float64)
+        expected = np.where(mask, climatology[np.clip(months, 0, 11)], np.nan)
+        adjusted = values - expected
+        seasonal_slopes, _, _ = self.fit_slopes(adjusted)
+
+        sums = np.where(mask, values, 0.0).sum(axis=1)
+        averages = np.full(len(counts), np.nan)
+        np.divide(sums, counts, out=averages, where=counts > 0)
+
+        trends = np.select(
+            [counts < 2, slopes > self.trend_threshold, slopes < -self.trend_threshold],
+            ['INSUFFICIENT_DATA', 'IMPROVING', 'DECLINING'],
+            default='STABLE'
+        )
+
+        return {
+            'slope': slopes,
+            'seasonal_slope': seasonal_slopes,
+            'trend': trends,
+            'average': averages,
+            'observations': counts,
+            'latest': values[rows, last],
+            'latest_zscore': zscores[rows, last],
+            'latest_anomaly': anomalous[rows, last],
+            'anomaly_count': anomalous.sum(axis=1),
+            'seasonal_anomaly': adjusted[rows, last]
+        }
+
+
+def benchmark(farms=5000, observations=24, seed=0):
+    """
+    Compare the batched engine with a per-farm np.polyfit loop on synthetic series
+
+    Args:
+        farms (int): Number of farm series
+        observations (int): Maximum observations per farm
+        seed (int): Random seed for the synthetic data
+
+    Returns:
+        dict: Timings in seconds and the largest slope difference between both methods
+    """
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(2, observations + 1, size=farms)
+    x = np.arange(observations)
+    values = 0.5 + rng.normal(0, 0.01, (farms, 1)) * x + rng.normal(0, 0.05, (farms, observations))
+    values[x[None, :] >= lengths[:, None]] = np.nan
+    months = np.where(np.isnan(values), -1, x % 12)
+
+    engine = NDVITrendEngine()
+
+    started = time.perf_counter()
+    result = engine.analyze(values, months)
+    batched_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    loop_slopes = np.array([
+        np.polyfit(np.arange(length), row[:length], 1)[0] for row, length in zip(values, lengths)
+    ])
+    loop_time = time.perf_counter() - started
+
+    return {
+        'farms': farms,
+        'observations': observations,
+        'batched_seconds': round(batched_time, 4),
+        'per_farm_seconds': round(loop_time, 4),
+        'speedup': round(loop_time / batched_time, 1) if batched_time else None,
+        'max_slope_difference': float(np.max(np.abs(result['slope'] - loop_slopes)))
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description='Benchmark batched NDVI trends against per-farm polyfit')
+    parser.add_argument('--farms', type=int, default=5000)
+    parser.add_argument('--observations', type=int, default=24)
+    args = parser.parse_args()
+
+    print(json.dumps(benchmark(args.farms, args.observations), indent=2))
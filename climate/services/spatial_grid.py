@@ -0,0 +1,136 @@
+"""
+Fixed-degree spatial grids for deduplicating location-based lookups.
+
+Farms a few hundred metres apart get the same satellite pixel and the same
+weather model cell, so provider requests are keyed by grid cell rather than by
+farm. Each grid is snapped to the native resolution of the data it serves.
+
+This module has no framework dependencies and is shared by the Django climate
+services and the Flask API services.
+"""
+import math
+from collections import namedtuple
+
+# Metres per degree of latitude
+METRES_PER_DEGREE = 111320.0
+
+GridCell = namedtuple('GridCell', ['row', 'col'])
+
+
+class SpatialGrid:
+    """
+    Regular latitude/longitude grid with square cells of a fixed size in degrees
+    """
+
+    def __init__(self, name, cell_degrees):
+        """
+        Initialize the grid
+
+        Args:
+            name (str): Short name used as the prefix of cell keys
+            cell_degrees (float): Cell size in degrees
+        """
+        self.name = name
+        self.cell_degrees = cell_degrees
+
+    @classmethod
+    def from_resolution(cls, name, metres):
+        """
+        Build a grid whose cells match a provider resolution in metres
+        """
+        return cls(name, metres / METRES_PER_DEGREE)
+
+    def cell(self, latitude, longitude):
+        """
+        Grid cell containing a point
+
+        Args:
+            latitude (float): Latitude coordinate
+            longitude (float): Longitude coordinate
+
+        Returns:
+            GridCell: (row, col) of the cell
+        """
+        return GridCell(
+            math.floor(float(latitude) / self.cell_degrees),
+            math.floor(float(longitude) / self.cell_degrees)
+        )
+
+    def center(self, cell):
+        """
+        Centre of a cell as (latitude, longitude)
+        """
+        return (
+            (cell.row + 0.5) * self.cell_degrees,
+            (cell.col + 0.5) * self.cell_degrees
+        )
+
+    def key(self, cell):
+        """
+        Stable string key for a cell, usable in cache keys, file names and columns
+        """
+        return f"{self.name}:{cell.row}:{cell.col}"
+
+    def snap(self, latitude, longitude):
+        """
+        Snap a point to the centre of its cell
+        """
+        return self.center(self.cell(latitude, longitude))
+
+    def group(self, items, locate):
+        """
+        Group items by the cell they fall in
+
+        Args:
+            items (iterable): Items to group (farms, locations, ...)
+            locate (callable): Returns (latitude, longitude) for an item, or None to skip it
+
+        Returns:
+            dict: Lists of items keyed by GridCell
+        """
+        cells = {}
+        for item in items:
+            point = locate(item)
+            if point is None:
+                continue
+            cells.setdefault(self.cell(*point), []).append(item)
+        return cells
+
+    def fan_out(self, items, locate, fetch):
+        """
+        Fetch once per cell and hand the result to every item in that cell
+
+        Args:
+            items (iterable): Items to resolve
+            locate (callable): Returns (latitude, longitude) for an item, or None to skip it
+            fetch (callable): Called as fetch(cell, latitude, longitude) with the cell centre
+
+        Returns:
+            list: (item, result) pairs in cell order
+        """
+        results = []
+        for cell, cell_items in self.group(items, locate).items():
+            latitude, longitude = self.center(cell)
+            result = fetch(cell, latitude, longitude)
+            results.extend((item, result) for item in cell_items)
+        return results
+
+
+def farm_centroid(farm):
+    """
+    (latitude, longitude) of a farm polygon centroid, or None without a location
+    """
+    if not farm.location:
+        return None
+    centroid = farm.location.centroid
+    return (centroid.y, centroid.x)
+
+
+# MODIS NDVI pixels (250 m)
+NDVI_GRID = SpatialGrid.from_resolution('ndvi', 250)
+
+# Global weather model cells (~0.1 degree, about 11 km)
+WEATHER_GRID = SpatialGrid('wx', 0.1)
+
+# Climate reanalysis cells (0.25 degree, ERA5 resolution)
+CLIMATE_RISK_GRID = SpatialGrid('risk', 0.25)
@@ -1,21 +1,29 @@
 import os
 import requests
 import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from django.db import transaction
 from django.utils import timezone
 from ..models import WeatherData, WeatherForecast
+from .http_client import build_session, RateLimiter
+from .forecast_cache import forecast_cache
 
 class WeatherService:
     """
     Service for fetching and processing weather data from external APIs
     """
     
-    def __init__(self):
+    def __init__(self, base_url=None):
         """
         Initialize the weather service with API credentials
+        
+        Args:
+            base_url (str, optional): API base URL, e.g. a local stub server for benchmarks
         """
         self.api_key = os.environ.get('OPENWEATHER_API_KEY', '')
-        self.base_url = "https://api.openweathermap.org/data/2.5"
+        self.base_url = base_url or os.environ.get('OPENWEATHER_BASE_URL', "https://api.openweathermap.org/data/2.5")
     
     def fetch_current_weather(self, latitude, longitude):
         """
@@ -129,6 +137,65 @@ class WeatherService:
                 
         return historical_data
     
+    def fetch_historical_weather_concurrent(self, latitude, longitude, days=30, max_workers=8,
+                                            requests_per_second=None, retries=3, timeout=10):
+        """
+        Fetch historical weather data with concurrent requests over a pooled session
+        
+        Days are fetched in parallel over keep-alive connections, with bounded
+        concurrency, optional rate limiting and retry with exponential backoff.
+        Days that still fail after retries are skipped, so the result may be partial.
+        
+        Args:
+            latitude (float): Latitude coordinate
+            longitude (float): Longitude coordinate
+            days (int): Number of past days to fetch
+            max_workers (int): Maximum number of requests in flight
+            requests_per_second (float, optional): Maximum request rate
+            retries (int): Number of retries per day
+            timeout (float): Request timeout in seconds
+            
+        Returns:
+            list: List of daily historical weather data, most recent first
+        """
+        url = f"{self.base_url}/onecall/timemachine"
+        now = datetime.now()
+        limiter = RateLimiter(requests_per_second)
+        
+        def fetch_day(session, day):
+            params = {
+                'lat': latitude,
+                'lon': longitude,
+                'dt': int((now - timedelta(days=day)).timestamp()),
+                'units': 'metric',
+                'appid': self.api_key
+            }
+            limiter.wait()
+            response = session.get(url, params=params, timeout=timeout)
+            response.raise_for_status()
+            return response.json()
+        
+        results = {}
+        with build_session(pool_size=max_workers, retries=retries) as session:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {executor.submit(fetch_day, session, day): day for day in range(days)}
+                
+                for future in as_completed(futures):
+                    day = futures[future]
+                    try:
+                        day_data = future.result()
+                    except (requests.RequestException, ValueError) as e:
+                        print(f"Error fetching historical weather for day {day}: {e}")
+                        continue
+                    
+                    if 'current' in day_data:
+                        results[day] = day_data
+        
+        if len(results) < days:
+            print(f"Fetched historical weather for {len(results)} of {days} days")
+        
+        return [results[day] for day in sorted(results)]
+    
     def process_daily_weather(self, weather_data):
         """
         Process raw weather data into a standardized format
@@ -263,6 +330,132 @@ class WeatherService:
             print(f"Error storing weather forecast: {e}")
             return []
     
+    def bulk_store_weather_data(self, region_weather, source='OpenWeatherMap', batch_size=500):
+        """
+        Store processed weather data for many regions in bulk
+        
+        Records are written without a station, and NULL never conflicts in a
+        unique index, so existing rows are matched in one query and split into
+        a bulk update and a bulk insert instead of relying on ON CONFLICT.
+        
+        Args:
+            region_weather (list): (Region, processed weather data) pairs
+            source (str): Data source identifier
+            batch_size (int): Rows per INSERT/UPDATE statement
+            
+        Returns:
+            dict: Number of rows inserted and updated
+        """
+        fields = ['temperature_max', 'temperature_min', 'temperature_avg', 'precipitation', 'humidity', 'wind_speed']
+        
+        # Deduplicate on the natural key, the last record for a region/day wins
+        rows = {}
+        for region, weather_data in region_weather:
+            if not weather_data:
+                continue
+            data_date = weather_data['datetime'].date()
+            rows[(region.id, data_date)] = {
+                'temperature_max': weather_data['temperature']['max'],
+                'temperature_min': weather_data['temperature']['min'],
+                'temperature_avg': weather_data['temperature']['current'],
+                'precipitation': weather_data['rain'],
+                'humidity': weather_data['humidity'],
+                'wind_speed': weather_data['wind']['speed']
+            }
+        
+        if not rows:
+            return {'inserted': 0, 'updated': 0}
+        
+        try:
+            region_ids = {region_id for region_id, _ in rows}
+            dates = {data_date for _, data_date in rows}
+            existing = {
+                (record.region_id, record.date): record
+                for record in WeatherData.objects.filter(
+                    station__isnull=True,
+                    source=source,
+                    region_id__in=region_ids,
+                    date__in=dates
+                )
+            }
+            
+            to_create = []
+            to_update = []
+            for (region_id, data_date), values in rows.items():
+                record = existing.get((region_id, data_date))
+                if record is None:
+                    to_create.append(WeatherData(region_id=region_id, date=data_date, source=source, **values))
+                else:
+                    for field, value in values.items():
+                        setattr(record, field, value)
+                    to_update.append(record)
+            
+            with transaction.atomic():
+                WeatherData.objects.bulk_create(to_create, batch_size=batch_size)
+                WeatherData.objects.bulk_update(to_update, fields, batch_size=batch_size)
+            
+            return {'inserted': len(to_create), 'updated': len(to_update)}
+        except Exception as e:
+            print(f"Error bulk storing weather data: {e}")
+            return {'inserted': 0, 'updated': 0}
+    
+    def bulk_store_weather_forecasts(self, region_forecasts, source='OpenWeatherMap', batch_size=500):
+        """
+        Store weather forecasts for many regions with a single bulk upsert
+        
+        Args:
+            region_forecasts (list): (Region, forecast API response) pairs
+            source (str): Data source identifier
+            batch_size (int): Rows per INSERT statement
+            
+        Returns:
+            dict: Number of rows inserted and updated
+        """
+        forecast_date = timezone.now().date()
+        
+        # Deduplicate on the unique key, Postgres rejects an upsert touching a row twice
+        rows = {}
+        for region, forecast_data in region_forecasts:
+            if not forecast_data or 'daily' not in forecast_data:
+                continue
+            for day_data in forecast_data['daily']:
+                prediction_date = datetime.fromtimestamp(day_data['dt']).date()
+                rows[(region.id, prediction_date)] = WeatherForecast(
+                    region_id=region.id,
+                    forecast_date=forecast_date,
+                    prediction_date=prediction_date,
+                    source=source,
+                    temperature_max=day_data['temp']['max'],
+                    temperature_min=day_data['temp']['min'],
+                    precipitation_probability=day_data.get('pop', 0) * 100,
+                    precipitation_amount=day_data.get('rain', 0)
+                )
+        
+        if not rows:
+            return {'inserted': 0, 'updated': 0}
+        
+        try:
+            existing_keys = WeatherForecast.objects.filter(
+                forecast_date=forecast_date,
+                source=source,
+                region_id__in={region_id for region_id, _ in rows},
+                prediction_date__in={prediction_date for _, prediction_date in rows}
+            ).values_list('region_id', 'prediction_date')
+            updated = len(set(existing_keys) & set(rows))
+            
+            WeatherForecast.objects.bulk_create(
+                list(rows.values()),
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['region', 'forecast_date', 'prediction_date', 'source'],
+                update_fields=['temperature_max', 'temperature_min', 'precipitation_probability', 'precipitation_amount']
+            )
+            
+            return {'inserted': len(rows) - updated, 'updated': updated}
+        except Exception as e:
+            print(f"Error bulk storing weather forecasts: {e}")
+            return {'inserted': 0, 'updated': 0}
+    
     def get_weather_forecast(self, region, days=7):
         """
         Get weather forecast for a region
@@ -335,6 +528,22 @@ class WeatherService:
             print(f"Error getting weather forecast: {e}")
             return []
     
+    def get_cached_weather_forecast(self, region, days=7):
+        """
+        Get weather forecast for a region through the shared forecast cache
+        
+        Serves the cached forecast immediately, even when stale, and refreshes
+        it in the background via get_weather_forecast.
+        
+        Args:
+            region (Region): Region object
+            days (int): Number of days to forecast
+            
+        Returns:
+            list: Forecast data ready for display
+        """
+        return forecast_cache.get(region, days, self.get_weather_forecast)
+    
     def calculate_seasonal_anomalies(self, region, start_date=None, end_date=None):
         """
         Calculate seasonal weather anomalies for a region
@@ -347,78 +556,108 @@ class WeatherService:
         Returns:
             dict: Seasonal anomaly data
         """
+        try:
+            results = self.calculate_seasonal_anomalies_bulk([region], start_date, end_date)
+            return results[region.id]
+        except Exception as e:
+            return {
+                'success': False,
+                'message': f'Error: {str(e)}'
+            }
+    
+    def calculate_seasonal_anomalies_bulk(self, regions=None, start_date=None, end_date=None, window_days=30):
+        """
+        Calculate seasonal weather anomalies for many regions in one pass
+        
+        Loads (region, date, temperature, precipitation) for all regions with a
+        single query, computes per-region baselines and rolling anomalies with
+        pandas groupby/rolling, and classifies every region at once. Missing
+        temperature or precipitation values stay aligned with their dates.
+        
+        Args:
+            regions (iterable, optional): Regions to analyse, all regions with data if None
+            start_date (date, optional): Start date for analysis
+            end_date (date, optional): End date for analysis
+            window_days (int): Length of the recent anomaly window in days
+            
+        Returns:
+            dict: Seasonal anomaly data keyed by region id
+        """
         if not start_date:
             start_date = (datetime.now() - timedelta(days=365)).date()
         if not end_date:
             end_date = datetime.now().date()
+        
+        weather_data = WeatherData.objects.filter(date__gte=start_date, date__lte=end_date)
+        region_ids = None
+        if regions is not None:
+            region_ids = [region.id for region in regions]
+            weather_data = weather_data.filter(region_id__in=region_ids)
+        
+        frame = pd.DataFrame.from_records(
+            weather_data.values_list('region_id', 'date', 'temperature_avg', 'precipitation'),
+            columns=['region_id', 'date', 'temp', 'precip']
+        )
+        
+        results = {}
+        if not frame.empty:
+            frame[['temp', 'precip']] = frame[['temp', 'precip']].astype(float)
+            frame['date'] = pd.to_datetime(frame['date'])
             
-        try:
-            # Get weather data for the specified period
-            weather_data = WeatherData.objects.filter(
-                region=region,
-                date__gte=start_date,
-                date__lte=end_date
-            ).order_by('date')
+            # Several sources may report the same region and day
+            frame = frame.groupby(['region_id', 'date'], as_index=False)[['temp', 'precip']].mean()
             
-            if not weather_data:
-                return {
+            # Baselines over the whole period (5-year climatology would be better, but using available data)
+            baselines = frame.groupby('region_id')[['temp', 'precip']].mean()
+            frame['temp_anomaly'] = frame['temp'] - frame['region_id'].map(baselines['temp'])
+            frame['precip_anomaly'] = frame['precip'] - frame['region_id'].map(baselines['precip'])
+            
+            # Rolling anomalies over the trailing window, keep the latest value per region
+            rolling = (
+                frame.set_index('date')
+                .groupby('region_id')[['temp_anomaly', 'precip_anomaly']]
+                .rolling(f'{window_days}D', min_periods=1)
+                .mean()
+            )
+            recent = rolling.groupby(level='region_id').tail(1).reset_index(level='date', drop=True)
+            
+            temp_anomaly = recent['temp_anomaly'].to_numpy()
+            precip_anomaly = recent['precip_anomaly'].to_numpy()
+            
+            # Comparisons with NaN are False, so regions without values stay NORMAL
+            temp_status = np.select(
+                [temp_anomaly > 1.5, temp_anomaly > 0.5, temp_anomaly < -1.5, temp_anomaly < -0.5],
+                ['MUCH_WARMER', 'WARMER', 'MUCH_COOLER', 'COOLER'],
+                default='NORMAL'
+            )
+            precip_status = np.select(
+                [precip_anomaly > 5, precip_anomaly > 2, precip_anomaly < -5, precip_anomaly < -2],
+                ['MUCH_WETTER', 'WETTER', 'MUCH_DRIER', 'DRIER'],
+                default='NORMAL'
+            )
+            
+            for i, region_id in enumerate(recent.index):
+                results[int(region_id)] = {
+                    'success': True,
+                    'temp_anomaly': self._optional_float(temp_anomaly[i]),
+                    'precip_anomaly': self._optional_float(precip_anomaly[i]),
+                    'temp_status': str(temp_status[i]),
+                    'precip_status': str(precip_status[i]),
+                    'baseline_temp': self._optional_float(baselines.at[region_id, 'temp']),
+                    'baseline_precip': self._optional_float(baselines.at[region_id, 'precip'])
+                }
+        
+        for region_id in region_ids or []:
+            if region_id not in results:
+                results[region_id] = {
                     'success': False,
                     'message': 'Insufficient weather data for analysis'
                 }
-                
-            # Extract temperature and precipitation values
-            dates = [data.date for data in weather_data]
-            temps = [float(data.temperature_avg) for data in weather_data if data.temperature_avg]
-            precip = [float(data.precipitation) for data in weather_data if data.precipitation]
-            
-            # Calculate baselines (5-year climatology would be better, but using available data)
-            avg_temp = np.mean(temps) if temps else None
-            avg_precip = np.mean(precip) if precip else None
-            
-            # Calculate anomalies
-            temp_anomalies = [t - avg_temp for t in temps] if avg_temp else []
-            precip_anomalies = [p - avg_precip for p in precip] if avg_precip else []
-            
-            # Calculate recent anomalies (last 30 days)
-            recent_start_idx = max(0, len(temp_anomalies) - 30)
-            recent_temp_anomaly = np.mean(temp_anomalies[recent_start_idx:]) if temp_anomalies else None
-            recent_precip_anomaly = np.mean(precip_anomalies[recent_start_idx:]) if precip_anomalies else None
-            
-            # Determine anomaly status
-            temp_status = 'NORMAL'
-            if recent_temp_anomaly is not None:
-                if recent_temp_anomaly > 1.5:
-                    temp_status = 'MUCH_WARMER'
-                elif recent_temp_anomaly > 0.5:
-                    temp_status = 'WARMER'
-                elif recent_temp_anomaly < -1.5:
-                    temp_status = 'MUCH_COOLER'
-                elif recent_temp_anomaly < -0.5:
-                    temp_status = 'COOLER'
-            
-            precip_status = 'NORMAL'
-            if recent_precip_anomaly is not None:
-                if recent_precip_anomaly > 5:
-                    precip_status = 'MUCH_WETTER'
-                elif recent_precip_anomaly > 2:
-                    precip_status = 'WETTER'
-                elif recent_precip_anomaly < -5:
-                    precip_status = 'MUCH_DRIER'
-                elif recent_precip_anomaly < -2:
-                    precip_status = 'DRIER'
-            
-            return {
-                'success': True,
-                'temp_anomaly': recent_temp_anomaly,
-                'precip_anomaly': recent_precip_anomaly,
-                'temp_status': temp_status,
-                'precip_status': precip_status,
-                'baseline_temp': avg_temp,
-                'baseline_precip': avg_precip
-            }
-            
-        except Exception as e:
-            return {
-                'success': False,
-                'message': f'Error: {str(e)}'
-            }
+        
+        return results
+    
+    def _optional_float(self, value):
+        """
+        Convert a numpy scalar to float, mapping NaN to None
+        """
+        return None if pd.isna(value) else float(value)
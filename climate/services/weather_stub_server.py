@@ -0,0 +1,178 @@
+"""
+Local stub of the OpenWeatherMap endpoints used by WeatherService.
+
+Lets the weather fetchers be exercised and benchmarked offline:
+
+    python -m climate.services.weather_stub_server --days 30 --latency 0.05
+"""
+import json
+import random
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class StubWeatherServer:
+    """
+    Threaded HTTP server answering OpenWeatherMap-style requests with canned data
+    """
+
+    def __init__(self, latency=0.0, failure_rate=0.0, host='127.0.0.1', port=0):
+        """
+        Initialize the stub server
+
+        Args:
+            latency (float): Artificial delay per request in seconds
+            failure_rate (float): Fraction of requests answered with HTTP 503
+            host (str): Interface to bind
+            port (int): Port to bind, 0 picks a free port
+        """
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    stub.request_count += 1
+
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                if random.random() < stub.failure_rate:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+
+                parsed = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+
+                if parsed.path.endswith('/onecall/timemachine'):
+                    payload = stub._historical_payload(params)
+                elif parsed.path.endswith('/onecall'):
+                    payload = stub._forecast_payload(params)
+                else:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _historical_payload(self, params):
+        dt = int(params.get('dt', time.time()))
+        return {
+            'lat': float(params.get('lat', 0)),
+            'lon': float(params.get('lon', 0)),
+            'current': {
+                'dt': dt,
+                'temp': 26.5,
+                'humidity': 72,
+                'wind_speed': 3.1,
+                'weather': [{'main': 'Clouds', 'description': 'scattered clouds'}]
+            }
+        }
+
+    def _forecast_payload(self, params):
+        now = int(time.time())
+        return {
+            'lat': float(params.get('lat', 0)),
+            'lon': float(params.get('lon', 0)),
+            'daily': [
+                {
+                    'dt': now + day * 86400,
+                    'temp': {'min': 21.0, 'max': 31.0},
+                    'pop': 0.4,
+                    'rain': 2.5
+                } for day in range(8)
+            ]
+        }
+
+
+def benchmark(days=30, latency=0.05, max_workers=8):
+    """
+    Compare the sequential and concurrent historical weather fetch against the stub
+
+    Args:
+        days (int): Number of days to fetch
+        latency (float): Artificial server latency per request in seconds
+        max_workers (int): Concurrency for the concurrent fetch
+
+    Returns:
+        dict: Timings in seconds for both strategies
+    """
+    from climate.services.weather_service import WeatherService
+
+    with StubWeatherServer(latency=latency) as server:
+        service = WeatherService(base_url=server.base_url)
+
+        started = time.perf_counter()
+        sequential = service.fetch_historical_weather(5.6, -0.2, days)
+        sequential_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        concurrent = service.fetch_historical_weather_concurrent(5.6, -0.2, days, max_workers=max_workers)
+        concurrent_time = time.perf_counter() - started
+
+    return {
+        'days': days,
+        'sequential_seconds': round(sequential_time, 3),
+        'sequential_results': len(sequential),
+        'concurrent_seconds': round(concurrent_time, 3),
+        'concurrent_results': len(concurrent),
+        'run_at': datetime.now().isoformat()
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    import os
+    import django
+
+    parser = argparse.ArgumentParser(description='Benchmark historical weather fetching against a local stub')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'agrifinance.settings')
+    django.setup()
+
+    print(json.dumps(benchmark(args.days, args.latency, args.workers), indent=2))
@@ -0,0 +1,162 @@
+from datetime import date, datetime, timedelta
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from core.models import Region
+from .models import WeatherData, WeatherForecast
+from .services.ndvi_composite_service import NDVICompositeService
+from .services.weather_service import WeatherService
+
+
+def weather_record(day, temperature):
+    """Processed weather data as produced by WeatherService.process_weather_data"""
+    return {
+        'datetime': datetime.combine(day, datetime.min.time()),
+        'temperature': {'current': temperature, 'max': temperature + 3, 'min': temperature - 4},
+        'humidity': 70,
+        'wind': {'speed': 4.5},
+        'rain': 1.2
+    }
+
+
+def forecast_response(start, temperatures):
+    """OpenWeatherMap one-call response with one daily entry per temperature"""
+    return {
+        'daily': [
+            {
+                'dt': int(datetime.combine(start + timedelta(days=offset), datetime.min.time()).timestamp()),
+                'temp': {'max': temperature + 3, 'min': temperature - 4},
+                'pop': 0.4,
+                'rain': 2.0
+            }
+            for offset, temperature in enumerate(temperatures)
+        ]
+    }
+
+
+class BulkStoreWeatherDataTests(TestCase):
+    def setUp(self):
+        self.service = WeatherService()
+        self.ashanti = Region.objects.create(name='Ashanti', country='Ghana')
+        self.eastern = Region.objects.create(name='Eastern Region', country='Ghana')
+        self.today = timezone.now().date()
+
+    def test_inserts_then_updates_without_duplicates(self):
+        result = self.service.bulk_store_weather_data([
+            (self.ashanti, weather_record(self.today, 25)),
+            (self.eastern, weather_record(self.today, 27))
+        ])
+        self.assertEqual(result, {'inserted': 2, 'updated': 0})
+
+        result = self.service.bulk_store_weather_data([
+            (self.ashanti, weather_record(self.today, 30)),
+            (self.eastern, weather_record(self.today - timedelta(days=1), 22))
+        ])
+        self.assertEqual(result, {'inserted': 1, 'updated': 1})
+
+        self.assertEqual(WeatherData.objects.count(), 3)
+        record = WeatherData.objects.get(region=self.ashanti, date=self.today)
+        self.assertEqual(float(record.temperature_avg), 30)
+        self.assertEqual(float(record.temperature_max), 33)
+
+    def test_last_record_for_a_region_and_day_wins(self):
+        result = self.service.bulk_store_weather_data([
+            (self.ashanti, weather_record(self.today, 25)),
+            (self.ashanti, weather_record(self.today, 26))
+        ])
+
+        self.assertEqual(result, {'inserted': 1, 'updated': 0})
+        self.assertEqual(float(WeatherData.objects.get(region=self.ashanti).temperature_avg), 26)
+
+    def test_skips_regions_without_data(self):
+        result = self.service.bulk_store_weather_data([(self.ashanti, None)])
+
+        self.assertEqual(result, {'inserted': 0, 'updated': 0})
+        self.assertFalse(WeatherData.objects.exists())
+
+
+class BulkStoreWeatherForecastTests(TestCase):
+    def setUp(self):
+        self.service = WeatherService()
+        self.ashanti = Region.objects.create(name='Ashanti', country='Ghana')
+        self.eastern = Region.objects.create(name='Eastern Region', country='Ghana')
+        self.today = timezone.now().date()
+
+    def test_upserts_forecast_days(self):
+        result = self.service.bulk_store_weather_forecasts([
+            (self.ashanti, forecast_response(self.today, [25, 26, 27])),
+            (self.eastern, forecast_response(self.today, [28, 29]))
+        ])
+        self.assertEqual(result, {'inserted': 5, 'updated': 0})
+
+        result = self.service.bulk_store_weather_forecasts([
+            (self.ashanti, forecast_response(self.today, [20, 21, 22, 23]))
+        ])
+        self.assertEqual(result, {'inserted': 1, 'updated': 3})
+
+        self.assertEqual(WeatherForecast.objects.count(), 6)
+        forecast = WeatherForecast.objects.get(region=self.ashanti, prediction_date=self.today)
+        self.assertEqual(float(forecast.temperature_max), 23)
+        self.assertEqual(float(forecast.precipitation_probability), 40)
+
+    def test_skips_responses_without_daily_data(self):
+        result = self.service.bulk_store_weather_forecasts([(self.ashanti, {}), (self.eastern, None)])
+
+        self.assertEqual(result, {'inserted': 0, 'updated': 0})
+        self.assertFalse(WeatherForecast.objects.exists())
+
+
+class NDVICompositeTests(SimpleTestCase):
+    start = date(2024, 1, 1)
+
+    def rows(self):
+        # Two farms over two 16-day windows: (farm_id, date, ndvi, cloud cover)
+        return [
+            (1, self.start, 0.40, 10.0),
+            (1, self.start + timedelta(days=5), 0.60, 20.0),
+            (1, self.start + timedelta(days=9), 0.90, 80.0),   # cloudy, discarded
+            (1, self.start + timedelta(days=20), 0.50, None),  # unknown cloud cover
+            (2, self.start + timedelta(days=3), 0.30, 0.0),
+            (2, self.start + timedelta(days=7), 1.50, 0.0),    # invalid NDVI, discarded
+        ]
+
+    def test_maximum_value_composite(self):
+        result = NDVICompositeService(window_days=16, method='max').composite(self.rows(), self.start)
+
+        self.assertEqual(result['observations'], 6)
+        self.assertEqual(result['discarded'], 2)
+        windows = result['windows']
+        self.assertEqual(set(windows), {
+            (1, self.start), (1, self.start + timedelta(days=16)), (2, self.start)
+        })
+        self.assertAlmostEqual(windows[(1, self.start)]['ndvi'], 0.60)
+        self.assertAlmostEqual(windows[(1, self.start)]['min'], 0.40)
+        self.assertAlmostEqual(windows[(1, self.start + timedelta(days=16))]['ndvi'], 0.50)
+        self.assertAlmostEqual(windows[(2, self.start)]['ndvi'], 0.30)
+
+    def test_weighted_composite_uses_clear_sky_fraction(self):
+        service = NDVICompositeService(window_days=16, method='weighted', unknown_cloud_weight=0.5)
+        windows = service.composite(self.rows(), self.start)['windows']
+
+        # Weights are 1 - cloud / 100: 0.9 and 0.8
+        expected = (0.9 * 0.40 + 0.8 * 0.60) / (0.9 + 0.8)
+        self.assertAlmostEqual(windows[(1, self.start)]['ndvi'], expected)
+        self.assertAlmostEqual(windows[(1, self.start)]['max'], 0.60)
+        self.assertAlmostEqual(windows[(1, self.start + timedelta(days=16))]['ndvi'], 0.50)
+
+    def test_cloud_threshold_is_configurable(self):
+        service = NDVICompositeService(window_days=16, method='max', max_cloud_cover=90.0)
+        result = service.composite(self.rows(), self.start)
+
+        self.assertEqual(result['discarded'], 1)
+        self.assertAlmostEqual(result['windows'][(1, self.start)]['ndvi'], 0.90)
+
+    def test_no_observations(self):
+        result = NDVICompositeService().composite([], self.start)
+
+        self.assertEqual(result, {'windows': {}, 'observations': 0, 'discarded': 0})
+
+    def test_unknown_method_is_rejected(self):
+        with self.assertRaises(ValueError):
+            NDVICompositeService(method='median')
@@ -6,6 +6,7 @@ from core.models import Farm, Region, Loan
 from climate.services.ndvi_service import NDVIService
 from climate.services.weather_service import WeatherService
 from climate.services.climate_risk_service import ClimateRiskService
+from climate.services.ndvi_composite_service import COMPOSITE_SOURCE_PREFIX
 import json
 from datetime import datetime, timedelta
 
@@ -41,15 +42,20 @@ def climate_dashboard(request):
         temperatures = [float(data.temperature_avg) for data in weather_data]
         precipitation = [float(data.precipitation) if data.precipitation else 0 for data in weather_data]
         
-        # Get NDVI data for farms
+        # Seasonal anomaly of the region, from the same bulk computation as the alert check
+        seasonal_anomaly = WeatherService().calculate_seasonal_anomalies_bulk([region]).get(region.id)
+        
+        # Get NDVI data and trends for all farms in one pass (last 12 records each)
         farm_ndvi_data = {}
+        ndvi_trends = NDVIService().get_historical_ndvi_trends(farms, records=12)
         for farm in farms:
-            ndvi_data = NDVIData.objects.filter(farm=farm).order_by('-date')[:12]  # Last 12 records
-            if ndvi_data:
+            trend = ndvi_trends.get(farm.id)
+            if trend and trend['success']:
                 farm_ndvi_data[farm.id] = {
                     'name': farm.name,
-                    'dates': [data.date.strftime('%Y-%m-%d') for data in ndvi_data],
-                    'values': [float(data.ndvi_average) for data in ndvi_data]
+                    'dates': trend['dates'][::-1],
+                    'values': trend['values'][::-1],
+                    'trend': trend['trend']
                 }
         
         context = {
@@ -59,12 +65,27 @@ def climate_dashboard(request):
             'weather_temperatures': json.dumps(temperatures),
             'weather_precipitation': json.dumps(precipitation),
             'weather_forecast': weather_forecast,
+            'seasonal_anomaly': seasonal_anomaly,
+            'temperature_trend': _anomaly_trend(seasonal_anomaly, 'temp_anomaly', '°C'),
+            'precipitation_trend': _anomaly_trend(seasonal_anomaly, 'precip_anomaly', 'mm/day'),
             'farm_ndvi_data': json.dumps(farm_ndvi_data)
         }
         return render(request, 'climate/dashboard.html', context)
     except Exception as e:
         return render(request, 'climate/dashboard.html', {'error': str(e)})
 
+def _anomaly_trend(anomaly, key, unit):
+    """
+    Direction and label of one seasonal anomaly value for a dashboard metric card
+    """
+    if not anomaly or not anomaly.get('success') or anomaly.get(key) is None:
+        return None
+    value = anomaly[key]
+    return {
+        'direction': 'up' if value >= 0 else 'down',
+        'label': f"{value:+.1f}{unit} vs avg"
+    }
+
 @login_required
 def farm_climate_data(request, farm_id):
     """
@@ -74,7 +95,9 @@ def farm_climate_data(request, farm_id):
     region = request.user.farmer.region
     
     # Get NDVI data
-    ndvi_data = NDVIData.objects.filter(farm=farm).order_by('-date')[:24]  # Last 24 records
+    ndvi_data = NDVIData.objects.filter(farm=farm).exclude(
+        source__startswith=COMPOSITE_SOURCE_PREFIX
+    ).order_by('-date')[:24]  # Last 24 raw observations
     
     # Get weather data for the region
     weather_data = WeatherData.objects.filter(
@@ -170,7 +193,7 @@ def weather_forecast_api(request, days=7):
         weather_service = WeatherService()
         
         # Fetch weather forecast
-        forecast_data = weather_service.get_weather_forecast(region, days)
+        forecast_data = weather_service.get_cached_weather_forecast(region, days)
         
         return JsonResponse({
             'success': True,
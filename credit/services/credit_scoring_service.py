@@ -7,6 +7,10 @@ from ..models import CreditScore, CreditScoreComponent, CreditScoreConfiguration
 from core.models import Farmer, Loan, Farm, Harvest, Payment
 from climate.models import ClimateRisk, NDVIData
 from climate.services.climate_risk_service import ClimateRiskService
+from climate.services.ndvi_composite_service import COMPOSITE_SOURCE_PREFIX
+from climate.services.spatial_grid import farm_centroid
+from .market_analytics import market_analytics
+from .market_price_service import market_price_service
 
 class DynamicCreditScoringService:
     """
@@ -101,12 +105,18 @@ class DynamicCreditScoringService:
                 raw_value = weighted_value / float(getattr(self.config, f"{name.lower().replace(' ', '_')}_weight"))
                 weight = float(getattr(self.config, f"{name.lower().replace(' ', '_')}_weight"))
                 
+                description = self._get_component_description(name, raw_value)
+                if name == 'Market Conditions':
+                    prices = market_analytics.price_status()
+                    if prices['stale'] and prices['price_date']:
+                        description += f" Based on market prices up to {prices['price_date']}."
+                
                 component = CreditScoreComponent.objects.create(
                     credit_score=credit_score,
                     component_name=name,
                     component_value=raw_value,
                     weight=weight,
-                    description=self._get_component_description(name, raw_value)
+                    description=description
                 )
                 components.append(component)
             
@@ -366,8 +376,10 @@ class DynamicCreditScoringService:
             # Get harvests for the farm
             harvests = Harvest.objects.filter(farm=farm).order_by('-harvest_date')
             
-            # Get NDVI data for the farm
-            ndvi_data = NDVIData.objects.filter(farm=farm).order_by('-date')
+            # Get raw NDVI observations for the farm
+            ndvi_data = NDVIData.objects.filter(farm=farm).exclude(
+                source__startswith=COMPOSITE_SOURCE_PREFIX
+            ).order_by('-date')
             
             farm_score = self._calculate_single_farm_productivity(farm, harvests, ndvi_data)
             farm_scores.append((farm_score, farm.area))  # Score and weight by area
@@ -474,35 +486,51 @@ class DynamicCreditScoringService:
         """
         Calculate market conditions score component
         
+        Reads the precomputed market indicators (price trend, volatility and
+        seasonal position) of each farm's crop in its market region: the
+        farmer's region when it has prices, otherwise the region nearest to the
+        farm. Falls back to a seasonal estimate without price data.
+        
         Args:
             farmer (Farmer): The farmer to evaluate
             
         Returns:
             float: Score from 0 to 1
         """
-        # In a real system, this would incorporate market data for the farmer's crops
-        # For this implementation, we'll use a simplified approach
-        
-        # Get the farmer's main crops
-        farms = Farm.objects.filter(farmer=farmer)
+        farms = Farm.objects.filter(farmer=farmer).only('main_crop', 'location')
         
-        if not farms.exists():
+        if not farms:
             return 0.5  # Neutral score
         
-        # Get all main crops
-        main_crops = [farm.main_crop for farm in farms]
-        
-        # In a real system, we would fetch current market prices and trends for these crops
-        # For this implementation, we'll use a simulated market score based on the region
-        
         # Get farmer's region
         region = farmer.region
+        farmer_point = (farmer.location.y, farmer.location.x) if farmer.location else (None, None)
         
-        if not region:
-            return 0.5  # Neutral score if no region
+        crop_regions = []
+        for farm in farms:
+            latitude, longitude = farm_centroid(farm) or farmer_point
+            crop_regions.append((
+                farm.main_crop,
+                market_price_service.locate_region(str(region) if region else None, latitude, longitude)
+            ))
+        
+        score = market_analytics.market_score(crop_regions)
         
-        # Simulate market conditions based on region and current month
-        # In a real system, this would be based on actual market data
+        if score is None:
+            return self._seasonal_market_factor(region) if region else 0.5
+        
+        return score
+    
+    def _seasonal_market_factor(self, region):
+        """
+        Seasonal market estimate for regions without price data
+        
+        Args:
+            region (Region): The farmer's region
+            
+        Returns:
+            float: Score from 0 to 1
+        """
         current_month = datetime.now().month
         
         # Simplified seasonal market factor
@@ -510,28 +538,15 @@ class DynamicCreditScoringService:
         if region.country.lower() in ['south africa', 'kenya', 'nigeria', 'ghana', 'ethiopia']:
             # Simplified seasons for major African agricultural countries
             if current_month in [3, 4, 5]:  # Spring/harvest season in some regions
-                season_factor = 0.7
+                return 0.7
             elif current_month in [9, 10, 11]:  # Another harvest season
-                season_factor = 0.8
-            else:
-                season_factor = 0.5
-        else:
-            # Default seasonal pattern
-            if current_month in [3, 4, 5, 9, 10, 11]:
-                season_factor = 0.6
-            else:
-                season_factor = 0.5
-        
-        # In a real implementation, we would incorporate:
-        # - Current market prices compared to historical averages
-        # - Price volatility
-        # - Export opportunities
-        # - Market demand forecasts
-        
-        # For now, return a simplified market conditions score
-        market_score = season_factor
+                return 0.8
+            return 0.5
         
-        return market_score
+        # Default seasonal pattern
+        if current_month in [3, 4, 5, 9, 10, 11]:
+            return 0.6
+        return 0.5
     
     def _calculate_relationship_length_score(self, farmer):
         """
@@ -606,9 +621,10 @@ class DynamicCreditScoringService:
         if farms.exists():
             # Calculate farm vulnerability scores
             farm_vulnerability_scores = []
+            vulnerabilities = self.climate_risk_service.assess_farms_vulnerability(farms)
             
             for farm in farms:
-                vulnerability = self.climate_risk_service.assess_farm_vulnerability(farm)
+                vulnerability = vulnerabilities[farm.id]
                 
                 vulnerability_scores = {
                     'LOW': 0.8,
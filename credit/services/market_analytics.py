@@ -0,0 +1,220 @@
+"""
+Market analytics for credit scoring.
+
+Computes price indicators for every (crop, region) in the market price
+history in one vectorized pass: the rolling price trend, the price volatility
+and the seasonal position of the current price within the past year. They
+are combined into a market score. The indicator table is computed once per
+day, or again when the price file changes. Every credit scorer in the process
+reads the same table, so scoring many farmers costs one lookup each.
+
+When the latest prices are more than STALE_AFTER_DAYS older than the scoring
+day, the indicators are computed from the last windows of data. The table is
+flagged stale and a warning is logged, so scorers can tell the market
+component rests on outdated prices.
+
+This module has no framework dependencies and is shared by the Django credit
+scoring service and the Flask API.
+"""
+import logging
+import threading
+from datetime import date
+
+import numpy as np
+
+from .market_price_service import STALE_AFTER_DAYS, market_price_service
+
+logger = logging.getLogger(__name__)
+
+# Days of history behind each indicator
+TREND_WINDOW = 30
+VOLATILITY_WINDOW = 30
+SEASONAL_WINDOW = 365
+
+# Monthly trend and daily volatility at which their score contribution saturates
+TREND_SCALE = 0.10
+VOLATILITY_SCALE = 0.05
+
+
+class MarketIndicatorTable:
+    """
+    Indicators for every (crop, region) pair on one day
+
+    Attributes:
+        as_of (date): Day the indicators were computed for
+        price_date (date): Latest price day on or before as_of
+        stale (bool): Whether price_date is more than STALE_AFTER_DAYS before as_of
+        trend (numpy.ndarray): (crops x regions) fitted price change per 30 days, as a fraction
+        volatility (numpy.ndarray): Standard deviation of daily log returns
+        seasonal_position (numpy.ndarray): Current price within the past year's range, 0 (low) to 1 (high)
+        score (numpy.ndarray): Market score from 0 to 1
+    """
+
+    def __init__(self, index, as_of):
+        self.index = index
+        self.as_of = as_of
+        self.mtime = index.mtime
+
+        n_crops, n_regions = len(index.crops), len(index.regions)
+        day = index.day_index(as_of)
+        self.price_date = index.date_of(day) if day is not None else None
+        self.stale = self.price_date is None or (as_of - self.price_date).days > STALE_AFTER_DAYS
+        if day is None:
+            empty = np.full((n_crops, n_regions), np.nan)
+            self.trend = self.volatility = self.seasonal_position = self.score = empty
+            return
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            log_prices = np.log(index.filled[:, :, :day + 1])
+        self.trend = self._trend(log_prices[:, :, -TREND_WINDOW:])
+        self.volatility = self._volatility(log_prices[:, :, -(VOLATILITY_WINDOW + 1):])
+        self.seasonal_position = self._seasonal_position(index.filled[:, :, max(0, day + 1 - SEASONAL_WINDOW):day + 1])
+
+        score = (
+            0.5
+            + 0.25 * np.clip(self.trend / TREND_SCALE, -1, 1)
+            + 0.3 * (self.seasonal_position - 0.5)
+            - 0.15 * np.clip(self.volatility / VOLATILITY_SCALE, 0, 1)
+        )
+        self.score = np.clip(score, 0, 1)
+
+    def _trend(self, log_prices):
+        """Least-squares slope of log prices, scaled to 30 days and converted to a fraction"""
+        valid = np.isfinite(log_prices)
+        n = valid.sum(axis=2)
+        x = np.broadcast_to(np.arange(log_prices.shape[2], dtype=np.float64), log_prices.shape)
+        x = np.where(valid, x, 0.0)
+        y = np.where(valid, log_prices, 0.0)
+
+        sum_x, sum_y = x.sum(axis=2), y.sum(axis=2)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            slope = (n * (x * y).sum(axis=2) - sum_x * sum_y) / (n * (x * x).sum(axis=2) - sum_x ** 2)
+        return np.where(n > 1, np.expm1(slope * 30), np.nan)
+
+    def _volatility(self, log_prices):
+        """Standard deviation of daily log returns"""
+        returns = np.diff(log_prices, axis=2)
+        valid = np.isfinite(returns)
+        n = valid.sum(axis=2)
+        returns = np.where(valid, returns, 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = returns.sum(axis=2) / n
+            variance = np.where(valid, (returns - mean[:, :, None]) ** 2, 0.0).sum(axis=2) / n
+        return np.where(n > 1, np.sqrt(variance), np.nan)
+
+    def _seasonal_position(self, prices):
+        """Where the latest price sits between the window's minimum and maximum"""
+        valid = np.isfinite(prices)
+        low = np.where(valid, prices, np.inf).min(axis=2)
+        high = np.where(valid, prices, -np.inf).max(axis=2)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            position = (prices[:, :, -1] - low) / (high - low)
+        return np.where(high > low, position, 0.5)
+
+    def get(self, crop, region):
+        """
+        Indicators for a crop in a region
+
+        Returns:
+            dict with trend, volatility, seasonal_position and score, or None without data
+        """
+        c, r = self.index.crop_index(crop), self.index.region_index(region)
+        if c is None or r is None or np.isnan(self.score[c, r]):
+            return None
+        return {
+            "crop": self.index.crops[c],
+            "region": self.index.regions[r],
+            "as_of": self.as_of.isoformat(),
+            "price_date": self.price_date.isoformat(),
+            "stale": self.stale,
+            "trend": round(float(self.trend[c, r]), 4),
+            "volatility": round(float(self.volatility[c, r]), 4),
+            "seasonal_position": round(float(self.seasonal_position[c, r]), 3),
+            "score": round(float(self.score[c, r]), 3)
+        }
+
+    def crop_score(self, crop, region=None):
+        """Market score for a crop in a region, or averaged over all regions when region is None or unknown"""
+        c = self.index.crop_index(crop)
+        if c is None:
+            return None
+        r = self.index.region_index(region)
+        values = self.score[c, r:r + 1] if r is not None else self.score[c]
+        values = values[~np.isnan(values)]
+        return float(values.mean()) if values.size else None
+
+
+class MarketAnalytics:
+    """
+    Daily precomputed market indicators and scores
+    """
+
+    def __init__(self, prices=None):
+        """
+        Initialize market analytics
+
+        Args:
+            prices: MarketPriceService providing the price index (default: shared instance)
+        """
+        self.prices = prices or market_price_service
+        self._table = None
+        self._lock = threading.Lock()
+
+    def table(self, as_of=None):
+        """
+        Indicator table for a day (default today), computed at most once per day and price file version
+        """
+        as_of = as_of or date.today()
+        index = self.prices.index
+        table = self._table
+        if table is not None and table.as_of == as_of and table.mtime == index.mtime:
+            return table
+
+        table = MarketIndicatorTable(index, as_of)
+        if table.stale and table.price_date is not None:
+            logger.warning(
+                f"Market prices end on {table.price_date.isoformat()}, "
+                f"{(as_of - table.price_date).days} days before {as_of.isoformat()}; "
+                f"market scores use the last available window"
+            )
+        if as_of == date.today():
+            with self._lock:
+                self._table = table
+        return table
+
+    def price_status(self, as_of=None):
+        """
+        Age of the prices behind the scores of a day (default today)
+
+        Returns:
+            dict with price_date (ISO date or None without data) and stale
+        """
+        table = self.table(as_of)
+        return {
+            "price_date": table.price_date.isoformat() if table.price_date else None,
+            "stale": table.stale
+        }
+
+    def indicators(self, crop, region, as_of=None):
+        """Indicators for a crop in a region, None without price data"""
+        return self.table(as_of).get(crop, region)
+
+    def market_score(self, crop_regions, as_of=None):
+        """
+        Market score for a farmer's crops
+
+        Args:
+            crop_regions: Iterable of (crop, region) pairs, region may be None
+            as_of: Day of the indicators (default today)
+
+        Returns:
+            float: Mean score of the crops with price data, or None if none has any
+        """
+        table = self.table(as_of)
+        scores = [table.crop_score(crop, region) for crop, region in crop_regions]
+        scores = [score for score in scores if score is not None]
+        return float(np.mean(scores)) if scores else None
+
+
+# Shared by every credit scorer in the process
+market_analytics = MarketAnalytics()
@@ -0,0 +1,319 @@
+"""
+Market price service backed by the scraped crop price history.
+
+scraped_data/crop_prices.json (crop -> region -> daily points) is loaded once
+into a dense (crop, region, day) NumPy array, forward-filled so the price on
+any day is a single index lookup. The file is reloaded lazily when its
+modification time changes. Days after the end of the data read the last
+observed prices, and lookups report the date of the price they used so
+callers can tell stale data from current data.
+
+This module has no framework dependencies and is shared by the Django credit
+scoring service and the Flask mobile app.
+"""
+import json
+import logging
+import math
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRICES_PATH = Path(__file__).resolve().parent.parent.parent / 'scraped_data' / 'crop_prices.json'
+
+# Prices observed more than this many days before the requested day are stale
+STALE_AFTER_DAYS = 7
+
+# Market region locations, as scraped by data_scraper.py
+REGION_COORDINATES = {
+    'Eastern Region, Ghana': (6.5735, 0.2396),
+    'Ashanti Region, Ghana': (6.7470, -1.5209),
+    'Northern Region, Ghana': (9.5439, -0.9057),
+    'Western Region, Kenya': (-0.3031, 34.7713),
+    'Rift Valley, Kenya': (0.5683, 35.7516),
+    'Central Region, Uganda': (0.3476, 32.5825),
+}
+
+# Farthest a location may be from a market region to use its prices
+MAX_REGION_DISTANCE_KM = 400
+
+
+def _as_date(value):
+    if value is None:
+        return date.today()
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _distance_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * 6371.0 * math.asin(math.sqrt(a))
+
+
+class MarketPriceIndex:
+    """
+    Immutable columnar view of one load of the price file
+
+    Attributes:
+        crops (list): Crop names in index order
+        regions (list): Region names in index order
+        start_date (date): First day of the day axis
+        prices (numpy.ndarray): (crops x regions x days) raw prices, NaN where missing
+        filled (numpy.ndarray): prices forward-filled along the day axis
+        observed (numpy.ndarray): Day index of the observation behind each filled price
+    """
+
+    def __init__(self, data, mtime=None):
+        self.mtime = mtime
+        self.crops = sorted(data)
+        self.regions = sorted({region for regions in data.values() for region in regions})
+        self._crop_index = {crop.lower(): index for index, crop in enumerate(self.crops)}
+        self._region_index = {region.lower(): index for index, region in enumerate(self.regions)}
+
+        days = [
+            point['date'] for regions in data.values() for points in regions.values() for point in points
+        ]
+        if days:
+            self.start_date = date.fromisoformat(min(days))
+            n_days = (date.fromisoformat(max(days)) - self.start_date).days + 1
+        else:
+            self.start_date, n_days = date.today(), 0
+
+        self.prices = np.full((len(self.crops), len(self.regions), n_days), np.nan)
+        self.currency = {}
+        self.unit = {}
+        for crop, regions in data.items():
+            crop_index = self._crop_index[crop.lower()]
+            for region, points in regions.items():
+                if not points:
+                    continue
+                offsets = np.array([(date.fromisoformat(p['date']) - self.start_date).days for p in points])
+                self.prices[crop_index, self._region_index[region.lower()], offsets] = [p['price'] for p in points]
+                self.currency.setdefault(crop, points[0].get('currency'))
+                self.unit.setdefault(crop, points[0].get('unit'))
+
+        # Forward fill: index of the last observed day at or before each day
+        observed = ~np.isnan(self.prices)
+        last_observed = np.where(observed, np.arange(n_days), 0)
+        np.maximum.accumulate(last_observed, axis=2, out=last_observed)
+        self.filled = np.take_along_axis(self.prices, last_observed, axis=2)
+        self.observed = last_observed
+
+    @property
+    def end_date(self):
+        return self.start_date + timedelta(days=self.prices.shape[2] - 1)
+
+    def crop_index(self, crop):
+        """Index of a crop (case-insensitive), or None"""
+        return self._crop_index.get(str(crop).lower()) if crop else None
+
+    def region_index(self, region):
+        """
+        Index of a region, or None
+
+        Matches the full name ('Eastern Region, Ghana') case-insensitively, or a
+        name without the country ('Eastern Region') when it is unambiguous.
+        """
+        if not region:
+            return None
+        key = str(region).lower()
+        if key in self._region_index:
+            return self._region_index[key]
+        matches = [index for name, index in self._region_index.items() if name.split(',')[0].strip() == key]
+        return matches[0] if len(matches) == 1 else None
+
+    def date_of(self, day):
+        """Date of a day index"""
+        return self.start_date + timedelta(days=int(day))
+
+    def day_index(self, on=None):
+        """Index of a day on the day axis, clamped to the last day; None before the first day"""
+        offset = (_as_date(on) - self.start_date).days
+        if offset < 0 or not self.prices.shape[2]:
+            return None
+        return min(offset, self.prices.shape[2] - 1)
+
+
+class MarketPriceService:
+    """
+    Service answering price lookups from the in-memory price index
+    """
+
+    def __init__(self, path=DEFAULT_PRICES_PATH, check_interval=5.0):
+        """
+        Initialize the market price service
+
+        Args:
+            path: Path of the crop price JSON file
+            check_interval: Seconds between checks of the file's modification time
+        """
+        self.path = str(path)
+        self.check_interval = check_interval
+        self._index = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def index(self):
+        """Current MarketPriceIndex, reloaded when the file has changed"""
+        now = time.monotonic()
+        if self._index is None or now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                mtime = None
+            if self._index is None or mtime != self._index.mtime:
+                self._reload(mtime)
+        return self._index
+
+    def _reload(self, mtime):
+        with self._lock:
+            if self._index is not None and self._index.mtime == mtime:
+                return
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Error loading crop prices from {self.path}: {str(e)}")
+                if self._index is None:
+                    self._index = MarketPriceIndex({}, mtime)
+                return
+            self._index = MarketPriceIndex(data, mtime)
+            logger.info(f"Loaded crop prices for {len(self._index.crops)} crops and {len(self._index.regions)} regions")
+
+    def crops(self):
+        return list(self.index.crops)
+
+    def regions(self):
+        return list(self.index.regions)
+
+    def resolve_region(self, region):
+        """Full region name for a region name with or without country, or None"""
+        index = self.index
+        position = index.region_index(region)
+        return index.regions[position] if position is not None else None
+
+    def current_price(self, crop, region, on=None):
+        """
+        Latest price on or before a day (default today)
+
+        Returns:
+            float, or None without data
+        """
+        index = self.index
+        c, r, d = index.crop_index(crop), index.region_index(region), index.day_index(on)
+        if c is None or r is None or d is None:
+            return None
+        price = index.filled[c, r, d]
+        return None if np.isnan(price) else float(price)
+
+    def nearest_region(self, latitude, longitude, max_distance_km=MAX_REGION_DISTANCE_KM):
+        """
+        Market region closest to a point
+
+        Returns:
+            Full region name, or None when no region with prices is within max_distance_km
+        """
+        if latitude is None or longitude is None:
+            return None
+
+        best, best_distance = None, max_distance_km
+        for region in self.index.regions:
+            if region not in REGION_COORDINATES:
+                continue
+            distance = _distance_km(latitude, longitude, *REGION_COORDINATES[region])
+            if distance <= best_distance:
+                best, best_distance = region, distance
+        return best
+
+    def locate_region(self, location=None, latitude=None, longitude=None):
+        """
+        Market region for a location name ('Rift Valley') or, failing that, for coordinates
+
+        Returns:
+            Full region name, or None
+        """
+        return self.resolve_region(location) or self.nearest_region(latitude, longitude)
+
+    def price_date(self, crop, region, on=None):
+        """
+        Date of the observation behind the price on a day (default today)
+
+        Returns:
+            date, or None without data
+        """
+        index = self.index
+        c, r, d = index.crop_index(crop), index.region_index(region), index.day_index(on)
+        if c is None or r is None or d is None or np.isnan(index.filled[c, r, d]):
+            return None
+        return index.date_of(index.observed[c, r, d])
+
+    def is_stale(self, price_date, on=None):
+        """Whether a price date is more than STALE_AFTER_DAYS before a day (default today)"""
+        return price_date is None or (_as_date(on) - price_date).days > STALE_AFTER_DAYS
+
+    def price_change(self, crop, region, on=None, days=7):
+        """
+        Price change over a number of days (default week-over-week)
+
+        The change is measured back from the requested day, or from the last
+        day of the data when the data ends earlier, so a stale price file still
+        yields real changes. price_date and stale tell how old the data is.
+
+        Returns:
+            dict with current, previous, change, change_percent, direction,
+            price_date and stale, or None without data
+        """
+        requested = _as_date(on)
+        on = min(requested, self.index.end_date)
+        current = self.current_price(crop, region, on)
+        previous = self.current_price(crop, region, on - timedelta(days=days))
+        if current is None or previous is None:
+            return None
+        price_date = self.price_date(crop, region, on)
+
+        change = current - previous
+        return {
+            "current": round(current, 2),
+            "previous": round(previous, 2),
+            "change": round(change, 2),
+            "change_percent": round(change / previous * 100, 1) if previous > 0 else 0.0,
+            "direction": "up" if change > 0 else "down" if change < 0 else "stable",
+            "price_date": price_date.isoformat(),
+            "stale": self.is_stale(price_date, requested)
+        }
+
+    def history(self, crop, region, days=30, end=None):
+        """
+        Daily prices for the days up to end (default today), oldest first
+
+        Returns:
+            list of {'date', 'price'} dictionaries, empty without data
+        """
+        index = self.index
+        c, r, d = index.crop_index(crop), index.region_index(region), index.day_index(end)
+        if c is None or r is None or d is None:
+            return []
+
+        start = max(0, d - days + 1)
+        values = index.filled[c, r, start:d + 1]
+        return [
+            {"date": (index.start_date + timedelta(days=start + offset)).isoformat(), "price": round(float(price), 2)}
+            for offset, price in enumerate(values) if not np.isnan(price)
+        ]
+
+
+# Shared by every caller in the process
+market_price_service = MarketPriceService()
@@ -4,18 +4,28 @@ This module provides functionality to fetch and generate realistic data for demo
 """
 import os
 import json
-import random
 import requests
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor
 
+from simulation import entity_random, keyed_uniform
+
+# Day the price trend is measured from, so a date's price does not depend on the run day
+PRICE_TREND_EPOCH = datetime(2025, 1, 1).date()
+
 class DataScraper:
     """Main class for scraping and generating data for the AgriFinanceIntelligence platform."""
     
-    def __init__(self):
-        """Initialize the data scraper with API keys and configuration."""
+    def __init__(self, seed=None):
+        """
+        Initialize the data scraper with API keys and configuration.
+        
+        Args:
+            seed (int, optional): Simulation seed, defaults to SIMULATION_SEED
+        """
+        self.seed = seed
         self.weather_api_key = os.environ.get('OPENWEATHER_API_KEY', 'your_openweather_api_key')
         self.nasa_api_key = os.environ.get('NASA_API_KEY', 'your_nasa_api_key')
         self.worldbank_base_url = "https://api.worldbank.org/v2"
@@ -57,40 +67,43 @@ class DataScraper:
         
         # In a real implementation, this would use the OpenWeatherMap API
         # For demonstration, we'll generate realistic weather data
-        weather_data = []
-        
-        base_temp = random.uniform(22, 28)  # Base temperature for tropical regions
-        base_rain = random.uniform(0, 5)    # Base rainfall in mm
-        
-        for day in range(days_back):
-            date = datetime.now() - timedelta(days=day)
-            
-            # Add some randomness and seasonal variation
-            temp_variation = random.uniform(-3, 3)
-            seasonal_factor = np.sin(np.pi * date.timetuple().tm_yday / 183) * 3
-            
-            temp_max = base_temp + temp_variation + seasonal_factor + random.uniform(0, 2)
-            temp_min = base_temp + temp_variation + seasonal_factor - random.uniform(3, 5)
-            temp_avg = (temp_max + temp_min) / 2
-            
-            # Rainfall - more in rainy season
-            rain_seasonal = max(0, np.sin(np.pi * date.timetuple().tm_yday / 183) * 15)
-            rainfall = max(0, base_rain + rain_seasonal + random.uniform(-2, 10))
-            
-            # Humidity correlates somewhat with rainfall
-            humidity = min(95, max(50, 65 + rainfall * 2 + random.uniform(-10, 10)))
-            
-            weather_data.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'temperature_max': round(temp_max, 1),
-                'temperature_min': round(temp_min, 1),
-                'temperature_avg': round(temp_avg, 1),
-                'precipitation': round(rainfall, 1),
-                'humidity': round(humidity, 1),
-                'wind_speed': round(random.uniform(2, 15), 1),
-            })
-        
-        return weather_data
+        location = self._location_key(lat, lon)
+        dates = self._past_dates(days_back)
+        day_of_year = np.array([date.timetuple().tm_yday for date in dates])
+        
+        # Base climate of the location, the same on every run
+        base = self._uniform('weather.base', location, ['base'], draws=(2,))[0]
+        base_temp = 22 + 6 * base[0]  # Base temperature for tropical regions
+        base_rain = 5 * base[1]       # Base rainfall in mm
+        
+        # Variation per (location, date), the same whichever day the data is generated
+        draws = self._uniform('weather', location, dates, draws=(6,))
+        temp_variation = -3 + 6 * draws[:, 0]
+        seasonal_factor = np.sin(np.pi * day_of_year / 183) * 3
+        
+        temp_max = base_temp + temp_variation + seasonal_factor + 2 * draws[:, 1]
+        temp_min = base_temp + temp_variation + seasonal_factor - (3 + 2 * draws[:, 2])
+        temp_avg = (temp_max + temp_min) / 2
+        
+        # Rainfall - more in rainy season
+        rain_seasonal = np.maximum(0, np.sin(np.pi * day_of_year / 183) * 15)
+        rainfall = np.maximum(0, base_rain + rain_seasonal - 2 + 12 * draws[:, 3])
+        
+        # Humidity correlates somewhat with rainfall
+        humidity = np.clip(65 + rainfall * 2 - 10 + 20 * draws[:, 4], 50, 95)
+        wind_speed = 2 + 13 * draws[:, 5]
+        
+        return [
+            {
+                'temperature_max': round(float(temp_max[i]), 1),
+                'temperature_min': round(float(temp_min[i]), 1),
+                'temperature_avg': round(float(temp_avg[i]), 1),
+                'precipitation': round(float(rainfall[i]), 1),
+                'humidity': round(float(humidity[i]), 1),
+                'wind_speed': round(float(wind_speed[i]), 1),
+            }
+            for i in range(len(dates))
+        ]
     
     def fetch_ndvi_data(self, lat, lon, days_back=30):
         """
@@ -108,28 +121,28 @@ class DataScraper:
         
         # In a real implementation, this would use NASA's API
         # For demonstration, we'll generate realistic NDVI data
-        ndvi_data = []
+        location = self._location_key(lat, lon)
+        dates = self._past_dates(days_back)
+        day_of_year = np.array([date.timetuple().tm_yday for date in dates])
         
         # Base NDVI value - between 0 and 1, higher is greener vegetation
-        base_ndvi = random.uniform(0.4, 0.7)
+        base_ndvi = 0.4 + 0.3 * self._uniform('ndvi.base', location, ['base'])[0, 0]
         
-        for day in range(days_back):
-            date = datetime.now() - timedelta(days=day)
-            
-            # Add seasonal variation and random noise
-            seasonal_factor = np.sin(np.pi * date.timetuple().tm_yday / 183) * 0.15
-            daily_variation = random.uniform(-0.05, 0.05)
-            
-            ndvi_value = max(0, min(1, base_ndvi + seasonal_factor + daily_variation))
-            
-            ndvi_data.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'ndvi_value': round(ndvi_value, 3),
-            })
+        # Add seasonal variation and random noise per (location, date)
+        seasonal_factor = np.sin(np.pi * day_of_year / 183) * 0.15
+        daily_variation = -0.05 + 0.1 * self._uniform('ndvi', location, dates)[:, 0]
+        
+        ndvi_values = np.clip(base_ndvi + seasonal_factor + daily_variation, 0, 1)
         
-        return ndvi_data
+        return [
+            {
+                'date': date.strftime('%Y-%m-%d'),
+                'ndvi_value': round(float(ndvi_values[i]), 3),
+            }
+            for i, date in enumerate(dates)
+        ]
     
-    def fetch_crop_prices(self, crop_name, country, days_back=365):
+    def fetch_crop_prices(self, crop_name, country, days_back=365, region=None):
         """
         Fetch or generate historical crop price data.
         
@@ -137,6 +150,7 @@ class DataScraper:
             crop_name (str): Name of the crop
             country (str): Country name
             days_back (int): Number of days of historical data
+            region (str, optional): Region name, markets in a country differ by region
             
         Returns:
             list: List of daily crop price data
@@ -145,41 +159,40 @@ class DataScraper:
         
         # In a real implementation, this would use an agricultural price API
         # For demonstration, we'll generate realistic price data
-        price_data = []
-        
-        # Base price depends on crop
-        base_prices = {
-            "Maize": random.uniform(150, 200),
-            "Rice": random.uniform(300, 400),
-            "Cassava": random.uniform(100, 150),
-            "Cocoa": random.uniform(2000, 2500),
-            "Coffee": random.uniform(1800, 2200),
-            "Sorghum": random.uniform(120, 180),
+        market = f"{crop_name}|{country}|{region or ''}"
+        dates = self._past_dates(days_back)
+        day_of_year = np.array([date.timetuple().tm_yday for date in dates])
+        
+        # Base price depends on crop, the trend on the market
+        base_price_ranges = {
+            "Maize": (150, 200),
+            "Rice": (300, 400),
+            "Cassava": (100, 150),
+            "Cocoa": (2000, 2500),
+            "Coffee": (1800, 2200),
+            "Sorghum": (120, 180),
         }
+        low, high = base_price_ranges.get(crop_name, (100, 300))
+        base = self._uniform('prices.base', market, ['base'], draws=(2,))[0]
+        base_price = low + (high - low) * base[0]
+        trend = -0.0001 + 0.0003 * base[1]  # Slight upward or downward trend per day
         
-        base_price = base_prices.get(crop_name, random.uniform(100, 300))
+        # Add seasonal variation, trend, and random noise per (market, date)
+        seasonal_factor = np.sin(np.pi * day_of_year / 183) * (base_price * 0.1)
+        trend_factor = trend * np.array([(PRICE_TREND_EPOCH - date).days for date in dates]) * base_price
+        daily_variation = base_price * (-0.02 + 0.04 * self._uniform('prices', market, dates)[:, 0])
         
-        # Generate daily prices with trend and seasonality
-        trend = random.uniform(-0.0001, 0.0002)  # Slight upward or downward trend
+        prices = np.maximum(base_price * 0.7, base_price + seasonal_factor + trend_factor + daily_variation)
         
-        for day in range(days_back):
-            date = datetime.now() - timedelta(days=day)
-            
-            # Add seasonal variation, trend, and random noise
-            seasonal_factor = np.sin(np.pi * date.timetuple().tm_yday / 183) * (base_price * 0.1)
-            trend_factor = trend * day * base_price
-            daily_variation = random.uniform(-base_price * 0.02, base_price * 0.02)
-            
-            price = max(base_price * 0.7, base_price + seasonal_factor - trend_factor + daily_variation)
-            
-            price_data.append({
+        return [
+            {
                 'date': date.strftime('%Y-%m-%d'),
-                'price': round(price, 2),
+                'price': round(float(prices[i]), 2),
                 'currency': 'USD',
                 'unit': 'per ton'
-            })
-        
-        return price_data
+            }
+            for i, date in enumerate(dates)
+        ]
     
     def generate_loan_data(self, num_loans=100):
         """
@@ -195,6 +208,9 @@ class DataScraper:
         
         loan_data = []
         
+        # Deterministic per day
+        rng = self._rng('loans', num_loans)
+        
         # Loan statuses and their probabilities
         statuses = ["PENDING", "APPROVED", "DISBURSED", "REPAYING", "COMPLETED", "DEFAULTED", "REJECTED"]
         status_probs = [0.05, 0.1, 0.15, 0.4, 0.2, 0.05, 0.05]
@@ -211,18 +227,18 @@ class DataScraper:
         
         for i in range(num_loans):
             # Select random crop and region
-            crop = random.choice(self.crops)
-            region = random.choice(self.regions)
+            crop = rng.choice(self.crops)
+            region = rng.choice(self.regions)
             
             # Generate loan amount based on crop
             amount_range = crop_loan_ranges.get(crop["name"], (500, 3000))
-            amount = round(random.uniform(*amount_range), 2)
+            amount = round(rng.uniform(*amount_range), 2)
             
             # Generate dates
-            application_date = datetime.now() - timedelta(days=random.randint(30, 730))
+            application_date = datetime.now() - timedelta(days=rng.randint(30, 730))
             
             # Status determines other dates
-            status = random.choices(statuses, status_probs)[0]
+            status = rng.choices(statuses, status_probs)[0]
             
             approval_date = None
             disbursement_date = None
@@ -230,29 +246,29 @@ class DataScraper:
             actual_completion_date = None
             
             if status != "PENDING" and status != "REJECTED":
-                approval_date = application_date + timedelta(days=random.randint(5, 15))
+                approval_date = application_date + timedelta(days=rng.randint(5, 15))
                 
             if status in ["DISBURSED", "REPAYING", "COMPLETED", "DEFAULTED"]:
-                disbursement_date = approval_date + timedelta(days=random.randint(3, 10))
-                term_months = random.choice([6, 12, 18, 24])
+                disbursement_date = approval_date + timedelta(days=rng.randint(3, 10))
+                term_months = rng.choice([6, 12, 18, 24])
                 expected_completion_date = disbursement_date + timedelta(days=term_months * 30)
                 
             if status in ["COMPLETED", "DEFAULTED"]:
                 if status == "COMPLETED":
                     # Completed loans might finish early or on time
-                    days_early = random.randint(-10, 30)
+                    days_early = rng.randint(-10, 30)
                     actual_completion_date = expected_completion_date - timedelta(days=days_early)
                 else:
                     # Defaulted loans typically default after some payments
-                    default_after = random.uniform(0.3, 0.8)  # Default after 30-80% of term
+                    default_after = rng.uniform(0.3, 0.8)  # Default after 30-80% of term
                     term_days = (expected_completion_date - disbursement_date).days
                     actual_completion_date = disbursement_date + timedelta(days=int(term_days * default_after))
             
             loan_data.append({
                 'loan_id': f"L{100000 + i}",
                 'amount': amount,
-                'interest_rate': round(random.uniform(5, 15), 2),
-                'term_months': random.choice([6, 12, 18, 24]),
+                'interest_rate': round(rng.uniform(5, 15), 2),
+                'term_months': rng.choice([6, 12, 18, 24]),
                 'status': status,
                 'purpose': f"{crop['name']} cultivation",
                 'application_date': application_date.strftime('%Y-%m-%d'),
@@ -281,16 +297,19 @@ class DataScraper:
         
         credit_data = []
         
+        # Deterministic per day
+        rng = self._rng('credit_scores', num_farmers)
+        
         for i in range(num_farmers):
             # Base score between 300-850 (standard credit score range)
-            base_score = random.randint(300, 850)
+            base_score = rng.randint(300, 850)
             
             # Components that make up the score
-            repayment_history = random.uniform(0.3, 1.0)
-            farm_productivity = random.uniform(0.3, 1.0)
-            market_conditions = random.uniform(0.4, 1.0)
-            relationship_length = random.uniform(0.2, 1.0)
-            climate_risk = random.uniform(0.3, 1.0)
+            repayment_history = rng.uniform(0.3, 1.0)
+            farm_productivity = rng.uniform(0.3, 1.0)
+            market_conditions = rng.uniform(0.4, 1.0)
+            relationship_length = rng.uniform(0.2, 1.0)
+            climate_risk = rng.uniform(0.3, 1.0)
             
             # Weights for each component
             repayment_weight = 0.3
@@ -315,8 +334,8 @@ class DataScraper:
             credit_data.append({
                 'farmer_id': f"F{10000 + i}",
                 'score': final_score,
-                'generation_date': (datetime.now() - timedelta(days=random.randint(0, 90))).strftime('%Y-%m-%d'),
-                'valid_until': (datetime.now() + timedelta(days=random.randint(90, 180))).strftime('%Y-%m-%d'),
+                'generation_date': (datetime.now() - timedelta(days=rng.randint(0, 90))).strftime('%Y-%m-%d'),
+                'valid_until': (datetime.now() + timedelta(days=rng.randint(90, 180))).strftime('%Y-%m-%d'),
                 'components': [
                     {'name': 'Repayment History', 'value': round(repayment_history, 2), 'weight': repayment_weight},
                     {'name': 'Farm Productivity', 'value': round(farm_productivity, 2), 'weight': productivity_weight},
@@ -351,23 +370,26 @@ class DataScraper:
             region_key = f"{region['name']}, {region['country']}"
             region_risks = []
             
+            # Deterministic per region and day
+            rng = self._rng('climate_risks', region_key)
+            
             # Each region gets 3-5 risk assessments
-            num_risks = random.randint(3, 5)
-            selected_risks = random.sample(risk_types, num_risks)
+            num_risks = rng.randint(3, 5)
+            selected_risks = rng.sample(risk_types, num_risks)
             
             for risk_type in selected_risks:
                 # Determine risk level with weighted probability
-                risk_level = random.choices(risk_levels, level_probs)[0]
+                risk_level = rng.choices(risk_levels, level_probs)[0]
                 
                 # Assessment date within last 60 days
-                assessment_date = datetime.now() - timedelta(days=random.randint(0, 60))
+                assessment_date = datetime.now() - timedelta(days=rng.randint(0, 60))
                 
                 # Valid for 3-12 months
-                valid_months = random.randint(3, 12)
+                valid_months = rng.randint(3, 12)
                 valid_until = assessment_date + timedelta(days=valid_months * 30)
                 
                 # Probability of occurrence (0-1)
-                probability = random.uniform(0.1, 0.9)
+                probability = rng.uniform(0.1, 0.9)
                 
                 region_risks.append({
                     'risk_type': risk_type,
@@ -375,15 +397,15 @@ class DataScraper:
                     'assessment_date': assessment_date.strftime('%Y-%m-%d'),
                     'valid_until': valid_until.strftime('%Y-%m-%d'),
                     'probability': round(probability, 2),
-                    'potential_impact': self._generate_impact_description(risk_type, risk_level),
-                    'mitigation_measures': self._generate_mitigation_measures(risk_type)
+                    'potential_impact': self._generate_impact_description(risk_type, risk_level, rng),
+                    'mitigation_measures': self._generate_mitigation_measures(risk_type, rng)
                 })
             
             climate_risks[region_key] = region_risks
         
         return climate_risks
     
-    def _generate_impact_description(self, risk_type, risk_level):
+    def _generate_impact_description(self, risk_type, risk_level, rng):
         """Generate a description of potential impacts based on risk type and level."""
         impact_templates = {
             "Drought": [
@@ -443,8 +465,8 @@ class DataScraper:
         templates = impact_templates.get(risk_type, ["Potential impact on agricultural productivity."])
         
         # Select 2-3 impact statements
-        num_statements = min(len(templates), random.randint(2, 3))
-        selected_templates = random.sample(templates, num_statements)
+        num_statements = min(len(templates), rng.randint(2, 3))
+        selected_templates = rng.sample(templates, num_statements)
         
         # Get severity factors for this risk level
         factors = severity_factors.get(risk_level, severity_factors["MEDIUM"])
@@ -453,19 +475,19 @@ class DataScraper:
         formatted_statements = []
         for template in selected_templates:
             if "{yield_loss}" in template:
-                template = template.replace("{yield_loss}", str(random.randint(*factors["yield_loss"])))
+                template = template.replace("{yield_loss}", str(rng.randint(*factors["yield_loss"])))
             if "{cost}" in template:
-                template = template.replace("{cost}", str(random.randint(*factors["cost"])))
+                template = template.replace("{cost}", str(rng.randint(*factors["cost"])))
             if "{days}" in template:
-                template = template.replace("{days}", str(random.randint(*factors["days"])))
+                template = template.replace("{days}", str(rng.randint(*factors["days"])))
             if "{soil_loss}" in template:
-                template = template.replace("{soil_loss}", str(random.randint(*factors["soil_loss"])))
+                template = template.replace("{soil_loss}", str(rng.randint(*factors["soil_loss"])))
             
             formatted_statements.append(template)
         
         return " ".join(formatted_statements)
     
-    def _generate_mitigation_measures(self, risk_type):
+    def _generate_mitigation_measures(self, risk_type, rng):
         """Generate mitigation measures based on risk type."""
         mitigation_measures = {
             "Drought": [
@@ -523,11 +545,34 @@ class DataScraper:
         measures = mitigation_measures.get(risk_type, ["Implement climate-smart agricultural practices."])
         
         # Select 2-4 measures
-        num_measures = min(len(measures), random.randint(2, 4))
-        selected_measures = random.sample(measures, num_measures)
+        num_measures = min(len(measures), rng.randint(2, 4))
+        selected_measures = rng.sample(measures, num_measures)
         
         return " ".join(selected_measures)
     
+    def _location_key(self, lat, lon):
+        """Entity key of a location"""
+        return f"{lat:.4f},{lon:.4f}"
+    
+    def _past_dates(self, days_back):
+        """The last days_back calendar dates, newest first"""
+        today = datetime.now().date()
+        return [today - timedelta(days=day) for day in range(days_back)]
+    
+    def _uniform(self, namespace, entity, dates, draws=None):
+        """
+        Unit uniform draws keyed by (entity, date)
+        
+        Returns:
+            numpy.ndarray of shape (len(dates), *draws), or (len(dates), 1) without draws
+        """
+        values = keyed_uniform(f'data_scraper.{namespace}', [entity], dates, draws=draws, seed=self.seed)[0]
+        return values if draws else values[:, None]
+    
+    def _rng(self, *key):
+        """Random stream for one generated entity on today's date"""
+        return entity_random('data_scraper', *key, datetime.now(), seed=self.seed)
+    
     def scrape_all_data(self, output_dir="scraped_data"):
         """
         Scrape all types of data and save to JSON files.
@@ -567,7 +612,7 @@ class DataScraper:
             crop_prices = {}
             for region in self.regions:
                 region_key = f"{region['name']}, {region['country']}"
-                crop_prices[region_key] = self.fetch_crop_prices(crop['name'], region['country'])
+                crop_prices[region_key] = self.fetch_crop_prices(crop['name'], region['country'], region=region['name'])
             price_data[crop['name']] = crop_prices
         
         with open(os.path.join(output_dir, "crop_prices.json"), "w") as f:
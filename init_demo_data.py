@@ -26,6 +26,7 @@ from api.models import (
     WeatherForecast, WeatherCondition, ClimateRiskAssessment, RiskLevel
 )
 from api import db
+from api.services.crop_health_service import health_status_for
 
 def create_demo_farmers(count=5):
     """Create sample farmers"""
@@ -136,7 +137,9 @@ def create_demo_farms(farmers, farms_per_farmer=1):
                 longitude=longitude,
                 registration_date=farmer.registration_date + timedelta(days=random.randint(1, 30)),
                 last_ndvi_value=last_ndvi_value,
-                last_ndvi_date=last_ndvi_date
+                last_ndvi_date=last_ndvi_date,
+                ndvi_health_status=health_status_for(last_ndvi_value),
+                ndvi_trend="stable" if last_ndvi_value is not None else None
             )
             
             db.session.add(farm)
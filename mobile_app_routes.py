@@ -1,9 +1,14 @@
-from flask import Blueprint, render_template, jsonify, request
+from flask import Blueprint, render_template, jsonify, request, current_app
 import os
 import json
 from datetime import datetime, timedelta
 import random
 
+from simulation import entity_random
+from api.models import Farm
+from api.services.crop_health_service import crop_health_service
+from credit.services.market_price_service import market_price_service
+
 # Create the blueprint for mobile app routes
 mobile_app = Blueprint('mobile_app', __name__)
 
@@ -108,23 +113,27 @@ def get_weather():
 @mobile_app.route('/api/crop-health')
 def get_crop_health():
     """API endpoint to get crop health data for the mobile app"""
-    # In a production app, this would fetch real NDVI data from satellite imagery
-    # For now, we'll return simulated data
-    
-    farm_id = request.args.get('farm_id', 'farm001')
+    farm_id = request.args.get('farm_id', type=int)
     crop_type = request.args.get('crop_type', 'maize')
+    if farm_id is None:
+        return jsonify({"error": "farm_id is required"}), 400
     
-    # Base health value - would come from actual NDVI analysis in production
-    base_health = random.uniform(0.65, 0.85)
+    # Health and trend are precomputed when new NDVI arrives and stored on the farm
+    session = current_app.extensions['sqlalchemy'].session
+    farm = session.get(Farm, farm_id)
+    if not farm:
+        return jsonify({"error": "Farm not found"}), 404
     
-    # Convert to percentage for easier understanding by farmers
-    health_percent = round(base_health * 100)
+    health = crop_health_service.get_crop_health(farm)
+    if not health:
+        return jsonify({"error": "No crop health data available for this farm"}), 404
     
-    # Determine health status text
-    health_status = "Poor"
-    if health_percent > 25: health_status = "Fair"
-    if health_percent > 50: health_status = "Good"
-    if health_percent > 75: health_status = "Excellent"
+    base_health = health["ndvi_value"]
+    health_percent = health["health_percent"]
+    health_status = health["health_status"]
+    
+    # Deterministic per farm and day
+    rng = entity_random('crop_health', farm_id, datetime.now())
     
     # Generate some realistic issues that might be detected
     possible_issues = [
@@ -169,20 +178,19 @@ def get_crop_health():
         num_issues = 2
     elif health_percent < 75:
         num_issues = 1
-    elif random.random() < 0.3:  # Even healthy fields might have minor issues
+    elif rng.random() < 0.3:  # Even healthy fields might have minor issues
         num_issues = 1
     
-    issues = random.sample(possible_issues, min(num_issues, len(possible_issues)))
+    issues = rng.sample(possible_issues, min(num_issues, len(possible_issues)))
     
     # Field sections for the visualization (simplified)
     field_sections = []
     
-    # Create a grid of sections with health values
+    # Create a grid of sections with health values around the farm's NDVI
     grid_size = 5
     for i in range(grid_size):
         for j in range(grid_size):
-            # Base health with some variation
-            section_health = min(1.0, max(0.0, base_health + random.uniform(-0.15, 0.15)))
+            section_health = min(1.0, max(0.0, base_health + rng.uniform(-0.15, 0.15)))
             
             # If there are issues, make those areas show lower health
             for issue in issues:
@@ -191,7 +199,7 @@ def get_crop_health():
                     ("Eastern" in issue["location"] and j > 3) or
                     ("Western" in issue["location"] and j < 2) or
                     ("Central" in issue["location"] and 1 < i < 4 and 1 < j < 4)):
-                    section_health = max(0.3, section_health - random.uniform(0.1, 0.3))
+                    section_health = max(0.3, section_health - rng.uniform(0.1, 0.3))
             
             field_sections.append({
                 "row": i,
@@ -204,118 +212,85 @@ def get_crop_health():
         "crop_type": crop_type,
         "planting_date": "2025-03-15",
         "growth_stage": "Vegetative",
-        "days_to_harvest": random.randint(45, 60),
+        "days_to_harvest": rng.randint(45, 60),
         "overall_health": {
             "value": base_health,
             "percent": health_percent,
             "status": health_status,
-            "trend": random.choice(["improving", "stable", "declining"])
+            "trend": health["trend"]
         },
         "field_health_map": field_sections,
         "detected_issues": issues,
-        "last_updated": datetime.now().strftime("%Y-%m-%d")
+        "last_updated": health["ndvi_date"][:10] if health["ndvi_date"] else None
     })
 
 @mobile_app.route('/api/market-prices')
 def get_market_prices():
     """API endpoint to get crop market prices for the mobile app"""
-    # In a production app, this would fetch real data from market price APIs or databases
-    
     crop_type = request.args.get('crop_type', 'all')
     region = request.args.get('region', 'Eastern Region')
     
-    # Base prices for common crops in Ghana (in GH₵ per ton)
-    base_prices = {
-        "maize": 850,
-        "rice": 1200,
-        "cassava": 650,
-        "yam": 950,
-        "cocoa": 16500,
-        "plantain": 1100
-    }
-    
-    # Generate price history (last 30 days)
-    days = 30
-    today = datetime.now()
+    # Prices come from the scraped market price history
+    region_name = market_price_service.resolve_region(region)
+    if not region_name:
+        return jsonify({"error": f"No market prices available for region: {region}"}), 404
     
-    price_history = {}
-    for crop, base in base_prices.items():
-        history = []
-        
-        # Start with the current price and work backwards with realistic variations
-        current_price = base
-        
-        for i in range(days):
-            day = today - timedelta(days=i)
-            
-            # Add some daily variation (between -2% and +2%)
-            price_change = current_price * random.uniform(-0.02, 0.02)
-            
-            # Add some trends over time
-            trend_factor = random.uniform(-0.005, 0.005)  # Longer term trend
-            
-            # For the historical prices, work backwards
-            if i > 0:
-                prev_price = history[0]["price"]
-                current_price = max(prev_price * 0.95, 
-                                   prev_price + price_change + (prev_price * trend_factor))
-            
-            history.insert(0, {
-                "date": day.strftime("%Y-%m-%d"),
-                "price": round(current_price, 2)
-            })
-        
-        price_history[crop] = history
+    crops = market_price_service.crops()
+    if crop_type != 'all':
+        crops = [crop for crop in crops if crop.lower() == crop_type.lower()]
     
-    # Calculate price changes for the UI
+    price_history = {}
     price_changes = {}
-    for crop, history in price_history.items():
-        if len(history) >= 2:
-            current = history[-1]["price"]
-            week_ago = history[max(0, len(history)-8)]["price"]
-            change = current - week_ago
-            change_pct = (change / week_ago) * 100 if week_ago > 0 else 0
-            
-            price_changes[crop] = {
-                "current": current,
-                "change": round(change, 2),
-                "change_percent": round(change_pct, 1),
-                "direction": "up" if change > 0 else "down" if change < 0 else "stable"
-            }
+    for crop in crops:
+        change = market_price_service.price_change(crop, region_name)
+        if change is None:
+            continue
+        price_history[crop.lower()] = market_price_service.history(crop, region_name, days=30)
+        price_changes[crop.lower()] = {
+            "current": change["current"],
+            "change": change["change"],
+            "change_percent": change["change_percent"],
+            "direction": change["direction"],
+            "price_date": change["price_date"],
+            "stale": change["stale"]
+        }
     
     # Market insights based on price trends
     insights = []
     
-    # Identify best selling opportunities
-    best_crop = max(price_changes.items(), key=lambda x: x[1]["change_percent"])
-    if best_crop[1]["change_percent"] > 5:
-        insights.append(f"{best_crop[0].title()} prices are rising significantly. Consider selling soon.")
-    
-    # Identify concerning trends
-    worst_crop = min(price_changes.items(), key=lambda x: x[1]["change_percent"])
-    if worst_crop[1]["change_percent"] < -5:
-        insights.append(f"{worst_crop[0].title()} prices are falling. Consider holding if possible.")
-    
-    # Add general market insights
-    if random.random() > 0.7:
-        insights.append("Overall market prices are stable for the coming weeks.")
-    else:
-        insights.append("Market analysts predict price increases after the upcoming holiday.")
+    if price_changes:
+        # Identify best selling opportunities
+        best_crop = max(price_changes.items(), key=lambda x: x[1]["change_percent"])
+        if best_crop[1]["change_percent"] > 5:
+            insights.append(f"{best_crop[0].title()} prices are rising significantly. Consider selling soon.")
+        
+        # Identify concerning trends
+        worst_crop = min(price_changes.items(), key=lambda x: x[1]["change_percent"])
+        if worst_crop[1]["change_percent"] < -5:
+            insights.append(f"{worst_crop[0].title()} prices are falling. Consider holding if possible.")
+        
+        # Add general market insights
+        if all(abs(change["change_percent"]) < 2 for change in price_changes.values()):
+            insights.append("Overall market prices are stable for the coming weeks.")
+        elif sum(change["change_percent"] for change in price_changes.values()) > 0:
+            insights.append("Market prices are trending upward across most crops this week.")
+        else:
+            insights.append("Market prices are trending downward across most crops this week.")
     
-    # Filter by crop type if specified
-    if crop_type != 'all' and crop_type in base_prices:
-        filtered_prices = {crop_type: price_history[crop_type]}
-        filtered_changes = {crop_type: price_changes[crop_type]}
-    else:
-        filtered_prices = price_history
-        filtered_changes = price_changes
+    # Date of the newest price shown, older than today when the price data is stale
+    price_dates = [change["price_date"] for change in price_changes.values()]
+    last_updated = max(price_dates) if price_dates else None
     
+    any_crop = next(iter(crops), None)
     return jsonify({
-        "region": region,
-        "prices": filtered_changes,
-        "history": filtered_prices,
+        "region": region_name,
+        "currency": market_price_service.index.currency.get(any_crop),
+        "unit": market_price_service.index.unit.get(any_crop),
+        "prices": price_changes,
+        "history": price_history,
         "insights": insights,
-        "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        "last_updated": last_updated,
+        "stale": all(change["stale"] for change in price_changes.values()) if price_changes else True
     })
 
 @mobile_app.route('/api/credit-score')
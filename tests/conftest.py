@@ -0,0 +1,22 @@
+import pytest
+
+from api import create_app, db
+from api.http_cache import http_cache
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """API app on an empty SQLite database"""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'api.db'}")
+    app = create_app()
+    app.config["TESTING"] = True
+    http_cache.clear()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
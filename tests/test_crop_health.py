@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from api import db
+from api.models import CropType, Farm, Farmer
+from api.services.crop_health_service import CropHealthService
+from api.services.satellite_cache import NDVICacheStore
+from api.services.satellite_service import SatelliteService
+from mobile_app_routes import mobile_app
+
+
+@pytest.fixture
+def service(tmp_path):
+    """Crop health service over an empty NDVI cache"""
+    satellite = SatelliteService()
+    satellite.cache = NDVICacheStore(tmp_path / "ndvi_cache.sqlite3")
+    return CropHealthService(satellite=satellite)
+
+
+@pytest.fixture
+def farm_ids(app):
+    with app.app_context():
+        farmer = Farmer(first_name="Ama", last_name="Owusu", phone_number="+233301", location="Eastern Region")
+        db.session.add(farmer)
+        db.session.flush()
+        located = Farm(farmer_id=farmer.id, name="Hillside", size_hectares=2.0, primary_crop=CropType.MAIZE,
+                       location="Eastern Region", latitude=6.5735, longitude=0.2396)
+        unlocated = Farm(farmer_id=farmer.id, name="Lowland", size_hectares=1.0, primary_crop=CropType.RICE,
+                         location="Eastern Region")
+        db.session.add_all([located, unlocated])
+        db.session.commit()
+        return located.id, unlocated.id
+
+
+def test_update_farm_stores_health_and_trend(app, farm_ids, service):
+    with app.app_context():
+        farm = db.session.get(Farm, farm_ids[1])
+        service.update_farm(farm, 0.3, datetime(2025, 1, 1))
+        health = service.update_farm(farm, 0.6, datetime(2025, 1, 17))
+        db.session.commit()
+
+        assert farm.ndvi_health_status == health["health_status"] == "Good"
+        assert farm.ndvi_trend == health["trend"] == "improving"
+
+        service.clear_farm(farm)
+        assert service.get_crop_health(farm) is None
+
+
+def test_refresh_farms_only_updates_outdated_located_farms(app, farm_ids, service):
+    with app.app_context():
+        assert service.refresh_farms(db.session) == 1
+        db.session.commit()
+        located, unlocated = db.session.get(Farm, farm_ids[0]), db.session.get(Farm, farm_ids[1])
+        assert located.ndvi_health_status is not None
+        assert unlocated.last_ndvi_value is None
+
+        # No newer satellite sample yet
+        assert service.refresh_farms(db.session, now=datetime.utcnow() + timedelta(days=2)) == 0
+
+
+def test_mobile_crop_health_reads_stored_state(app, farm_ids, service):
+    app.register_blueprint(mobile_app, url_prefix="/mobile")
+    client = app.test_client()
+
+    assert client.get("/mobile/api/crop-health").status_code == 400
+    assert client.get("/mobile/api/crop-health?farm_id=999").status_code == 404
+    assert client.get(f"/mobile/api/crop-health?farm_id={farm_ids[0]}").status_code == 404
+
+    with app.app_context():
+        farm = db.session.get(Farm, farm_ids[0])
+        service.update_farm(farm, 0.82, datetime(2025, 2, 1))
+        db.session.commit()
+
+    response = client.get(f"/mobile/api/crop-health?farm_id={farm_ids[0]}")
+    assert response.status_code == 200
+    health = response.get_json()["overall_health"]
+    assert health == {"value": 0.82, "percent": 82, "status": "Excellent", "trend": "stable"}
+    assert response.get_json()["last_updated"] == "2025-02-01"
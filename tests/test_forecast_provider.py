@@ -0,0 +1,61 @@
+import threading
+import time
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from api.models import WeatherForecast
+from api.models.base import Base
+from api.services.forecast_provider import ForecastProvider
+from api.services.weather_service import weather_service
+
+
+class SlowWeather:
+    """Weather service counting forecast generations, each taking a while"""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def fetch_forecast(self, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return weather_service.fetch_forecast(*args, **kwargs)
+
+
+def test_concurrent_misses_for_a_cell_generate_once(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'forecasts.db'}")
+    Base.metadata.create_all(engine)
+    weather = SlowWeather()
+    provider = ForecastProvider(weather=weather)
+
+    barrier = threading.Barrier(8)
+    results = []
+    errors = []
+
+    def request():
+        with Session(engine) as session:
+            barrier.wait()
+            try:
+                results.append([forecast.id for forecast in provider.get_forecasts(session, 6.5735, 0.2396, "Koforidua", 5)])
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert weather.calls == 1
+    assert len(results) == 8
+    assert all(ids == results[0] and len(ids) == 5 for ids in results)
+
+    with Session(engine) as session:
+        assert session.execute(select(func.count(WeatherForecast.id))).scalar() == 5
+        # Later requests for the cell, from a nearby point, read the stored rows
+        provider.get_forecasts(session, 6.5736, 0.2397, "Koforidua", 5)
+    assert weather.calls == 1
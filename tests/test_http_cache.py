@@ -0,0 +1,124 @@
+import gzip
+import json
+
+import pytest
+from flask import Flask, jsonify
+
+from api.http_cache import HTTPCache
+
+
+@pytest.fixture
+def cache_app():
+    """App with a cached view over mutable data and a view writing to it"""
+    app = Flask(__name__)
+    cache = HTTPCache(app, min_size=100)
+    state = {"version": 1, "values": list(range(50)), "renders": 0}
+
+    @app.route("/values")
+    @cache.cached(ttl=600, version=lambda: state["version"])
+    def values():
+        state["renders"] += 1
+        return jsonify({"values": state["values"]})
+
+    @app.route("/values", methods=["POST"])
+    def add_value():
+        state["values"].append(len(state["values"]))
+        return jsonify({"count": len(state["values"])}), 201
+
+    @app.route("/small")
+    def small():
+        return jsonify({"ok": True})
+
+    return app, cache, state
+
+
+def test_unchanged_body_revalidates_to_304(cache_app):
+    app, cache, _ = cache_app
+    client = app.test_client()
+
+    response = client.get("/values")
+    etag = response.headers["ETag"]
+    assert response.status_code == 200
+
+    response = client.get("/values", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.get_data() == b""
+
+    response = client.get("/values", headers={"If-None-Match": '"something-else"'})
+    assert response.status_code == 200
+    assert cache.stats()["not_modified"] == 1
+
+
+def test_gzip_when_accepted(cache_app):
+    app, _, state = cache_app
+    client = app.test_client()
+
+    response = client.get("/values", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert json.loads(gzip.decompress(response.get_data())) == {"values": state["values"]}
+
+    # A compressed variant still revalidates against the plain ETag
+    plain = client.get("/values")
+    assert "Content-Encoding" not in plain.headers
+    response = client.get("/values", headers={"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+    assert plain.headers["ETag"] == response.headers["ETag"]
+
+
+@pytest.mark.parametrize("accept_encoding", ["gzip;q=0", "gzip;q=0.0", "gzip; q=0.000", "*;q=0", "identity", ""])
+def test_no_compression_when_refused(cache_app, accept_encoding):
+    app, _, _ = cache_app
+
+    response = app.test_client().get("/values", headers={"Accept-Encoding": accept_encoding})
+
+    assert "Content-Encoding" not in response.headers
+
+
+def test_small_bodies_are_not_compressed(cache_app):
+    app, _, _ = cache_app
+
+    response = app.test_client().get("/small", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+
+
+def test_cached_body_is_reused(cache_app):
+    app, cache, state = cache_app
+    client = app.test_client()
+
+    first = client.get("/values")
+    second = client.get("/values")
+
+    assert state["renders"] == 1
+    assert first.get_data() == second.get_data()
+    assert cache.stats()["body_hits"] == 1
+
+
+def test_write_clears_cached_bodies(cache_app):
+    app, cache, state = cache_app
+    client = app.test_client()
+
+    client.get("/values")
+    assert client.post("/values").status_code == 201
+    assert cache.stats()["cached_bodies"] == 0
+
+    response = client.get("/values")
+    assert state["renders"] == 2
+    assert len(response.get_json()["values"]) == 51
+
+
+def test_new_data_version_misses(cache_app):
+    app, _, state = cache_app
+    client = app.test_client()
+
+    client.get("/values")
+    # Data changed elsewhere, for example by another worker, without clearing this process's cache
+    state["values"].append(99)
+    assert len(client.get("/values").get_json()["values"]) == 50
+
+    state["version"] += 1
+    response = client.get("/values")
+    assert state["renders"] == 2
+    assert response.get_json()["values"][-1] == 99
@@ -0,0 +1,105 @@
+import json
+from datetime import date
+
+import pytest
+from flask import Flask
+
+from credit.services.market_price_service import MarketPriceService
+from mobile_app_routes import mobile_app
+
+
+def price_points(prices):
+    return [
+        {"date": day, "price": price, "currency": "USD", "unit": "per ton"}
+        for day, price in prices.items()
+    ]
+
+
+@pytest.fixture
+def service(tmp_path):
+    path = tmp_path / "crop_prices.json"
+    path.write_text(json.dumps({
+        "Maize": {
+            "Eastern Region, Ghana": price_points({
+                "2025-01-01": 100.0, "2025-01-04": 110.0, "2025-01-08": 120.0, "2025-01-11": 121.0
+            }),
+            "Ashanti Region, Ghana": price_points({"2025-01-02": 200.0, "2025-01-11": 190.0})
+        }
+    }))
+    return MarketPriceService(path)
+
+
+def test_prices_are_forward_filled(service):
+    assert service.current_price("Maize", "Eastern Region, Ghana", date(2025, 1, 3)) == 100.0
+    assert service.price_date("Maize", "Eastern Region, Ghana", date(2025, 1, 3)) == date(2025, 1, 1)
+    assert service.current_price("maize", "eastern region", date(2025, 1, 6)) == 110.0
+    assert service.history("Maize", "Eastern Region", days=5, end=date(2025, 1, 5)) == [
+        {"date": "2025-01-01", "price": 100.0},
+        {"date": "2025-01-02", "price": 100.0},
+        {"date": "2025-01-03", "price": 100.0},
+        {"date": "2025-01-04", "price": 110.0},
+        {"date": "2025-01-05", "price": 110.0},
+    ]
+
+
+def test_no_price_before_the_first_observation(service):
+    assert service.current_price("Maize", "Ashanti Region, Ghana", date(2025, 1, 1)) is None
+    assert service.current_price("Maize", "Eastern Region, Ghana", date(2024, 12, 31)) is None
+    assert service.current_price("Rice", "Eastern Region, Ghana", date(2025, 1, 3)) is None
+
+
+def test_price_change_within_the_data(service):
+    change = service.price_change("Maize", "Eastern Region, Ghana", on=date(2025, 1, 9))
+
+    assert change["current"] == 120.0
+    assert change["previous"] == 100.0
+    assert change["change_percent"] == 20.0
+    assert change["direction"] == "up"
+    assert change["price_date"] == "2025-01-08"
+    assert change["stale"] is False
+
+
+def test_price_change_after_the_data_is_measured_from_its_last_day(service):
+    change = service.price_change("Maize", "Eastern Region, Ghana", on=date(2026, 1, 1))
+
+    # Clamped to 2025-01-11 and compared with 2025-01-04, not with itself
+    assert change["current"] == 121.0
+    assert change["previous"] == 110.0
+    assert change["change"] == 11.0
+    assert change["price_date"] == "2025-01-11"
+    assert change["stale"] is True
+
+    falling = service.price_change("Maize", "Ashanti Region, Ghana", on=date(2026, 1, 1))
+    assert falling["direction"] == "down"
+    assert falling["change_percent"] == -5.0
+
+
+@pytest.fixture
+def mobile_client():
+    app = Flask(__name__)
+    app.register_blueprint(mobile_app, url_prefix="/mobile")
+    return app.test_client()
+
+
+def test_mobile_market_prices(mobile_client):
+    response = mobile_client.get("/mobile/api/market-prices?region=Eastern Region")
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["region"] == "Eastern Region, Ghana"
+    assert data["prices"]
+    assert data["last_updated"] == max(change["price_date"] for change in data["prices"].values())
+    assert all(len(history) == 30 for history in data["history"].values())
+
+
+def test_mobile_market_prices_for_unknown_region(mobile_client):
+    response = mobile_client.get("/mobile/api/market-prices?region=Atlantis")
+
+    assert response.status_code == 404
+
+
+def test_mobile_loan_status(mobile_client):
+    response = mobile_client.get("/mobile/api/loan-status")
+
+    assert response.status_code == 200
+    assert response.get_json()["last_updated"]
@@ -0,0 +1,33 @@
+import numpy as np
+
+from climate.services.ndvi_trend_engine import NDVITrendEngine
+
+
+def test_fit_slopes_matches_polyfit_per_row():
+    rng = np.random.default_rng(7)
+    values = rng.uniform(0.2, 0.8, size=(50, 24))
+    values[rng.random(values.shape) < 0.2] = np.nan
+
+    slopes, intercepts, counts = NDVITrendEngine().fit_slopes(values)
+
+    for row, slope, intercept, count in zip(values, slopes, intercepts, counts):
+        valid = ~np.isnan(row)
+        assert count == valid.sum()
+        expected_slope, expected_intercept = np.polyfit(np.flatnonzero(valid), row[valid], 1)
+        assert np.isclose(slope, expected_slope)
+        assert np.isclose(intercept, expected_intercept)
+
+
+def test_fit_slopes_needs_two_observations():
+    values = np.array([
+        [0.5, np.nan, np.nan],
+        [np.nan, np.nan, np.nan],
+        [0.4, np.nan, 0.6],
+    ])
+
+    slopes, intercepts, counts = NDVITrendEngine().fit_slopes(values)
+
+    assert np.isnan(slopes[0]) and intercepts[0] == 0.5
+    assert np.isnan(slopes[1]) and np.isnan(intercepts[1])
+    assert np.isclose(slopes[2], 0.1) and np.isclose(intercepts[2], 0.4)
+    assert counts.tolist() == [1, 0, 2]
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from api import db
+from api.models import CropType, Farm, Farmer, Loan, LoanStatus, LoanType, Payment
+from api.serializers import FARM_SCHEMA, FARMER_SCHEMA, LOAN_SCHEMA
+
+
+@pytest.fixture
+def records(app):
+    """Farmers with farms and loans covering the optional and derived fields"""
+    with app.app_context():
+        now = datetime(2025, 3, 1, 9, 30)
+        kofi = Farmer(first_name="Kofi", last_name="Mensah", phone_number="+233201", location="Ashanti",
+                      latitude=6.69, longitude=-1.62, registration_date=now - timedelta(days=400))
+        wanjiku = Farmer(first_name="Wanjiku", last_name="Kamau", phone_number="+254701", location="Rift Valley")
+        db.session.add_all([kofi, wanjiku])
+        db.session.flush()
+
+        db.session.add_all([
+            Farm(farmer_id=kofi.id, name="Hillside", size_hectares=2.5, primary_crop=CropType.MAIZE,
+                 secondary_crop=CropType.CASSAVA, location="Ashanti", latitude=6.7, longitude=-1.6,
+                 last_ndvi_value=0.62, last_ndvi_date=now, ndvi_health_status="Good", ndvi_trend="improving"),
+            Farm(farmer_id=kofi.id, name="River plot", size_hectares=1.0, primary_crop=CropType.COCOA,
+                 location="Ashanti", last_ndvi_value=0.0, last_ndvi_date=now,
+                 ndvi_health_status="Poor", ndvi_trend="stable"),
+            Farm(farmer_id=wanjiku.id, name="Valley", size_hectares=4.0, primary_crop=CropType.MAIZE,
+                 location="Rift Valley", latitude=-0.3, longitude=None),
+        ])
+
+        pending = Loan(farmer_id=kofi.id, loan_type=LoanType.SEASONAL, amount=500, interest_rate=12,
+                       term_months=6, status=LoanStatus.PENDING)
+        repaying = Loan(farmer_id=kofi.id, loan_type=LoanType.EQUIPMENT, amount=2000, interest_rate=10,
+                        term_months=12, status=LoanStatus.REPAYING, approval_date=now - timedelta(days=90),
+                        disbursement_date=now - timedelta(days=80), due_date=now + timedelta(days=285),
+                        credit_score=71.5, climate_risk_factor=0.2)
+        disbursed = Loan(farmer_id=wanjiku.id, loan_type=LoanType.EXPANSION, amount=800, interest_rate=11,
+                         term_months=9, status=LoanStatus.DISBURSED, disbursement_date=now - timedelta(days=10))
+        db.session.add_all([pending, repaying, disbursed])
+        db.session.flush()
+
+        db.session.add_all([
+            Payment(loan_id=repaying.id, amount=300, payment_method="mobile_money", payment_date=now - timedelta(days=50)),
+            Payment(loan_id=repaying.id, amount=250.5, payment_method="mobile_money", payment_date=now - timedelta(days=20)),
+        ])
+        db.session.commit()
+    return app
+
+
+@pytest.mark.parametrize("schema, model", [
+    (FARMER_SCHEMA, Farmer),
+    (FARM_SCHEMA, Farm),
+    (LOAN_SCHEMA, Loan),
+])
+def test_schema_matches_to_dict(records, schema, model):
+    with records.app_context():
+        serialized = schema.serialize(db.session.execute(schema.select()).all())
+        expected = [record.to_dict() for record in db.session.query(model).order_by(model.id)]
+
+    assert serialized == expected
+    assert len(serialized) > 1
+
+
+def test_farm_crop_health_and_coordinates(records):
+    with records.app_context():
+        farms = FARM_SCHEMA.serialize(db.session.execute(FARM_SCHEMA.select()).all())
+
+    assert farms[0]["crop_health"]["health_status"] == "Good"
+    assert farms[1]["crop_health"]["ndvi_value"] == 0.0
+    assert farms[1]["coordinates"] is None
+    assert farms[2]["crop_health"] is None
+    assert farms[2]["coordinates"] is None
+
+
+def test_loan_balances(records):
+    with records.app_context():
+        loans = LOAN_SCHEMA.serialize(db.session.execute(LOAN_SCHEMA.select()).all())
+
+    assert loans[0]["remaining_balance"] == 500
+    assert loans[0]["next_payment_date"] is None
+    assert loans[1]["remaining_balance"] == pytest.approx(2000 - 550.5)
+    assert loans[2]["remaining_balance"] == 800